@@ -0,0 +1,194 @@
+"""Benchmarks for the session report, chart and game recording paths.
+
+Builds synthetic sessions of increasing length and drives the real handlers through
+fake interactions, with no network. Reports wall time and peak Python memory per size.
+
+    python benchmark.py
+    python benchmark.py --sizes 10 1000 100000 --repeat 5
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+# Keep the benchmark's journal away from real casino data
+os.environ["CASINO_DATA_DIR"] = tempfile.mkdtemp(prefix="casino-bench-")
+
+import main
+from charts import render_session_chart
+from game_records import GameRecord
+
+DEFAULT_SIZES = (10, 100, 1000, 10000, 100000)
+GUILD_ID = 1
+
+# Realistic outcome mix for a player using basic strategy
+OUTCOME_WEIGHTS = {"win": 42.0, "lose": 47.5, "tie": 8.5, "blackjack": 4.5, "cashout": 1.0}
+BET_SIZES = (50, 100, 100, 200, 250, 500, 1000)
+SPLIT_RATE = 0.03
+DOUBLE_RATE = 0.10
+SIDE_BET_RATE = 0.15
+SIDE_BET_HIT_RATE = 0.25
+
+
+class FakeResponse:
+    def __init__(self):
+        self._done = False
+
+    def is_done(self):
+        return self._done
+
+    async def _respond(self, *args, **kwargs):
+        self._done = True
+
+    send_message = edit_message = send_modal = defer = _respond
+
+
+class FakeFollowup:
+    async def send(self, *args, **kwargs):
+        pass
+
+
+class FakeInteraction:
+    """Just enough of discord.Interaction for the casino handlers."""
+
+    def __init__(self, user_id):
+        self.user = SimpleNamespace(id=user_id, mention=f"<@{user_id}>", display_name=f"player{user_id}")
+        self.id = id(self)
+        self.message = None
+        self.guild_id = GUILD_ID
+        self.created_at = datetime.now(timezone.utc)
+        self.response = FakeResponse()
+        self.followup = FakeFollowup()
+
+    async def edit_original_response(self, **kwargs):
+        pass
+
+
+def synthetic_game(rng):
+    outcome = rng.choices(list(OUTCOME_WEIGHTS), weights=list(OUTCOME_WEIGHTS.values()))[0]
+    amount = rng.choice(BET_SIZES)
+    if outcome == "cashout":
+        return GameRecord.partial_cashout(amount, rng.randint(0, amount))
+    side_bets = None
+    side_bet_winnings = 0
+    if rng.random() < SIDE_BET_RATE:
+        side_bets = {"Perfect Pair": amount // 10}
+        side_bet_winnings = amount // 10 * 5 if rng.random() < SIDE_BET_HIT_RATE else 0
+    is_split = rng.random() < SPLIT_RATE
+    is_double = not is_split and rng.random() < DOUBLE_RATE
+    return GameRecord.new(outcome, amount * (2 if is_double else 1), side_bets, side_bet_winnings, is_split, is_double)
+
+
+def synthetic_session(user_id, hands, rng):
+    """A fresh active session with `hands` games already recorded."""
+    session = main.sessions.get(GUILD_ID, user_id)
+    session.start(100000)
+    for _ in range(hands):
+        session.add_game(synthetic_game(rng))
+    return session
+
+
+async def measure(prepare, action, repeat):
+    """Best wall time over `repeat` runs of action(prepare()), then one traced run for peak memory."""
+    best = float("inf")
+    for _ in range(repeat):
+        state = prepare()
+        started = time.perf_counter()
+        await action(state)
+        best = min(best, time.perf_counter() - started)
+
+    state = prepare()
+    tracemalloc.start()
+    await action(state)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+async def bench_record_game(size, repeat, rng, user_ids):
+    """Cost of recording one more hand into a session that already has `size` hands."""
+    session = synthetic_session(next(user_ids), size, rng)
+    view = main.GameView(session.user_id, 100)
+
+    async def record(interaction):
+        await view.record_game(interaction, session, rng.choice(("win", "lose", "tie", "blackjack")), 100)
+
+    return await measure(lambda: FakeInteraction(session.user_id), record, repeat)
+
+
+async def bench_session_report(size, repeat, rng, user_ids):
+    """Full end-of-session report, including the chart render in the worker pool."""
+    main.chart_cache = main.ChartCache(0)  # Every report has to render
+    casino_view = main.CasinoView()
+
+    def prepare():
+        session = synthetic_session(next(user_ids), size, rng)
+        return FakeInteraction(session.user_id), session
+
+    async def report(state):
+        await casino_view.generate_session_report(*state)
+
+    return await measure(prepare, report, repeat)
+
+
+async def bench_create_game_chart(size, repeat, rng, user_ids):
+    """Chart render through the worker pool, as seen from the event loop."""
+    main.chart_cache = main.ChartCache(0)
+    columns = synthetic_session(next(user_ids), size, rng).session_games.columns()
+
+    async def chart(_):
+        await main.CasinoView().create_game_chart(columns, 100000)
+
+    return await measure(lambda: None, chart, repeat)
+
+
+async def bench_render_in_process(size, repeat, rng, user_ids):
+    """The chart render itself, run in this process so its memory is traced."""
+    columns = synthetic_session(next(user_ids), size, rng).session_games.columns()
+
+    async def render(_):
+        render_session_chart(columns, 100000, main.CHART_CONFIG["lod_threshold"], main.CHART_ENCODING)
+
+    return await measure(lambda: None, render, repeat)
+
+
+BENCHMARKS = {
+    "record_game": bench_record_game,
+    "session_report": bench_session_report,
+    "create_game_chart": bench_create_game_chart,
+    "render_in_process": bench_render_in_process,
+}
+
+
+async def run(sizes, repeat, seed, selected):
+    rng = random.Random(seed)
+    user_ids = iter(range(1, 10 ** 9))
+    # Start the chart workers before timing anything
+    await main.chart_pool.run(render_session_chart, synthetic_session(0, 10, rng).session_games.columns())
+
+    print(f"{'benchmark':<20} {'hands':>8} {'best ms':>10} {'peak KiB':>10}")
+    for name in selected:
+        for size in sizes:
+            best, peak = await BENCHMARKS[name](size, repeat, rng, user_ids)
+            print(f"{name:<20} {size:>8,} {best * 1000:>10.2f} {peak / 1024:>10.1f}")
+            await main.journal.flush()
+    main.chart_pool.shutdown()
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Session lengths in hands")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per size; the best time is reported")
+    parser.add_argument("--seed", type=int, default=1234, help="Seed for the synthetic sessions")
+    parser.add_argument("--only", choices=list(BENCHMARKS), nargs="+", default=list(BENCHMARKS), help="Benchmarks to run")
+    args = parser.parse_args()
+    asyncio.run(run(args.sizes, args.repeat, args.seed, args.only))
+
+
+if __name__ == "__main__":
+    main_cli()
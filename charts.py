@@ -0,0 +1,287 @@
+import hashlib
+import time
+from collections import OrderedDict
+import numpy as np
+from game_records import GameHistory, GameRecord, Outcome, FLAG_PARTIAL_CASHOUT
+from image_encoding import encode_figure
+
+plt = None  # matplotlib.pyplot, imported on first render so importing this module stays cheap
+
+
+def _pyplot():
+    global plt
+    if plt is None:
+        import matplotlib
+        matplotlib.use('Agg')  # Use non-interactive backend
+        import matplotlib.pyplot as pyplot
+        plt = pyplot
+    return plt
+
+# Bar colour for each outcome, indexed by Outcome value
+OUTCOME_COLORS = np.array(['#00ff41', '#ff4757', '#ffaa00', '#ffd700', '#00aaff'])
+OUTCOME_LABELS = ('Win', 'Lose', 'Tie', 'Blackjack', 'Cash Out')
+
+LOD_BINS = 60  # Bars drawn for a long session, whatever its length
+LOD_MAX_LINE_POINTS = 2000  # Points kept on the profit line for a long session
+
+
+def _session_series(columns, starting_balance):
+    """Vectorized per-game profit/loss, running profit and balance for a session."""
+    codes = np.asarray(columns["outcomes"], dtype=np.int64)
+    amounts = np.asarray(columns["amounts"], dtype=np.int64)
+    refunds = np.asarray(columns["refunds"], dtype=np.int64)
+    side_bet_winnings = np.asarray(columns["side_winnings"], dtype=np.int64)
+    partial = (np.asarray(columns["flags"], dtype=np.int64) & FLAG_PARTIAL_CASHOUT) != 0
+
+    # A balance cash out counts in full; a cash out from a bet loses the rest of the bet
+    cashout_change = np.where(partial, refunds - (amounts - refunds), amounts)
+    changes = np.select(
+        [codes == Outcome.WIN, codes == Outcome.LOSE, codes == Outcome.BLACKJACK, codes == Outcome.CASHOUT],
+        [amounts, -amounts, amounts * 3 // 2, cashout_change],  # Blackjack 3:2 payout
+        default=0  # No money change on tie
+    )
+    cumulative_profit = np.cumsum(changes)
+    running_profit = cumulative_profit + side_bet_winnings
+    game_changes = changes + side_bet_winnings
+    total_balances = starting_balance + running_profit
+    return codes, amounts, game_changes, running_profit, total_balances
+
+
+class ChartCache:
+    """LRU cache of rendered charts, keyed by a hash of the session's games."""
+
+    def __init__(self, max_entries=32):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def key(columns, *params):
+        digest = hashlib.blake2b(digest_size=16)
+        for name in sorted(columns):
+            digest.update(name.encode())
+            digest.update(np.asarray(columns[name]).tobytes())
+        digest.update(repr(params).encode())
+        return digest.hexdigest()
+
+    def get(self, key):
+        chart = self._entries.get(key)
+        if chart is not None:
+            self._entries.move_to_end(key)
+        return chart
+
+    def put(self, key, chart):
+        self._entries[key] = chart
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class ChartTemplate:
+    """Prebuilt, pre-styled session figure that is reused for every render in a worker.
+
+    The axes styling, titles, zero line, profit line and stats box are created once
+    and updated in place; only the data-dependent bars, fills and annotations are
+    rebuilt on each render.
+    """
+
+    def __init__(self):
+        self.fig, (self.ax1, self.ax2) = plt.subplots(2, 1, figsize=(14, 10))
+        self.fig.patch.set_facecolor('#2f3136')
+
+        # Top chart - Bet amounts and outcomes
+        self.ax1.set_facecolor('#36393f')
+        self.ax1.set_ylabel('Bet Amount (₹)', color='white', fontweight='bold')
+        self.ax1.grid(True, axis='y', alpha=0.3, linestyle=':')
+
+        # Bottom chart - Running profit trend
+        self.ax2.set_facecolor('#36393f')
+        self.profit_line, = self.ax2.plot([], [], color='#ffd700', label='Net Profit')
+        self.zero_line = self.ax2.axhline(0, color='white', linestyle='--', linewidth=2, alpha=0.7)
+        self.ax2.set_xlabel('Game Number', color='white', fontweight='bold')
+        self.ax2.set_ylabel('Session Net Profit (₹)', color='white', fontweight='bold')
+        self.ax2.set_title('📈 Cumulative Profit/Loss Trend', color='#ffd700', fontsize=14, fontweight='bold', pad=15)
+        self.ax2.grid(True, alpha=0.3, linestyle=':')
+        self.stats_text = self.ax2.text(0.02, 0.98, '', transform=self.ax2.transAxes, fontsize=10,
+                verticalalignment='top', bbox=dict(boxstyle='round', facecolor='#36393f', alpha=0.8),
+                color='white')
+        self._persistent = {self.profit_line, self.zero_line, self.stats_text}
+
+    def clear(self):
+        """Remove everything drawn by the previous render."""
+        for ax in (self.ax1, self.ax2):
+            for container in list(ax.containers):
+                container.remove()
+            for artist in [*ax.patches, *ax.texts, *ax.collections, *ax.lines]:
+                if artist not in self._persistent:
+                    artist.remove()
+            if ax.get_legend() is not None:
+                ax.get_legend().remove()
+
+
+_template = None
+
+
+def _get_template():
+    global _template
+    if _template is None:
+        _template = ChartTemplate()
+    return _template
+
+
+def warm_up():
+    """Load matplotlib, its font cache and the figure template with a throwaway render.
+
+    Used as the chart workers' initializer, so the first real report is not slowed
+    down by cold imports. Returns the seconds spent, or 0 if this worker was already warm.
+    """
+    if _template is not None:
+        return 0.0
+    started = time.perf_counter()
+    history = GameHistory()
+    for outcome in Outcome:
+        history.append(GameRecord(outcome, 100))
+    render_session_chart(history.columns(), 1000)
+    return time.perf_counter() - started
+
+
+def render_session_chart(columns, starting_balance=0, lod_threshold=100, encoding=None):
+    """Render the session chart from GameHistory columns. Returns (image bytes, encode info).
+
+    Sessions longer than lod_threshold are drawn in level-of-detail mode, so the
+    render cost stays flat however many games were played. encoding holds
+    image_encoding.encode_figure options (format, byte budget, dpi steps).
+    Runs inside a worker process, so it only takes and returns plain picklable data.
+    """
+    # Scoped style, so the global rcParams are never touched
+    with _pyplot().style.context('dark_background'):
+        template = _get_template()
+        try:
+            return _render(template, columns, starting_balance, lod_threshold, encoding or {})
+        except Exception as e:
+            print(f"Error creating chart: {e}")
+            raise e
+        finally:
+            template.clear()
+
+
+def _render(template, columns, starting_balance, lod_threshold, encoding):
+    ax1, ax2 = template.ax1, template.ax2
+    codes, amounts, game_changes, running_profit, total_balances = _session_series(columns, starting_balance)
+    total_games = len(codes)
+    game_numbers = np.arange(1, total_games + 1)
+
+    if total_games > lod_threshold:
+        line_x, line_y = _lod_profit_line(game_numbers, running_profit)
+        template.profit_line.set(data=(line_x, line_y), linewidth=2, marker='')
+    else:
+        line_x, line_y = game_numbers, running_profit
+        template.profit_line.set(data=(line_x, line_y), linewidth=3, marker='o', markersize=10)
+    for ax in (ax1, ax2):
+        ax.relim()
+
+    if total_games > lod_threshold:
+        _draw_binned_results(ax1, codes, amounts, game_changes)
+        _annotate_profit_extremes(ax2, game_numbers, running_profit, total_balances)
+    else:
+        _draw_game_results(ax1, game_numbers, codes, amounts, game_changes)
+        _annotate_profit_trend(ax2, game_numbers, running_profit, game_changes, total_balances)
+
+    ax2.fill_between(line_x, line_y, 0, where=line_y >= 0,
+                   color='#00ff41', alpha=0.3, interpolate=True, label='Profit Zone')
+    ax2.fill_between(line_x, line_y, 0, where=line_y < 0,
+                   color='#ff4757', alpha=0.3, interpolate=True, label='Loss Zone')
+    ax2.legend(loc='upper left')
+    for ax in (ax1, ax2):
+        ax.autoscale_view()
+
+    # Update the statistics text box
+    counts = np.bincount(codes, minlength=len(Outcome))
+    wins = int(counts[Outcome.WIN])
+    losses = int(counts[Outcome.LOSE])
+    ties = int(counts[Outcome.TIE])
+    blackjacks = int(counts[Outcome.BLACKJACK])
+    win_rate = ((wins + blackjacks) / total_games) * 100 if total_games > 0 else 0
+    final_profit = int(running_profit[-1]) if total_games else 0
+    template.stats_text.set_text(f'📊 Session Stats:\nGames: {total_games} | W: {wins} | L: {losses} | T: {ties} | BJ: {blackjacks}\nWin Rate: {win_rate:.1f}% | Final P&L: ₹{final_profit:+,}')
+
+    template.fig.tight_layout()
+    return encode_figure(template.fig, total_games, **encoding)
+
+
+def _format_change(change):
+    return f"₹{change:+,}" if change != 0 else "₹0"
+
+
+def _draw_game_results(ax, game_numbers, codes, amounts, game_changes):
+    """Top chart for short sessions - one labelled bar per game."""
+    bars = ax.bar(game_numbers, amounts, color=OUTCOME_COLORS[codes], alpha=0.7, edgecolor='white', linewidth=0.5)
+
+    # Add profit/loss labels on bars
+    label_offset = amounts.max() * 0.02
+    for bar, change in zip(bars, game_changes.tolist()):
+        ax.text(bar.get_x() + bar.get_width()/2., bar.get_height() + label_offset,
+                _format_change(change), ha='center', va='bottom', color='white', fontweight='bold', fontsize=9)
+
+    ax.set_xlabel('Game Number', color='white', fontweight='bold')
+    ax.set_title('🎰 BlackJack Session - Individual Game Results', color='#ffd700', fontsize=14, fontweight='bold', pad=15)
+
+
+def _annotate_profit_trend(ax, game_numbers, running_profit, game_changes, total_balances):
+    """Bottom chart for short sessions - every game annotated."""
+    # Add annotations showing profit/loss change and total balance at each point
+    for i, (x, y, change, balance) in enumerate(zip(game_numbers.tolist(), running_profit.tolist(), game_changes.tolist(), total_balances.tolist())):
+        # Position annotation above or below point based on space
+        y_offset = 15 if i % 2 == 0 else -25
+        _annotate_point(ax, x, y, f"{_format_change(change)}\n(₹{balance:,})", y_offset)
+
+
+def _draw_binned_results(ax, codes, amounts, game_changes):
+    """Top chart for long sessions - wagered amount per block of games, stacked by outcome."""
+    total_games = len(codes)
+    bins = min(LOD_BINS, total_games)
+    bin_index = np.arange(total_games) * bins // total_games
+    edges = np.searchsorted(bin_index, np.arange(bins))  # First game (0-based) in each bin
+    centers = (edges + np.append(edges[1:], total_games)) / 2 + 0.5
+    width = total_games / bins * 0.9
+
+    bottom = np.zeros(bins)
+    for outcome in Outcome:
+        wagered = np.bincount(bin_index, weights=np.where(codes == outcome, amounts, 0), minlength=bins)
+        if wagered.any():
+            ax.bar(centers, wagered, width=width, bottom=bottom, color=OUTCOME_COLORS[outcome],
+                   alpha=0.7, edgecolor='white', linewidth=0.3, label=OUTCOME_LABELS[outcome])
+            bottom += wagered
+
+    # Only the best and worst blocks get a profit/loss label
+    bin_changes = np.bincount(bin_index, weights=game_changes, minlength=bins)
+    for i in {int(bin_changes.argmax()), int(bin_changes.argmin())}:
+        ax.annotate(_format_change(int(bin_changes[i])), (centers[i], bottom[i]), xytext=(0, 4), textcoords='offset points',
+                    ha='center', va='bottom', color='white', fontweight='bold', fontsize=9)
+
+    ax.legend(loc='upper left', ncol=len(Outcome), fontsize=8)
+    ax.set_xlabel(f'Game Number (blocks of ~{total_games / bins:.0f} games)', color='white', fontweight='bold')
+    ax.set_title('🎰 BlackJack Session - Wagered per Block of Games', color='#ffd700', fontsize=14, fontweight='bold', pad=15)
+
+
+def _lod_profit_line(game_numbers, running_profit):
+    """Profit line for long sessions, decimated to LOD_MAX_LINE_POINTS but keeping the peak and trough."""
+    total_games = len(game_numbers)
+    keep = np.linspace(0, total_games - 1, min(total_games, LOD_MAX_LINE_POINTS)).astype(np.int64)
+    keep = np.union1d(keep, [int(running_profit.argmax()), int(running_profit.argmin())])
+    return game_numbers[keep], running_profit[keep]
+
+
+def _annotate_profit_extremes(ax, game_numbers, running_profit, total_balances):
+    """Bottom chart for long sessions - annotated only at the peak, trough and last game."""
+    peak, trough = int(running_profit.argmax()), int(running_profit.argmin())
+    for i, label, y_offset in ((peak, 'Peak', 15), (trough, 'Low', -25), (len(game_numbers) - 1, 'Final', 15)):
+        _annotate_point(ax, int(game_numbers[i]), int(running_profit[i]),
+                        f"{label}: {_format_change(int(running_profit[i]))}\n(₹{int(total_balances[i]):,})", y_offset)
+
+
+def _annotate_point(ax, x, y, text, y_offset):
+    ax.annotate(text, (x, y),
+               xytext=(0, y_offset), textcoords='offset points',
+               ha='center', va='center' if y_offset > 0 else 'top',
+               fontsize=8, fontweight='bold', color='white',
+               bbox=dict(boxstyle='round,pad=0.3', facecolor='black', alpha=0.7, edgecolor='#ffd700'))
@@ -0,0 +1,94 @@
+"""Runs the bot as a shard cluster: several processes, each owning a range of shards.
+
+Casino state is shared through the SQLite store, so any process can serve any player.
+Each process gets its own health server port, counting up from --port. Processes
+that crash or are killed are restarted with a growing delay; one that exits
+cleanly, such as when the token is missing, stays stopped.
+
+    python cluster.py --processes 4 --shards 8
+"""
+import argparse
+import asyncio
+import os
+import signal
+import sys
+import time
+
+MAIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+MAX_RESTART_DELAY = 60  # Seconds between restarts of a process that keeps crashing
+STABLE_AFTER = 300  # Seconds of uptime after which a crash no longer counts towards the delay
+
+
+def shard_ranges(shards, processes):
+    """Split shard ids into contiguous, evenly sized ranges, one per process."""
+    per_process, extra = divmod(shards, processes)
+    ranges = []
+    start = 0
+    for index in range(processes):
+        size = per_process + (index < extra)
+        ranges.append(list(range(start, start + size)))
+        start += size
+    return [shard_ids for shard_ids in ranges if shard_ids]
+
+
+async def supervise(index, shard_ids, shards, port, stopping):
+    """Run one cluster process, restarting it until the launcher is stopped."""
+    name = f"cluster-{index}"
+    env = dict(os.environ)
+    env.update({
+        "CLUSTER_NAME": name,
+        "SHARD_COUNT": str(shards),
+        "SHARD_IDS": ",".join(map(str, shard_ids)),
+        "PORT": str(port + index),
+        "CASINO_STORE": "sqlite",
+    })
+    delay = 1
+    while not stopping.is_set():
+        started = time.monotonic()
+        process = await asyncio.create_subprocess_exec(sys.executable, MAIN, env=env)
+        print(f"🚀 {name} started (pid {process.pid}) with shards {shard_ids[0]}-{shard_ids[-1]} of {shards}, health on port {port + index}")
+        stopper = asyncio.create_task(stopping.wait())
+        exited = asyncio.create_task(process.wait())
+        await asyncio.wait((stopper, exited), return_when=asyncio.FIRST_COMPLETED)
+        stopper.cancel()
+        if not exited.done():
+            process.terminate()
+            await process.wait()
+            return
+        if process.returncode == 0:
+            print(f"🛑 {name} exited cleanly, not restarting it")
+            return
+        if time.monotonic() - started > STABLE_AFTER:
+            delay = 1
+        # A negative return code means the process was killed by that signal
+        print(f"⚠️ {name} exited with code {process.returncode}, restarting in {delay}s")
+        try:
+            await asyncio.wait_for(stopping.wait(), delay)
+        except asyncio.TimeoutError:
+            pass
+        delay = min(delay * 2, MAX_RESTART_DELAY)
+
+
+async def run(processes, shards, port):
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+    ranges = shard_ranges(shards, processes)
+    await asyncio.gather(*(supervise(index, shard_ids, shards, port, stopping) for index, shard_ids in enumerate(ranges)))
+    print("🛑 Cluster stopped")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1, help="Bot processes to run")
+    parser.add_argument("--shards", type=int, required=True, help="Total shard count across every process")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8080")), help="Health server port of the first process")
+    args = parser.parse_args()
+    if args.processes < 1 or args.shards < 1:
+        parser.error("--processes and --shards must be at least 1")
+    asyncio.run(run(args.processes, args.shards, args.port))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,120 @@
+import asyncio
+from collections import Counter, deque
+from datetime import datetime, timezone
+
+import discord
+
+from outbound import Priority
+
+# Discord limits for a single message
+MAX_FIELDS_PER_EMBED = 25
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_CHARS_PER_MESSAGE = 5500  # Below the 6000 character limit, leaving room for titles and footers
+
+
+class CommandLogWriter:
+    """Background writer that batches command log entries into multi-field embeds.
+
+    Commands only enqueue an entry; the writer posts everything that arrived during
+    a flush interval as one message. The buffer is bounded: once full, new entries are
+    dropped and counted, and the next message carries a summary of what was lost.
+    """
+
+    def __init__(self, bot, channel_id, flush_interval=2.0, max_buffer=200, outbound=None):
+        self.bot = bot
+        self.outbound = outbound  # OutboundScheduler the batches are sent through, at log priority
+        self.channel_id = channel_id
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self._buffer = deque()
+        self._dropped = Counter()
+        self._wake = asyncio.Event()
+
+    @property
+    def pending(self):
+        return len(self._buffer)
+
+    def log(self, ctx, command_name, details=""):
+        """Queue a log entry. Never blocks and never raises."""
+        if len(self._buffer) >= self.max_buffer:
+            self._dropped[command_name] += 1
+            return
+        self._buffer.append((
+            datetime.now(timezone.utc), command_name, ctx.author.mention,
+            ctx.channel.mention, str(ctx.author), details
+        ))
+        if len(self._buffer) >= MAX_FIELDS_PER_EMBED * MAX_EMBEDS_PER_MESSAGE:
+            self._wake.set()
+
+    def _new_embed(self, timestamp):
+        embed = discord.Embed(title="🔧 Commands Used", color=0x00ff00, timestamp=timestamp)
+        embed.set_footer(text="♠️ ʟᴏʟᴇᴛᴛᴀɴ Logs")
+        return embed
+
+    def _take_batch(self):
+        """Pop as many entries as fit in one message and build its embeds."""
+        embeds = []
+        chars = 0
+        logged = []
+        # Keep room for the dropped-entries summary when there is one
+        max_embeds = MAX_EMBEDS_PER_MESSAGE - (1 if self._dropped else 0)
+        max_chars = MAX_CHARS_PER_MESSAGE - (1100 if self._dropped else 0)
+        while self._buffer:
+            when, command_name, user, channel, author, details = self._buffer[0]
+            name = f"`{command_name}` • <t:{int(when.timestamp())}:T>"
+            value = f"{user} in {channel}"
+            if details:
+                value += f"\n{details}"
+            value = value[:1024]
+            if chars + len(name) + len(value) > max_chars:
+                break
+            if not embeds or len(embeds[-1].fields) >= MAX_FIELDS_PER_EMBED:
+                if len(embeds) >= max_embeds:
+                    break
+                embeds.append(self._new_embed(when))
+            embeds[-1].add_field(name=name, value=value, inline=False)
+            chars += len(name) + len(value)
+            logged.append(f"{command_name} by {author}")
+            self._buffer.popleft()
+
+        if self._dropped:
+            dropped = ", ".join(f"`{name}` ×{count}" for name, count in self._dropped.items())
+            if not embeds or len(embeds[-1].fields) >= MAX_FIELDS_PER_EMBED:
+                embeds.append(self._new_embed(datetime.now(timezone.utc)))
+            embeds[-1].add_field(
+                name=f"⚠️ {sum(self._dropped.values())} entries dropped (log buffer full)",
+                value=dropped[:1024], inline=False
+            )
+            self._dropped.clear()
+        return embeds, logged
+
+    async def flush(self):
+        """Send everything buffered, one message per batch."""
+        if not self._buffer and not self._dropped:
+            return
+        log_channel = self.bot.get_channel(self.channel_id)
+        if log_channel is None:
+            print(f"❌ Log channel not found: {self.channel_id}")
+            self._buffer.clear()
+            return
+        while self._buffer or self._dropped:
+            embeds, logged = self._take_batch()
+            if self.outbound is not None:
+                await self.outbound.send(Priority.LOG, f"channel:{log_channel.id}", log_channel.send, embeds=embeds)
+            else:
+                await log_channel.send(embeds=embeds)
+            print(f"✅ Logged {len(logged)} commands: {'; '.join(logged)}")
+
+    async def run(self):
+        """Background loop that flushes the buffer every flush_interval seconds."""
+        await self.bot.wait_until_ready()
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"❌ Error sending command logs: {e}")
@@ -0,0 +1,106 @@
+import csv
+import io
+import json
+import zlib
+
+from game_records import FLAG_DOUBLE, FLAG_PARTIAL_CASHOUT, FLAG_SIDE_BETS, FLAG_SPLIT, OUTCOME_NAMES, net_change
+
+CSV_HEADER = ("game", "timestamp", "outcome", "amount", "refund_amount", "side_bet_winnings",
+              "split", "double", "side_bets", "partial_cashout", "net_change")
+
+# Headroom left below the size limit for what the compressor still holds when a part is closed
+PART_MARGIN = 64 * 1024
+
+
+def iter_columns(history, chunk_games=10000):
+    """Yield (first_position, columns) for consecutive chunks of the history.
+
+    Each chunk is a copy, taken in one go, so it must be pulled on the event loop that
+    appends to and trims the history; formatting and compressing the copy can then
+    happen in a thread. Positions are absolute, so a trim of the history between
+    chunks skips the dropped games instead of repeating any.
+    """
+    position = history.base
+    while True:
+        position = max(position, history.base)
+        offset = position - history.base
+        columns = {name: getattr(history, name)[offset:offset + chunk_games] for name, _ in history.COLUMNS}
+        count = len(columns["outcomes"])
+        if not count:
+            return
+        yield position, columns
+        position += count
+
+
+def csv_block(first, columns):
+    """CSV text for one chunk, without the header."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(
+        (first + i, ts, OUTCOME_NAMES[code], amount, refund, side,
+         int(bool(flags & FLAG_SPLIT)), int(bool(flags & FLAG_DOUBLE)), int(bool(flags & FLAG_SIDE_BETS)),
+         int(bool(flags & FLAG_PARTIAL_CASHOUT)), net_change(code, amount, refund, side, flags))
+        for i, (code, amount, refund, side, ts, flags) in enumerate(zip(
+            columns["outcomes"], columns["amounts"], columns["refunds"],
+            columns["side_winnings"], columns["timestamps"], columns["flags"]
+        ))
+    )
+    return buffer.getvalue()
+
+
+def column_block(first, columns):
+    """One JSON Lines object of column lists for a chunk: the compact columnar layout."""
+    block = {"first_game": first}
+    block.update((name, column.tolist()) for name, column in columns.items())
+    block["outcomes"] = [OUTCOME_NAMES[code] for code in block["outcomes"]]
+    return json.dumps(block, separators=(",", ":")) + "\n"
+
+
+class GzipParts:
+    """Gzips chunks of a history export into parts no larger than max_bytes.
+
+    Every part is a complete .gz file starting with the header, so each attachment
+    can be opened on its own. Only the part being filled is held in memory. add()
+    and close() do the formatting and compression, so they can run in a thread.
+    """
+
+    def __init__(self, fmt="csv", max_bytes=8 * 1024 * 1024):
+        if fmt == "csv":
+            header = io.StringIO()
+            csv.writer(header).writerow(CSV_HEADER)
+            self.header = header.getvalue()
+            self.format_block = csv_block
+        elif fmt == "columns":
+            self.header = ""
+            self.format_block = column_block
+        else:
+            raise ValueError(f"Unknown export format: {fmt}")
+        self.max_bytes = max_bytes
+        self._compressor = None
+        self._part = bytearray()
+        self._largest_step = 0  # Most compressed output a single block has added so far
+
+    def add(self, first, columns):
+        """Compress one chunk. Returns the parts it completed, usually none."""
+        if self._compressor is None:
+            self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 writes a gzip container
+            self._part += self._compressor.compress(self.header.encode())
+        size = len(self._part)
+        self._part += self._compressor.compress(self.format_block(first, columns).encode())
+        self._largest_step = max(self._largest_step, len(self._part) - size)
+        # Close the part while the next block is still sure to fit
+        if len(self._part) + self._largest_step >= self.max_bytes - PART_MARGIN:
+            return [self._finish()]
+        return []
+
+    def close(self):
+        """The last, partly filled part, if any."""
+        return [self._finish()] if self._compressor is not None else []
+
+    def _finish(self):
+        self._part += self._compressor.flush()
+        part = bytes(self._part)
+        self._compressor = None
+        self._part = bytearray()
+        return part
+
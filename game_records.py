@@ -0,0 +1,330 @@
+import base64
+import time
+import zlib
+from array import array
+from bisect import bisect_left
+from enum import IntEnum
+import numpy as np
+
+
+class Outcome(IntEnum):
+    WIN = 0
+    LOSE = 1
+    TIE = 2
+    BLACKJACK = 3
+    CASHOUT = 4
+
+
+# Interned outcome names, indexed by Outcome value
+OUTCOME_NAMES = tuple(name.lower() for name in Outcome.__members__)
+
+# Flag bits stored alongside each game
+FLAG_SPLIT = 1
+FLAG_DOUBLE = 2
+FLAG_SIDE_BETS = 4
+FLAG_PARTIAL_CASHOUT = 8  # Cash out from a bet, where refund_amount is meaningful
+
+
+class GameRecord:
+    """One recorded hand. Amounts are whole rupees and the timestamp is epoch seconds."""
+
+    __slots__ = ("code", "amount", "refund_amount", "side_bet_winnings", "timestamp", "flags")
+
+    def __init__(self, outcome, amount, refund_amount=0, side_bet_winnings=0, timestamp=None, flags=0):
+        self.code = outcome if isinstance(outcome, int) else Outcome[outcome.upper()]
+        self.amount = amount
+        self.refund_amount = refund_amount
+        self.side_bet_winnings = side_bet_winnings
+        self.timestamp = int(time.time()) if timestamp is None else timestamp
+        self.flags = flags
+
+    @classmethod
+    def new(cls, outcome, amount, side_bets=None, side_bet_winnings=0, is_split=False, is_double=False):
+        flags = (FLAG_SPLIT if is_split else 0) | (FLAG_DOUBLE if is_double else 0) | (FLAG_SIDE_BETS if side_bets else 0)
+        return cls(outcome, amount, side_bet_winnings=side_bet_winnings, flags=flags)
+
+    @classmethod
+    def partial_cashout(cls, amount, refund_amount):
+        return cls(Outcome.CASHOUT, amount, refund_amount=refund_amount, flags=FLAG_PARTIAL_CASHOUT)
+
+    @property
+    def outcome(self):
+        return OUTCOME_NAMES[self.code]
+
+    @property
+    def is_split(self):
+        return bool(self.flags & FLAG_SPLIT)
+
+    @property
+    def is_double(self):
+        return bool(self.flags & FLAG_DOUBLE)
+
+    @property
+    def is_partial_cashout(self):
+        return bool(self.flags & FLAG_PARTIAL_CASHOUT)
+
+    @property
+    def lost_amount(self):
+        return self.amount - self.refund_amount if self.is_partial_cashout else 0
+
+    def to_row(self):
+        return [int(self.code), self.amount, self.refund_amount, self.side_bet_winnings, self.timestamp, self.flags]
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(*row)
+
+
+class GameHistory:
+    """Columnar, append-only game storage backed by typed arrays.
+
+    Each hand costs BYTES_PER_HAND bytes instead of a dict per game. When max_records
+    is set, the oldest quarter of the history is dropped whenever the cap is reached.
+    Positions handed out by `total` are absolute and stay valid across trimming.
+    """
+
+    COLUMNS = (
+        ("outcomes", "B"),
+        ("flags", "B"),
+        ("amounts", "q"),
+        ("refunds", "q"),
+        ("side_winnings", "q"),
+        ("timestamps", "I"),
+    )
+    BYTES_PER_HAND = sum(array(typecode).itemsize for _, typecode in COLUMNS)
+
+    def __init__(self, max_records=None):
+        self.max_records = max_records
+        self.base = 0  # Absolute position of the oldest retained game
+        self.index = None  # PrefixIndex, built on the first window query
+        for name, typecode in self.COLUMNS:
+            setattr(self, name, array(typecode))
+
+    def __len__(self):
+        return len(self.outcomes)
+
+    @property
+    def total(self):
+        """Number of games ever appended, including trimmed ones."""
+        return self.base + len(self.outcomes)
+
+    def append(self, record):
+        if self.max_records and len(self.outcomes) >= self.max_records:
+            self._trim(max(1, self.max_records // 4))
+        self.outcomes.append(record.code)
+        self.flags.append(record.flags)
+        self.amounts.append(record.amount)
+        self.refunds.append(record.refund_amount)
+        self.side_winnings.append(record.side_bet_winnings)
+        self.timestamps.append(record.timestamp)
+        if self.index is not None:
+            self.index.append(self)
+
+    def _trim(self, count):
+        for name, _ in self.COLUMNS:
+            del getattr(self, name)[:count]
+        self.index = None  # Block boundaries move with the trim, so it is rebuilt on the next window query
+        self.base += count
+
+    def window_stats(self, start_ts=None, end_ts=None):
+        """Totals for the games with start_ts <= timestamp < end_ts, in O(log n + PrefixIndex.BLOCK).
+
+        Timestamps are appended in order, so the window is found by binary search and
+        its totals come from the PrefixIndex block sums.
+        """
+        if self.index is None:
+            self.index = PrefixIndex.build(self)
+        first = 0 if start_ts is None else bisect_left(self.timestamps, start_ts)
+        last = len(self.timestamps) if end_ts is None else bisect_left(self.timestamps, end_ts)
+        stats = self.index.between(self, first, max(first, last))
+        stats["first_ts"] = self.timestamps[first] if stats["games"] else None
+        stats["last_ts"] = self.timestamps[last - 1] if stats["games"] else None
+        return stats
+
+    def record_at(self, index):
+        """Materialize the game at a position relative to the retained history."""
+        return GameRecord(
+            self.outcomes[index], self.amounts[index], self.refunds[index],
+            self.side_winnings[index], self.timestamps[index], self.flags[index]
+        )
+
+    def __iter__(self):
+        return (self.record_at(i) for i in range(len(self.outcomes)))
+
+    def view(self, start):
+        """Games from absolute position start onwards."""
+        return HistoryView(self, start)
+
+    def columns(self, start=None):
+        """Copy of the columns from absolute position start, as plain picklable arrays."""
+        offset = max(0, (start or 0) - self.base)
+        return {name: getattr(self, name)[offset:] for name, _ in self.COLUMNS}
+
+    def nbytes(self):
+        """Bytes currently allocated to game data."""
+        return sum(getattr(self, name).buffer_info()[1] * getattr(self, name).itemsize for name, _ in self.COLUMNS)
+
+    def to_state(self):
+        state = {"base": self.base}
+        for name, _ in self.COLUMNS:
+            state[name] = base64.b64encode(getattr(self, name).tobytes()).decode("ascii")
+        return state
+
+    @classmethod
+    def from_state(cls, state, max_records=None):
+        history = cls(max_records)
+        history.base = state["base"]
+        for name, _ in cls.COLUMNS:
+            getattr(history, name).frombytes(base64.b64decode(state[name]))
+        return history
+
+    def pack(self):
+        """The history as (base, zlib-compressed columns), for players evicted from memory."""
+        return self.base, zlib.compress(b"".join(getattr(self, name).tobytes() for name, _ in self.COLUMNS))
+
+    @classmethod
+    def unpack(cls, packed, max_records=None):
+        base, blob = packed
+        history = cls(max_records)
+        history.base = base
+        data = memoryview(zlib.decompress(blob))
+        count = len(data) // cls.BYTES_PER_HAND
+        offset = 0
+        for name, _ in cls.COLUMNS:
+            column = getattr(history, name)
+            size = count * column.itemsize
+            column.frombytes(data[offset:offset + size])
+            offset += size
+        return history
+
+
+def net_change(code, amount, refund_amount, side_bet_winnings, flags):
+    """Balance change of one game relative to its stake, as counted in the session report."""
+    if code == Outcome.WIN:
+        change = amount
+    elif code == Outcome.LOSE:
+        change = -amount
+    elif code == Outcome.BLACKJACK:
+        # Double down pays 1:1 on the already doubled amount, everything else pays 3:2
+        change = amount if flags & FLAG_DOUBLE else int(amount * 1.5)
+    elif code == Outcome.CASHOUT and flags & FLAG_PARTIAL_CASHOUT:
+        change = refund_amount - (amount - refund_amount)
+    else:
+        change = 0
+    return change + side_bet_winnings
+
+
+def net_changes(history, start=0, end=None):
+    """net_change() for the games [start, end) of a history at once, as an int64 NumPy array."""
+    codes = np.frombuffer(history.outcomes, dtype=np.uint8)[start:end]
+    flags = np.frombuffer(history.flags, dtype=np.uint8)[start:end]
+    amounts = np.frombuffer(history.amounts, dtype=np.int64)[start:end]
+    refunds = np.frombuffer(history.refunds, dtype=np.int64)[start:end]
+    side_winnings = np.frombuffer(history.side_winnings, dtype=np.int64)[start:end]
+
+    blackjack_pay = np.where(flags & FLAG_DOUBLE, amounts, (amounts * 1.5).astype(np.int64))
+    cashout_change = np.where(flags & FLAG_PARTIAL_CASHOUT, refunds - (amounts - refunds), 0)
+    return np.select(
+        [codes == Outcome.WIN, codes == Outcome.LOSE, codes == Outcome.BLACKJACK, codes == Outcome.CASHOUT],
+        [amounts, -amounts, blackjack_pay, cashout_change], 0
+    ) + side_winnings
+
+
+class PrefixIndex:
+    """Running totals over a GameHistory at every BLOCK-th retained game, plus a leading zero.
+
+    The totals for games [i, j) are the prefix difference over the whole blocks inside
+    the window plus the fewer than 2 * BLOCK games at its ragged ends, summed directly.
+    A window costs O(BLOCK) however long the history is, while the index adds well
+    under a byte per hand to the history's BYTES_PER_HAND.
+    """
+
+    BLOCK = 256
+    COUNT_COLUMNS = ("wins", "losses", "ties", "blackjacks", "cashouts")  # In Outcome order
+    SUM_COLUMNS = ("wagered", "net", "side_winnings")
+
+    def __init__(self):
+        for name in self.COUNT_COLUMNS + self.SUM_COLUMNS:
+            setattr(self, name, array("q", [0]))
+
+    @classmethod
+    def build(cls, history):
+        """Index an existing history in one vectorized pass."""
+        index = cls()
+        index._extend(history, 0)
+        return index
+
+    def _extend(self, history, start):
+        """Add the prefix entries for the complete blocks from the block boundary start onwards."""
+        end = len(history) - len(history) % self.BLOCK
+        blocks = (end - start) // self.BLOCK
+        if blocks <= 0:
+            return
+        codes = np.frombuffer(history.outcomes, dtype=np.uint8)[start:end].reshape(blocks, self.BLOCK)
+        sums = {name: (codes == code).sum(axis=1) for code, name in enumerate(self.COUNT_COLUMNS)}
+        sums["wagered"] = np.frombuffer(history.amounts, dtype=np.int64)[start:end].reshape(blocks, self.BLOCK).sum(axis=1)
+        sums["net"] = net_changes(history, start, end).reshape(blocks, self.BLOCK).sum(axis=1)
+        sums["side_winnings"] = np.frombuffer(history.side_winnings, dtype=np.int64)[start:end].reshape(blocks, self.BLOCK).sum(axis=1)
+        for name, block_sums in sums.items():
+            column = getattr(self, name)
+            column.frombytes((column[-1] + np.cumsum(block_sums, dtype=np.int64)).tobytes())
+
+    def append(self, history):
+        """Called after each append to the history; adds an entry whenever a block fills up."""
+        if len(history) % self.BLOCK == 0:
+            self._extend(history, len(history) - self.BLOCK)
+
+    @classmethod
+    def _direct(cls, history, first, last):
+        codes = np.frombuffer(history.outcomes, dtype=np.uint8)[first:last]
+        counts = np.bincount(codes, minlength=len(cls.COUNT_COLUMNS))
+        stats = {name: int(counts[code]) for code, name in enumerate(cls.COUNT_COLUMNS)}
+        stats["wagered"] = int(np.frombuffer(history.amounts, dtype=np.int64)[first:last].sum())
+        stats["net"] = int(net_changes(history, first, last).sum())
+        stats["side_winnings"] = int(np.frombuffer(history.side_winnings, dtype=np.int64)[first:last].sum())
+        return stats
+
+    def between(self, history, first, last):
+        inner_first = -(-first // self.BLOCK)
+        inner_last = last // self.BLOCK
+        if inner_first >= inner_last:
+            stats = self._direct(history, first, last)
+        else:
+            head = self._direct(history, first, inner_first * self.BLOCK)
+            tail = self._direct(history, inner_last * self.BLOCK, last)
+            stats = {
+                name: getattr(self, name)[inner_last] - getattr(self, name)[inner_first] + head[name] + tail[name]
+                for name in self.COUNT_COLUMNS + self.SUM_COLUMNS
+            }
+        stats["games"] = last - first
+        return stats
+
+
+class HistoryView:
+    """Read-only window over a GameHistory from an absolute position onwards."""
+
+    __slots__ = ("history", "start")
+
+    def __init__(self, history, start):
+        self.history = history
+        self.start = start
+
+    def _offset(self):
+        return max(0, self.start - self.history.base)
+
+    def __len__(self):
+        return max(0, len(self.history) - self._offset())
+
+    def __iter__(self):
+        history = self.history
+        return (history.record_at(i) for i in range(self._offset(), len(history)))
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("game index out of range")
+        return self.history.record_at(self._offset() + index)
+
+    def columns(self):
+        return self.history.columns(self.start)
@@ -0,0 +1,72 @@
+import io
+import time
+
+import numpy as np
+from PIL import Image
+
+FORMATS = {"png": "PNG", "webp": "WEBP"}
+
+# (most games, dpi): short sessions have little detail to show, so they are drawn smaller
+DEFAULT_DPI_STEPS = ((10, 60), (50, 80), (100, 100))
+DEFAULT_DPI = 110  # For anything longer, including level-of-detail charts
+
+
+def dpi_for(total_games, dpi_steps=DEFAULT_DPI_STEPS, default_dpi=DEFAULT_DPI):
+    for most_games, dpi in dpi_steps:
+        if total_games <= most_games:
+            return dpi
+    return default_dpi
+
+
+def _rasterize(fig, dpi):
+    """Draw the figure with Agg at the given dpi and return it as an RGB image."""
+    fig.set_dpi(dpi)
+    fig.canvas.draw()
+    return Image.fromarray(np.asarray(fig.canvas.buffer_rgba())[..., :3])
+
+
+def _encode(image, fmt, palette_colors, webp_quality):
+    buffer = io.BytesIO()
+    if fmt == "png":
+        # Charts are a few flat colours plus antialiasing, which a small palette keeps almost unchanged
+        image = image.quantize(colors=palette_colors, method=Image.Quantize.FASTOCTREE, dither=Image.Dither.NONE)
+        image.save(buffer, format="PNG")
+    else:
+        image.save(buffer, format=FORMATS[fmt], quality=webp_quality, method=4)
+    return buffer.getvalue()
+
+
+def encode_figure(fig, total_games, fmt="png", max_bytes=250000, dpi_steps=DEFAULT_DPI_STEPS, default_dpi=DEFAULT_DPI,
+                  min_dpi=50, palette_colors=64, webp_quality=80, max_attempts=3):
+    """Encode a figure within a byte budget. Returns (image bytes, info).
+
+    The figure is drawn once at a dpi chosen from the session length. An image over
+    max_bytes is scaled down by the overshoot and encoded again, which is much cheaper
+    than redrawing, until it fits or min_dpi is reached. PNGs are palette-quantized;
+    WebP is lossy at webp_quality. info reports the format, effective dpi, pixel size,
+    bytes, attempts and the seconds spent drawing and encoding.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown image format: {fmt}")
+    started = time.perf_counter()
+    drawn_dpi = dpi = dpi_for(total_games, dpi_steps, default_dpi)
+    drawn = image = _rasterize(fig, dpi)
+    encoding = time.perf_counter()
+    for attempt in range(1, max_attempts + 1):
+        data = _encode(image, fmt, palette_colors, webp_quality)
+        if len(data) <= max_bytes or dpi <= min_dpi or attempt == max_attempts:
+            break
+        # Bytes scale roughly with the pixel count, so with the square of the dpi
+        dpi = max(min_dpi, int(dpi * min(0.9, (max_bytes / len(data)) ** 0.5 * 0.95)))
+        scale = dpi / drawn_dpi
+        image = drawn.resize((round(drawn.width * scale), round(drawn.height * scale)), Image.Resampling.LANCZOS)
+    return data, {
+        "format": fmt,
+        "dpi": dpi,
+        "width": image.width,
+        "height": image.height,
+        "bytes": len(data),
+        "attempts": attempt,
+        "draw_seconds": encoding - started,
+        "encode_seconds": time.perf_counter() - encoding,
+    }
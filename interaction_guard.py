@@ -0,0 +1,66 @@
+import functools
+import time
+from collections import OrderedDict
+
+from metrics import REGISTRY
+
+duplicate_interactions = REGISTRY.counter(
+    "lolettan_duplicate_interactions_total", "Interactions acknowledged without running their handler", ("reason",)
+)
+
+
+class InteractionGuard:
+    """Absorbs double-clicks and client retries on casino messages.
+
+    Only one handler runs per message at a time, and the same action on the same
+    rendering of a message (its id, the component's custom_id and when it was last
+    edited) runs at most once within `ttl` seconds. Duplicates are acknowledged with
+    a bare defer() so Discord does not show an error, without touching any state.
+    """
+
+    def __init__(self, ttl=5.0, max_entries=10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._in_flight = set()  # Message ids with a handler running
+        self._seen = OrderedDict()  # (message_id, custom_id, edited_at) -> time.monotonic() expiry
+
+    @staticmethod
+    def _key(interaction):
+        message = interaction.message
+        edited_at = message.edited_at.timestamp() if message.edited_at else None
+        return (message.id, (interaction.data or {}).get("custom_id"), edited_at)
+
+    def _duplicate_reason(self, interaction, key):
+        now = time.monotonic()
+        if interaction.message.id in self._in_flight:
+            return "in_flight"
+        expires = self._seen.get(key)
+        if expires is not None and expires > now:
+            return "recent"
+        while self._seen and (len(self._seen) >= self.max_entries or next(iter(self._seen.values())) <= now):
+            self._seen.popitem(last=False)
+        self._seen[key] = now + self.ttl
+        self._seen.move_to_end(key)
+        return None
+
+    def once(self, func):
+        """Decorator for view button callbacks and modal on_submit handlers."""
+        @functools.wraps(func)
+        async def wrapper(view, interaction, *args, **kwargs):
+            if interaction.message is None:
+                return await func(view, interaction, *args, **kwargs)
+
+            key = self._key(interaction)
+            reason = self._duplicate_reason(interaction, key)
+            if reason is not None:
+                duplicate_interactions.inc(reason=reason)
+                if not interaction.response.is_done():
+                    await interaction.response.defer()
+                return
+
+            self._in_flight.add(key[0])
+            try:
+                return await func(view, interaction, *args, **kwargs)
+            finally:
+                self._in_flight.discard(key[0])
+        return wrapper
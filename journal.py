@@ -0,0 +1,187 @@
+import asyncio
+import atexit
+import json
+import os
+import time
+
+
+class GameJournal:
+    """Append-only JSONL journal of casino mutations.
+
+    Events are buffered in memory and written in batches, so many events share a
+    single fsync (group commit) and the disk never sits on an interaction's hot path.
+    A compacted snapshot plus the journal tail is enough to rebuild every session.
+    """
+
+    def __init__(self, path, snapshot_path, flush_interval=0.25, max_batch=500, compact_every=100000):
+        self.path = path
+        self.snapshot_path = snapshot_path
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.compact_every = compact_every
+        self.seq = 0
+        self._buffer = []
+        self._since_compact = 0
+        self._file = None
+        self._wake = asyncio.Event()
+        self._io_lock = asyncio.Lock()
+        atexit.register(self._flush_sync)
+
+    def _open(self):
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._drop_torn_tail(self.path)
+            self._file = open(self.path, "a", encoding="utf-8")
+        return self._file
+
+    @staticmethod
+    def _drop_torn_tail(path):
+        """Cut a line left half-written by a crash, so the next event starts on a fresh line."""
+        if not os.path.exists(path):
+            return
+        with open(path, "rb+") as f:
+            end = f.seek(0, os.SEEK_END)
+            position = end
+            while position > 0:
+                start = max(0, position - 65536)
+                f.seek(start)
+                newline = f.read(position - start).rfind(b"\n")
+                if newline != -1:
+                    position = start + newline + 1
+                    break
+                position = start
+            if position < end:
+                f.truncate(position)
+                print(f"⚠️ Dropped {end - position} bytes of a torn casino journal line")
+
+    @property
+    def pending(self):
+        """Events buffered but not yet written."""
+        return len(self._buffer)
+
+    def append(self, kind, guild_id, user_id, **fields):
+        """Queue an event for the next group commit. Never blocks."""
+        self.seq += 1
+        event = {"seq": self.seq, "t": kind, "g": guild_id, "u": user_id}
+        event.update(fields)
+        self._buffer.append(json.dumps(event, separators=(",", ":")) + "\n")
+        if len(self._buffer) >= self.max_batch:
+            self._wake.set()
+
+    def _write(self, lines):
+        f = self._open()
+        f.write("".join(lines))
+        f.flush()
+        os.fsync(f.fileno())
+
+    def _flush_sync(self):
+        if self._buffer:
+            lines, self._buffer = self._buffer, []
+            self._write(lines)
+
+    async def flush(self):
+        """Write every buffered event with one fsync."""
+        if not self._buffer:
+            return
+        async with self._io_lock:
+            lines, self._buffer = self._buffer, []
+            await asyncio.to_thread(self._write, lines)
+        self._since_compact += len(lines)
+
+    async def run(self, store):
+        """Background group-commit loop; compacts into a snapshot every compact_every events."""
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+                if self._since_compact >= self.compact_every:
+                    await self.compact(store)
+            except Exception as e:
+                print(f"❌ Error writing casino journal: {e}")
+
+    async def compact(self, store):
+        """Write a snapshot of the store and drop the journal entries it covers."""
+        await self.flush()
+        # Captured synchronously, so the snapshot matches exactly the events up to snapshot_seq
+        state = store.snapshot_state()
+        snapshot_seq = self.seq
+        started = time.perf_counter()
+        await asyncio.to_thread(self._write_snapshot, state, snapshot_seq)
+        async with self._io_lock:
+            await asyncio.to_thread(self._truncate_through, snapshot_seq)
+        self._since_compact = 0
+        print(f"📦 Compacted casino journal at seq {snapshot_seq} in {time.perf_counter() - started:.2f}s")
+
+    def _write_snapshot(self, state, snapshot_seq):
+        os.makedirs(os.path.dirname(self.snapshot_path) or ".", exist_ok=True)
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"seq": snapshot_seq, "state": state}, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+
+    def _truncate_through(self, snapshot_seq):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        tail = [line for line, event in self._read_events(self.path, quarantine=True) if event["seq"] > snapshot_seq]
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("".join(tail))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def _read_events(path, quarantine=False):
+        """(line, event) for every complete, parseable line.
+
+        A torn last line from a crash is ignored, and so is any other line that does
+        not parse. With quarantine, those lines are also copied to a .corrupt file next
+        to the journal, for compaction to drop them without losing them.
+        """
+        if not os.path.exists(path):
+            return []
+        events = []
+        corrupt = []
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    continue
+                try:
+                    events.append((line, json.loads(line)))
+                except ValueError:
+                    corrupt.append(line)
+        if corrupt and quarantine:
+            with open(path + ".corrupt", "a", encoding="utf-8") as f:
+                f.write("".join(corrupt))
+            print(f"⚠️ Moved {len(corrupt)} unreadable casino journal lines to {path}.corrupt")
+        elif corrupt:
+            print(f"⚠️ Skipped {len(corrupt)} unreadable casino journal lines")
+        return events
+
+    def replay(self, store):
+        """Rebuild the store from the snapshot and journal tail. Returns the number of events applied."""
+        snapshot_seq = 0
+        applied = 0
+        with store.bulk_load():
+            if os.path.exists(self.snapshot_path):
+                with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                    snapshot = json.load(f)
+                snapshot_seq = snapshot["seq"]
+                store.load_state(snapshot["state"])
+
+            self.seq = snapshot_seq
+            for _, event in self._read_events(self.path):
+                if event["seq"] <= snapshot_seq:
+                    continue
+                store.apply_event(event)
+                self.seq = max(self.seq, event["seq"])
+                applied += 1
+        self._since_compact = applied
+        return applied
@@ -1,17 +1,55 @@
+import math
 
-# keep_alive.py
-from flask import Flask
-from threading import Thread
+from aiohttp import web
 
-app = Flask('')
+from metrics import REGISTRY
 
-@app.route('/')
-def home():
-    return "I'm alive"
 
-def run():
-    app.run(host='0.0.0.0', port=8080)
+def gateway_state(bot):
+    """Summary of the gateway connection used by the health endpoints."""
+    latency = bot.latency
+    connected = bot.is_ready() and not bot.is_closed() and math.isfinite(latency)
+    return {
+        "gateway": "connected" if connected else ("closed" if bot.is_closed() else "disconnected"),
+        "latency_ms": round(latency * 1000, 1) if math.isfinite(latency) else None,
+        "guilds": len(bot.guilds),
+    }
 
-def keep_alive():
-    t = Thread(target=run)
-    t.start()
+
+def create_app(bot, max_latency=10.0, is_ready=lambda: True):
+    """Health and metrics endpoints, served from the bot's own event loop."""
+
+    async def home(request):
+        return web.Response(text="I'm alive")
+
+    async def healthz(request):
+        # Healthy while the gateway is connected and heartbeats are coming back in time
+        state = gateway_state(bot)
+        healthy = state["gateway"] == "connected" and state["latency_ms"] <= max_latency * 1000
+        state["status"] = "ok" if healthy else "unhealthy"
+        return web.json_response(state, status=200 if healthy else 503)
+
+    async def readyz(request):
+        # Ready once casino state is restored and the bot can answer interactions
+        ready = bot.is_ready() and not bot.is_closed() and is_ready()
+        return web.json_response({"status": "ready" if ready else "starting"}, status=200 if ready else 503)
+
+    async def metrics(request):
+        return web.Response(text=REGISTRY.render(), content_type="text/plain", charset="utf-8",
+                            headers={"X-Content-Type-Options": "nosniff"})
+
+    app = web.Application()
+    app.router.add_get('/', home)
+    app.router.add_get('/healthz', healthz)
+    app.router.add_get('/readyz', readyz)
+    app.router.add_get('/metrics', metrics)
+    return app
+
+
+async def keep_alive(bot, host='0.0.0.0', port=8080, max_latency=10.0, is_ready=lambda: True):
+    """Start the health server on the running event loop and return its runner."""
+    runner = web.AppRunner(create_app(bot, max_latency, is_ready), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    print(f"🌐 Health server listening on {host}:{port}")
+    return runner
@@ -0,0 +1,85 @@
+import asyncio
+import functools
+import time
+from datetime import datetime, timezone
+
+from metrics import REGISTRY
+
+# Discord fails an interaction that has not been responded to within this many seconds
+INTERACTION_DEADLINE = 3.0
+
+INTERACTION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 2.5, 3.0, 4.0, 5.0, 10.0, 30.0)
+
+interaction_seconds = REGISTRY.histogram(
+    "lolettan_interaction_seconds", "Time spent handling an interaction, from callback dispatch to return",
+    ("handler",), buckets=INTERACTION_BUCKETS
+)
+deadline_misses = REGISTRY.counter(
+    "lolettan_interaction_deadline_misses_total", "Interactions not responded to within Discord's deadline", ("handler",)
+)
+handler_errors = REGISTRY.counter(
+    "lolettan_interaction_errors_total", "Interaction handlers that raised", ("handler",)
+)
+
+
+# Interaction handlers currently running, most of them still owing Discord a response
+_handlers_running = 0
+
+
+def interactions_in_flight():
+    return _handlers_running
+
+
+def _check_deadline(handler, interaction):
+    if not interaction.response.is_done():
+        deadline_misses.inc(handler=handler)
+        print(f"⏱️ {handler} missed the {INTERACTION_DEADLINE:.0f}s interaction deadline")
+
+
+def timed_interaction(handler):
+    """Record latency, errors and deadline misses for a view button or modal on_submit handler.
+
+    Goes directly above the handler, below @discord.ui.button. The interaction is the
+    first argument after self for both kinds of callback.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(self, interaction, *args, **kwargs):
+            global _handlers_running
+            started = time.perf_counter()
+            # The deadline runs from when Discord created the interaction, not from when we got it
+            waited = max(0.0, (datetime.now(timezone.utc) - interaction.created_at).total_seconds())
+            check = asyncio.get_running_loop().call_later(
+                max(0.0, INTERACTION_DEADLINE - waited), _check_deadline, handler, interaction
+            )
+            _handlers_running += 1
+            try:
+                return await func(self, interaction, *args, **kwargs)
+            except Exception:
+                handler_errors.inc(handler=handler)
+                raise
+            finally:
+                _handlers_running -= 1
+                interaction_seconds.observe(time.perf_counter() - started, handler=handler)
+                if interaction.response.is_done():
+                    check.cancel()
+        return wrapper
+    return decorator
+
+
+def latency_summary():
+    """Per-handler count, p50/p95/p99 in seconds, deadline misses and errors, slowest p95 first."""
+    rows = []
+    for labels in interaction_seconds.label_values():
+        handler = labels["handler"]
+        rows.append({
+            "handler": handler,
+            "count": interaction_seconds.count(handler=handler),
+            "p50": interaction_seconds.quantile(0.50, handler=handler),
+            "p95": interaction_seconds.quantile(0.95, handler=handler),
+            "p99": interaction_seconds.quantile(0.99, handler=handler),
+            "misses": deadline_misses.value(handler=handler),
+            "errors": handler_errors.value(handler=handler),
+        })
+    rows.sort(key=lambda row: row["p95"], reverse=True)
+    return rows
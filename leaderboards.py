@@ -0,0 +1,184 @@
+from bisect import bisect_left, insort
+from contextlib import contextmanager
+
+import numpy as np
+
+from game_records import Outcome, net_change, net_changes
+
+
+class PlayerTotals:
+    """Lifetime totals for one player in one guild, over their recorded games."""
+
+    __slots__ = ("games", "wins", "blackjacks", "net", "win_streak", "best_streak")
+
+    def __init__(self):
+        self.games = 0
+        self.wins = 0
+        self.blackjacks = 0
+        self.net = 0
+        self.win_streak = 0
+        self.best_streak = 0
+
+    def record(self, game):
+        self.games += 1
+        self.net += net_change(game.code, game.amount, game.refund_amount, game.side_bet_winnings, game.flags)
+        # Streaks follow the session report: wins extend them, losses end them, anything else leaves them alone
+        if game.code == Outcome.WIN:
+            self.wins += 1
+            self.win_streak += 1
+            self.best_streak = max(self.best_streak, self.win_streak)
+        elif game.code == Outcome.LOSE:
+            self.win_streak = 0
+        elif game.code == Outcome.BLACKJACK:
+            self.blackjacks += 1
+
+    def to_state(self):
+        return [getattr(self, name) for name in self.__slots__]
+
+    @classmethod
+    def from_state(cls, state):
+        totals = cls()
+        for name, value in zip(cls.__slots__, state):
+            setattr(totals, name, value)
+        return totals
+
+    @classmethod
+    def from_history(cls, history):
+        """Totals for a whole history in one vectorized pass."""
+        totals = cls()
+        if not len(history):
+            return totals
+        codes = np.frombuffer(history.outcomes, dtype=np.uint8)
+        totals.games = len(codes)
+        totals.wins = int(np.count_nonzero(codes == Outcome.WIN))
+        totals.blackjacks = int(np.count_nonzero(codes == Outcome.BLACKJACK))
+        totals.net = int(net_changes(history).sum())
+
+        # Win streaks over the wins and losses only, as the other outcomes neither extend nor end them
+        wins = codes[(codes == Outcome.WIN) | (codes == Outcome.LOSE)] == Outcome.WIN
+        if wins.any():
+            edges = np.flatnonzero(np.diff(np.concatenate(([0], wins.view(np.int8), [0]))))
+            runs = edges[1::2] - edges[::2]
+            totals.best_streak = int(runs.max())
+            totals.win_streak = int(runs[-1]) if wins[-1] else 0
+        return totals
+
+
+# Leaderboard name -> (title, score function); players with no score are left off the board
+METRICS = {
+    "profit": ("💰 Net Profit", lambda totals, min_games: totals.net if totals.games else None),
+    "winrate": ("📈 Win Rate", lambda totals, min_games: totals.wins / totals.games * 100 if totals.games >= min_games else None),
+    "blackjacks": ("🂡 Blackjacks", lambda totals, min_games: totals.blackjacks if totals.blackjacks else None),
+    "streak": ("🔥 Longest Win Streak", lambda totals, min_games: totals.best_streak if totals.best_streak else None),
+}
+
+
+class Leaderboards:
+    """Per-guild rankings kept sorted as games are recorded.
+
+    Each board is a sorted list of (-score, user_id), so a player's move costs two
+    binary searches and the top K is a slice. A rendered board is cached until a
+    change reaches its top K. While deferred, e.g. during a journal replay, only the
+    totals are kept up to date and the boards are rebuilt with one sort at the end.
+    """
+
+    def __init__(self, top_k=10, min_games_for_win_rate=20):
+        self.top_k = top_k
+        self.min_games_for_win_rate = min_games_for_win_rate
+        self._totals = {}  # (guild_id, user_id) -> PlayerTotals
+        self._boards = {}  # (guild_id, metric) -> sorted [(-score, user_id)]
+        self._rendered = {}  # (guild_id, metric) -> cached render
+        self._deferred = False
+
+    def _score(self, metric, totals):
+        return METRICS[metric][1](totals, self.min_games_for_win_rate)
+
+    def _update(self, guild_id, user_id, old_scores, totals):
+        for metric in METRICS:
+            old, new = old_scores.get(metric), self._score(metric, totals)
+            if old == new:
+                continue
+            board = self._boards.setdefault((guild_id, metric), [])
+            ranks = []
+            if old is not None:
+                position = bisect_left(board, (-old, user_id))
+                del board[position]
+                ranks.append(position)
+            if new is not None:
+                insort(board, (-new, user_id))
+                ranks.append(bisect_left(board, (-new, user_id)))
+            if min(ranks) < self.top_k:
+                self._rendered.pop((guild_id, metric), None)
+
+    def record(self, guild_id, user_id, game):
+        """Fold one recorded game into the player's totals and move them on each board."""
+        totals = self._totals.get((guild_id, user_id))
+        if totals is None:
+            totals = self._totals[(guild_id, user_id)] = PlayerTotals()
+        if self._deferred:
+            totals.record(game)
+            return
+        old_scores = {metric: self._score(metric, totals) for metric in METRICS}
+        totals.record(game)
+        self._update(guild_id, user_id, old_scores, totals)
+
+    def load(self, guild_id, user_id, totals):
+        """Set a player's totals, e.g. after loading a snapshot."""
+        old = self._totals.get((guild_id, user_id))
+        self._totals[(guild_id, user_id)] = totals
+        if self._deferred:
+            return
+        old_scores = {metric: self._score(metric, old) for metric in METRICS} if old else {}
+        self._update(guild_id, user_id, old_scores, totals)
+
+    def totals(self, guild_id, user_id):
+        return self._totals.get((guild_id, user_id))
+
+    def clear(self):
+        self._totals.clear()
+        self._boards.clear()
+        self._rendered.clear()
+
+    @contextmanager
+    def deferred(self):
+        """Keep only the totals up to date inside the block, then rebuild every board once."""
+        if self._deferred:
+            yield self
+            return
+        self._deferred = True
+        try:
+            yield self
+        finally:
+            self._deferred = False
+            self._rebuild()
+
+    def _rebuild(self):
+        boards = {}
+        for (guild_id, user_id), totals in self._totals.items():
+            for metric in METRICS:
+                score = self._score(metric, totals)
+                if score is not None:
+                    boards.setdefault((guild_id, metric), []).append((-score, user_id))
+        for board in boards.values():
+            board.sort()
+        self._boards = boards
+        self._rendered.clear()
+
+    def top(self, guild_id, metric, k=None):
+        """The top k players as (user_id, score, totals), best first."""
+        board = self._boards.get((guild_id, metric), [])
+        return [(user_id, -score, self._totals[(guild_id, user_id)]) for score, user_id in board[:k or self.top_k]]
+
+    def rank(self, guild_id, user_id, metric):
+        """1-based rank of a player on a board, or None if they are not on it."""
+        totals = self._totals.get((guild_id, user_id))
+        score = self._score(metric, totals) if totals else None
+        if score is None:
+            return None
+        return bisect_left(self._boards[(guild_id, metric)], (-score, user_id)) + 1
+
+    def cached(self, guild_id, metric):
+        return self._rendered.get((guild_id, metric))
+
+    def cache(self, guild_id, metric, rendered):
+        self._rendered[(guild_id, metric)] = rendered
@@ -1,14 +1,36 @@
+import time
+STARTUP_STARTED = time.perf_counter()  # Reference point for the startup phase timings
 
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 import os
+import sys
 from keep_alive import keep_alive
+from metrics import REGISTRY
 import json
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend
-import matplotlib.pyplot as plt
+import asyncio
 import io
-from datetime import datetime
+import math
+import re
+import typing
+from datetime import datetime, timedelta, timezone
+from charts import render_session_chart, warm_up, ChartCache
+from workers import WorkerPool, PoolSaturated
+from command_log import CommandLogWriter
+from message_renderer import MessageRenderer
+from interaction_guard import InteractionGuard
+from view_state import GAME_TEMPLATE, encode_game_state, decode_game_state
+from session_store import SessionStore
+from leaderboards import Leaderboards, METRICS as LEADERBOARD_METRICS
+from journal import GameJournal
+from shared_store import SqliteJournal
+from game_records import GameRecord
+from export import GzipParts, iter_columns
+from simulator import simulate, player_model, SimulationCache
+from side_bets import SideBetEngine
+from strategy import StrategyAdvisor, build_tables, rules_key, parse_cards, ACTION_NAMES, CARD_LABELS
+from latency import timed_interaction, latency_summary, interactions_in_flight, INTERACTION_DEADLINE
+from outbound import OutboundScheduler, Priority
 
 # =================================================================================================
 # ❗ YOUR CONFIGURATION SECTION - FILL THIS OUT!
@@ -18,6 +40,8 @@ from datetime import datetime
 MODERATION_CONFIG = {
     "moderator_role_id": 1399360589465391187, # Role that can use casino commands
     "log_channel_id": 1399357783094202388, # Channel where command logs are sent
+    "log_flush_interval": 2.0, # Seconds between batched log messages
+    "log_max_buffer": 200, # Log entries kept while waiting to be sent; extra entries are dropped and summarized
 }
 
 # --- CONFIGURATION FOR MENTION RESPONSES ---
@@ -25,7 +49,133 @@ MENTION_CONFIG = {
     "target_member_ids": [
         1149592349631057961,  # BlackJack Hero target user
         # Add more member IDs as needed
-    ]
+    ],
+    "cooldown": 30,  # Seconds before the same mention gets another reply in the same channel
+    "cooldown_cache_size": 5000,  # Channel/target pairs remembered for the cooldown
+}
+
+# --- CONFIGURATION FOR CASINO SESSIONS ---
+SESSION_CONFIG = {
+    "idle_timeout": 3600,  # Seconds before an idle player without an active session is unloaded
+    "eviction_interval": 300,  # Seconds between idle session sweeps
+}
+
+# --- CONFIGURATION FOR GAME HISTORY ---
+# Each stored hand costs GameHistory.BYTES_PER_HAND (30) bytes, so the cap bounds memory per player
+HISTORY_CONFIG = {
+    "max_hands_per_player": 250000,  # Oldest hands beyond this are dropped from memory
+}
+
+# --- CONFIGURATION FOR LEADERBOARDS ---
+LEADERBOARD_CONFIG = {
+    "top_k": 10,  # Players shown on each leaderboard
+    "min_games_for_win_rate": 20,  # Games a player needs before they are ranked by win rate
+}
+
+# --- CONFIGURATION FOR THE GAME JOURNAL ---
+# Point CASINO_DATA_DIR at a mounted volume so balances and sessions survive restarts
+CASINO_DATA_DIR = os.getenv("CASINO_DATA_DIR", "data")
+JOURNAL_CONFIG = {
+    "path": os.path.join(CASINO_DATA_DIR, "casino_journal.jsonl"),
+    "snapshot_path": os.path.join(CASINO_DATA_DIR, "casino_snapshot.json"),
+    "flush_interval": 0.25,  # Seconds between group commits
+    "max_batch": 500,  # Events that force an early commit
+    "compact_every": 10000,  # Journal events between snapshots; a short tail keeps startup replay well under a second
+}
+
+# --- CONFIGURATION FOR SHARDING ---
+# Set by cluster.py when several processes each run a range of shards; a single process runs every shard
+CLUSTER_CONFIG = {
+    "name": os.getenv("CLUSTER_NAME", f"pid-{os.getpid()}"),  # Tags this process's events in the shared store
+    "shard_count": int(os.environ["SHARD_COUNT"]) if os.getenv("SHARD_COUNT") else None,  # None asks Discord for its recommendation
+    "shard_ids": [int(shard) for shard in os.environ["SHARD_IDS"].split(",")] if os.getenv("SHARD_IDS") else None,
+}
+
+# --- CONFIGURATION FOR THE SHARED STORE ---
+# "journal" keeps casino state in the JSONL journal above, for a single process.
+# "sqlite" keeps it in one SQLite database (WAL mode) shared by every process on the machine.
+STORE_CONFIG = {
+    "backend": os.getenv("CASINO_STORE", "journal"),
+    "sqlite_path": os.path.join(CASINO_DATA_DIR, "casino.sqlite3"),
+    "busy_timeout": 30.0,  # Seconds a write waits for another process's transaction
+}
+
+# --- CONFIGURATION FOR OUTBOUND REQUESTS ---
+OUTBOUND_CONFIG = {
+    "max_concurrent": 4,  # Queued REST calls in flight at once; interaction responses never queue
+    "route_rate": 5,  # Calls per route (channel or interaction) per route_per seconds, Discord's message limit
+    "route_per": 5.0,
+    "max_hold": 3.0,  # Longest that uploads and logs wait for interaction handlers to finish
+}
+
+# --- CONFIGURATION FOR DUPLICATE INTERACTIONS ---
+INTERACTION_CONFIG = {
+    "dedup_ttl": 5.0,  # Seconds during which a repeated click on the same rendering of a message is ignored
+    "dedup_cache_size": 10000,  # Recent interactions remembered for deduplication
+}
+
+# --- CONFIGURATION FOR HISTORY EXPORTS ---
+EXPORT_CONFIG = {
+    "max_attachment_bytes": 8 * 1024 * 1024,  # Parts are split below this, or the guild's upload limit if lower
+    "chunk_games": 10000,  # Games formatted and compressed per step, which bounds memory use
+}
+
+# --- CONFIGURATION FOR THE HEALTH SERVER ---
+HEALTH_CONFIG = {
+    "host": "0.0.0.0",
+    "port": int(os.getenv("PORT", "8080")),  # Cloud Run passes the port to listen on
+    "max_latency": 10.0,  # Heartbeat latency in seconds above which /healthz reports unhealthy
+}
+
+# --- CONFIGURATION FOR SESSION CHARTS ---
+CHART_CONFIG = {
+    "workers": 2,  # Worker processes used to render session charts
+    "render_timeout": 20,  # Seconds before a chart render is abandoned
+    "max_pending": 4,  # Renders waiting beyond this are skipped and the report is sent without a chart
+    "lod_threshold": 100,  # Sessions longer than this are drawn as binned overviews instead of per-game bars
+    "cache_size": 32,  # Rendered charts kept in memory, so re-sending an unchanged session never re-renders
+    "warm_up_timeout": 120,  # Seconds allowed for the workers to load matplotlib after the bot is ready
+    "format": "png",  # "png" (palette-quantized) or "webp" (lossy)
+    "max_bytes": 150_000,  # Byte budget for one chart; larger images are scaled down until they fit
+    "dpi_steps": ((10, 60), (50, 80), (100, 100)),  # (most games, dpi): short sessions are drawn smaller
+    "default_dpi": 110,  # Dpi for sessions longer than every step
+    "min_dpi": 50,  # Never scale a chart below this to meet the byte budget
+    "palette_colors": 64,  # Colours kept when quantizing a PNG
+    "webp_quality": 80,  # Lossy WebP quality, 0-100
+}
+CHART_ENCODING = {
+    "fmt": CHART_CONFIG["format"],
+    **{key: CHART_CONFIG[key] for key in ("max_bytes", "dpi_steps", "default_dpi", "min_dpi", "palette_colors", "webp_quality")},
+}
+
+# --- CONFIGURATION FOR SIDE BETS ---
+SIDE_BET_CONFIG = {
+    "decks": 6,  # Decks in the shoe the side bet tables are worked out for
+    "dealer_hits_soft_17": False,  # Dealer rule used for the Dealer Bust table
+    "seed": int(os.environ["SIDE_BET_SEED"]) if os.getenv("SIDE_BET_SEED") else None,  # Set for reproducible side bet results
+}
+
+# --- CONFIGURATION FOR THE STRATEGY ADVISOR ---
+STRATEGY_CONFIG = {
+    "enabled": True,  # Show the 💡 ADVICE button on game screens
+    "decks": 6,  # Decks in the shoe the strategy tables are worked out for
+    "dealer_hits_soft_17": False,
+    "double_after_split": True,
+    "cache_path": os.path.join(CASINO_DATA_DIR, "strategy_tables.json"),  # Built tables, reused across restarts
+    "retry_delay": 30,  # Seconds before retrying a failed load or build, doubling after each failure
+    "max_retry_delay": 900,  # Longest wait between retries
+}
+
+# --- CONFIGURATION FOR BANKROLL SIMULATIONS ---
+SIMULATION_CONFIG = {
+    "workers": 1,  # Worker processes used to run &simulate
+    "max_pending": 2,  # Simulations waiting beyond this are refused until a worker frees up
+    "timeout": 60,  # Seconds before a simulation is abandoned
+    "sims": 100000,  # Simulated sessions per run
+    "default_hands": 100,  # Hands per simulated session when none are given
+    "max_hands": 1000,  # Longest session a player can ask for
+    "min_games": 20,  # Recorded games needed before a player's outcomes are worth simulating
+    "cache_size": 64,  # Results kept, so repeating a question with unchanged history is instant
 }
 
 # =================================================================================================
@@ -38,8 +188,59 @@ intents.message_content = True
 intents.members = True
 intents.guilds = True
 
-# Create bot instance
-bot = commands.Bot(command_prefix='&', intents=intents, help_command=None)
+# Create bot instance; guilds are spread over shards, and a shard cluster only runs its own range
+bot = commands.AutoShardedBot(
+    command_prefix='&',
+    intents=intents,
+    help_command=None,
+    shard_count=CLUSTER_CONFIG["shard_count"],
+    shard_ids=CLUSTER_CONFIG["shard_ids"]
+)
+
+# Chart rendering runs in worker processes so matplotlib never blocks the event loop
+chart_pool = WorkerPool(
+    workers=CHART_CONFIG["workers"],
+    max_pending=CHART_CONFIG["max_pending"],
+    timeout=CHART_CONFIG["render_timeout"],
+    initializer=warm_up  # Each worker loads matplotlib and renders a throwaway chart when it starts
+)
+chart_cache = ChartCache(CHART_CONFIG["cache_size"])
+
+# Side bet results are drawn from probability tables for the configured shoe, built once here
+side_bet_engine = SideBetEngine(
+    decks=SIDE_BET_CONFIG["decks"],
+    hits_soft_17=SIDE_BET_CONFIG["dealer_hits_soft_17"],
+    seed=SIDE_BET_CONFIG["seed"]
+)
+
+# Bankroll simulations get their own worker so they never hold up session charts
+sim_pool = WorkerPool(
+    workers=SIMULATION_CONFIG["workers"],
+    max_pending=SIMULATION_CONFIG["max_pending"],
+    timeout=SIMULATION_CONFIG["timeout"]
+)
+sim_cache = SimulationCache(SIMULATION_CONFIG["cache_size"])
+
+# Set once the strategy tables are loaded from disk or built on the simulation worker
+strategy_advisor = None
+
+# Follow-ups, channel replies, uploads and logs go out in priority order, behind interaction responses
+outbound = OutboundScheduler(
+    max_concurrent=OUTBOUND_CONFIG["max_concurrent"],
+    route_rate=OUTBOUND_CONFIG["route_rate"],
+    route_per=OUTBOUND_CONFIG["route_per"],
+    hold_while=interactions_in_flight,
+    max_hold=OUTBOUND_CONFIG["max_hold"]
+)
+
+# Command logs are batched in the background so commands never wait on the log channel
+command_log = CommandLogWriter(
+    bot,
+    MODERATION_CONFIG["log_channel_id"],
+    flush_interval=MODERATION_CONFIG["log_flush_interval"],
+    max_buffer=MODERATION_CONFIG["log_max_buffer"],
+    outbound=outbound
+)
 
 # =================================================================================================
 # HELPER FUNCTIONS
@@ -52,43 +253,187 @@ def has_moderator_role():
         return moderator_role in ctx.author.roles
     return commands.check(predicate)
 
-async def log_command(ctx, command_name, details=""):
-    """Log command usage to the configured log channel."""
+def log_startup_phase(phase):
+    """Print how long after process start a startup phase was reached."""
+    print(f"⏱️ {phase} at {time.perf_counter() - STARTUP_STARTED:.2f}s since start")
+
+async def warm_chart_workers():
+    """Start the chart workers in the background so the first session report renders quickly."""
     try:
-        log_channel = bot.get_channel(MODERATION_CONFIG["log_channel_id"])
-        if log_channel:
-            embed = discord.Embed(
-                title="🔧 Command Used",
-                color=0x00ff00,
-                timestamp=datetime.utcnow()
-            )
-            embed.add_field(name="Command", value=f"`{command_name}`", inline=True)
-            embed.add_field(name="User", value=ctx.author.mention, inline=True)
-            embed.add_field(name="Channel", value=ctx.channel.mention, inline=True)
-            if details:
-                embed.add_field(name="Details", value=details, inline=False)
-            embed.set_footer(text="♠️ ʟᴏʟᴇᴛᴛᴀɴ Logs")
-
-            await log_channel.send(embed=embed)
-            print(f"✅ Logged command: {command_name} by {ctx.author}")
-        else:
-            print(f"❌ Log channel not found: {MODERATION_CONFIG['log_channel_id']}")
+        timings = await chart_pool.start(warm_up, timeout=CHART_CONFIG["warm_up_timeout"])
+        log_startup_phase(f"Chart workers warm ({len(timings)} workers)")
     except Exception as e:
-        print(f"❌ Error logging command {command_name}: {e}")
+        print(f"⚠️ Could not pre-warm chart workers: {e}")
+
+async def load_strategy_tables():
+    """Load the advisor's tables from disk, building them in a worker process if the rules changed.
+
+    Retried with a growing delay until it succeeds, e.g. while the simulation pool is busy.
+    """
+    global strategy_advisor
+    rules = rules_key(STRATEGY_CONFIG["decks"], STRATEGY_CONFIG["dealer_hits_soft_17"], STRATEGY_CONFIG["double_after_split"])
+    path = STRATEGY_CONFIG["cache_path"]
+    delay = STRATEGY_CONFIG["retry_delay"]
+    while strategy_advisor is None:
+        try:
+            advisor = await asyncio.to_thread(StrategyAdvisor.load, path, rules)
+            if advisor is None:
+                built = await sim_pool.run(
+                    build_tables, STRATEGY_CONFIG["decks"], STRATEGY_CONFIG["dealer_hits_soft_17"], STRATEGY_CONFIG["double_after_split"]
+                )
+                advisor = StrategyAdvisor(built)
+                print(f"💡 Built strategy tables for {rules} in {built['seconds']:.2f}s")
+                try:
+                    await asyncio.to_thread(StrategyAdvisor.save, path, built)
+                except OSError as e:
+                    print(f"⚠️ Could not save strategy tables, they will be rebuilt after a restart: {e}")
+            strategy_advisor = advisor
+        except PoolSaturated:
+            print(f"⏳ Simulation workers busy, building strategy tables in {delay}s")
+        except Exception as e:
+            print(f"⚠️ Could not load strategy tables, retrying in {delay}s: {e}")
+        if strategy_advisor is None:
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, STRATEGY_CONFIG["max_retry_delay"])
+
+def log_command(ctx, command_name, details=""):
+    """Queue a command usage entry for the next batched message to the log channel."""
+    command_log.log(ctx, command_name, details)
+
+async def require_active_session(interaction, session):
+    """Tell the player off and return False if they have no session open to play in."""
+    if session.session_active:
+        return True
+    await interaction.response.send_message("❌ No active session! Start a session first.", ephemeral=True)
+    return False
+
+def chart_attachment(chart):
+    """Wrap a rendered (bytes, info) chart in a fresh discord.File for sending."""
+    data, info = chart
+    return discord.File(io.BytesIO(data), filename=f'blackjack_session_chart.{info["format"]}')
+
+STATS_WINDOWS = {
+    "hour": ("Last hour", timedelta(hours=1)),
+    "day": ("Last 24 hours", timedelta(days=1)),
+    "week": ("Last 7 days", timedelta(weeks=1)),
+    "month": ("Last 30 days", timedelta(days=30)),
+}
+DURATION_UNITS = {"m": "minutes", "h": "hours", "d": "days", "w": "weeks"}
+
+def parse_stats_window(text):
+    """Turn a &stats window into (start_ts, end_ts, label); either bound may be None.
+
+    Accepts all, hour, day, week, month, a duration like 90m/12h/3d/2w, a UTC date
+    like 2025-08-01, or a UTC date range like 2025-08-01..2025-08-15 (end inclusive).
+    """
+    text = text.strip().lower()
+    now = datetime.now(timezone.utc)
+    if text == "all":
+        return None, None, "All time"
+    if text in STATS_WINDOWS:
+        label, span = STATS_WINDOWS[text]
+        return int((now - span).timestamp()), None, label
+    match = re.fullmatch(r"(\d+)([mhdw])", text)
+    if match:
+        amount, unit = int(match.group(1)), DURATION_UNITS[match.group(2)]
+        return int((now - timedelta(**{unit: amount})).timestamp()), None, f"Last {amount} {unit}"
+    first, _, last = text.partition("..")
+    start = datetime.strptime(first, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    end = datetime.strptime(last or first, "%Y-%m-%d").replace(tzinfo=timezone.utc) + timedelta(days=1)
+    if end <= start:
+        raise ValueError("range ends before it starts")
+    label = f"{first} to {last}" if last else first
+    return int(start.timestamp()), int(end.timestamp()), f"{label} (UTC)"
 
 # =================================================================================================
 # BOT EVENTS
 # =================================================================================================
 
+@bot.event
+async def setup_hook():
+    """Restores casino state and starts background tasks once, before the bot connects to the gateway."""
+    global casino_ready
+    log_startup_phase("Modules loaded")
+    await keep_alive(
+        bot, HEALTH_CONFIG["host"], HEALTH_CONFIG["port"],
+        max_latency=HEALTH_CONFIG["max_latency"], is_ready=lambda: casino_ready
+    )
+    started = time.perf_counter()
+    try:
+        replayed = journal.replay(sessions)
+        print(f"📖 Replayed {replayed} journal events into {len(sessions)} sessions in {time.perf_counter() - started:.2f}s")
+    except Exception as e:
+        # Serving from a partial state would hand out seq numbers that are already on disk
+        print(f"❌ Error replaying casino journal, refusing to start: {e}")
+        raise
+    casino_ready = True
+    # Registered before connecting, so clicks on tables from before the restart work straight away
+    bot.add_view(CasinoView())
+    bot.add_dynamic_items(GameButton)
+    bot.loop.create_task(journal.run(sessions))
+    bot.loop.create_task(command_log.run())
+    if STRATEGY_CONFIG["enabled"]:
+        bot.loop.create_task(load_strategy_tables())
+    evict_idle_sessions.start()
+
 @bot.event
 async def on_ready():
-    """Prints a message to the console when the bot is online and adds persistent views."""
+    """Prints a message to the console when the bot is online."""
+    global charts_warming
     print(f'ʟᴏʟᴇᴛᴛᴀɴ {bot.user} is online and ready! 🚀')
-
-    # Add persistent views
-    bot.add_view(CasinoView())
-    bot.add_view(GameView(0))  # Default instance
-    print("Persistent views added for casino system!")
+    if not charts_warming:
+        # Only on the first ready; later ones are gateway reconnects
+        charts_warming = True
+        log_startup_phase("Gateway ready")
+        bot.loop.create_task(warm_chart_workers())
+
+# Mention replies are built once and never modified, so every reply reuses them
+BOT_MENTION_EMBED = discord.Embed(
+    title="👋 Hey there!",
+    description="**ʟᴏʟᴇᴛᴛᴀɴ BlackJack Casino Bot**\n\nI'm here to help you track your BlackJack sessions!",
+    color=0xffd700
+)
+BOT_MENTION_EMBED.add_field(
+    name="🎰 Quick Start",
+    value="Use `&casino` to open the casino interface and start tracking your games!",
+    inline=False
+)
+BOT_MENTION_EMBED.add_field(
+    name="📊 Features",
+    value="• Session tracking with statistics\n• Win/loss analysis with charts\n• Side bets support\n• Split & double down tracking",
+    inline=False
+)
+BOT_MENTION_EMBED.add_field(
+    name="❓ Need Help?",
+    value="Use `&help` for a complete list of commands!",
+    inline=False
+)
+BOT_MENTION_EMBED.set_footer(text="♠️ Professional BlackJack Statistics Tracker")
+
+TARGET_MENTION_EMBED = discord.Embed(
+    description="ʜᴇʏʏ..👋🏼 ᴛʜᴀᴛ's ᴏᴜʀ ʙʟᴀᴄᴋᴊᴀᴄᴋ ʜᴇʀᴏ♠️, ʜᴇ ᴡɪʟʟ ʀᴇsᴘᴏɴᴅ sᴏᴏɴ..",
+    color=0x000000
+)
+
+MENTION_TARGET_IDS = frozenset(MENTION_CONFIG["target_member_ids"])
+
+# (channel_id, mentioned_id) -> time.monotonic() at which the next reply is allowed
+mention_cooldowns = {}
+
+def mention_on_cooldown(channel_id, target_id):
+    """Return True if this mention was answered recently in this channel; otherwise start its cooldown."""
+    now = time.monotonic()
+    key = (channel_id, target_id)
+    if mention_cooldowns.get(key, 0) > now:
+        return True
+    if len(mention_cooldowns) >= MENTION_CONFIG["cooldown_cache_size"]:
+        for expired in [k for k, until in mention_cooldowns.items() if until <= now]:
+            del mention_cooldowns[expired]
+        while len(mention_cooldowns) >= MENTION_CONFIG["cooldown_cache_size"]:
+            # Still full of live cooldowns: forget the oldest
+            del mention_cooldowns[next(iter(mention_cooldowns))]
+    mention_cooldowns[key] = now + MENTION_CONFIG["cooldown"]
+    return False
 
 @bot.event
 async def on_message(message):
@@ -97,42 +442,30 @@ async def on_message(message):
     if message.author == bot.user:
         return
 
-    # Check if the bot is mentioned
-    if bot.user in message.mentions:
-        embed = discord.Embed(
-            title="👋 Hey there!",
-            description="**ʟᴏʟᴇᴛᴛᴀɴ BlackJack Casino Bot**\n\nI'm here to help you track your BlackJack sessions!",
-            color=0xffd700
-        )
-        embed.add_field(
-            name="🎰 Quick Start",
-            value="Use `&casino` to open the casino interface and start tracking your games!",
-            inline=False
-        )
-        embed.add_field(
-            name="📊 Features",
-            value="• Session tracking with statistics\n• Win/loss analysis with charts\n• Side bets support\n• Split & double down tracking",
-            inline=False
-        )
-        embed.add_field(
-            name="❓ Need Help?",
-            value="Use `&help` for a complete list of commands!",
-            inline=False
-        )
-        embed.set_footer(text="♠️ Professional BlackJack Statistics Tracker")
-        
-        await message.channel.send(embed=embed)
-
-    # Check if any specific target members are mentioned (excluding the bot)
-    target_mentions = [mention for mention in message.mentions if mention != bot.user and mention.id in MENTION_CONFIG["target_member_ids"]]
-    if target_mentions:
-        # Custom response for BlackJack hero
-        embed = discord.Embed(
-            description="ʜᴇʏʏ..👋🏼 ᴛʜᴀᴛ's ᴏᴜʀ ʙʟᴀᴄᴋᴊᴀᴄᴋ ʜᴇʀᴏ♠️, ʜᴇ ᴡɪʟʟ ʀᴇsᴘᴏɴᴅ sᴏᴏɴ..",
-            color=0x000000
-        )
-        
-        await message.channel.send(embed=embed)
+    # Most messages neither mention anyone nor start with the prefix; they stop here
+    if message.mentions:
+        mentioned_ids = {member.id for member in message.mentions}
+
+        # Check if the bot is mentioned
+        if bot.user.id in mentioned_ids and not mention_on_cooldown(message.channel.id, bot.user.id):
+            await outbound.send(
+                Priority.MESSAGE, f"channel:{message.channel.id}", message.channel.send, embed=BOT_MENTION_EMBED,
+                coalesce=(message.channel.id, "bot_mention")
+            )
+
+        # Check if any specific target members are mentioned (excluding the bot)
+        target_ids = mentioned_ids & MENTION_TARGET_IDS
+        target_ids.discard(bot.user.id)
+        # Every target is checked, so each one's cooldown starts even when they share a reply
+        if [target_id for target_id in target_ids if not mention_on_cooldown(message.channel.id, target_id)]:
+            # Custom response for BlackJack hero
+            await outbound.send(
+                Priority.MESSAGE, f"channel:{message.channel.id}", message.channel.send, embed=TARGET_MENTION_EMBED,
+                coalesce=(message.channel.id, "target_mention")
+            )
+
+    if not message.content.startswith(bot.command_prefix):
+        return
 
     # Process commands
     await bot.process_commands(message)
@@ -141,68 +474,152 @@ async def on_message(message):
 # CASINO SYSTEM - BlackJack Statistics Tracker
 # =================================================================================================
 
-# Casino data storage (in-memory, persists during bot runtime)
-casino_data = {
-    "balance": 0,
-    "games": [],
-    "session_active": False,
-    "session_start": None,
-    "session_games": []
-}
+# Guild leaderboards, updated as each game is recorded instead of sorted on every call
+leaderboards = Leaderboards(
+    top_k=LEADERBOARD_CONFIG["top_k"],
+    min_games_for_win_rate=LEADERBOARD_CONFIG["min_games_for_win_rate"]
+)
+
+# Casino sessions, one per player per guild; every mutation is journaled so they survive restarts
+sessions = SessionStore(
+    idle_timeout=SESSION_CONFIG["idle_timeout"],
+    max_history=HISTORY_CONFIG["max_hands_per_player"],
+    leaderboards=leaderboards
+)
+if STORE_CONFIG["backend"] == "sqlite":
+    # Every process applies the others' events too, so any shard can serve any player
+    journal = SqliteJournal(
+        STORE_CONFIG["sqlite_path"],
+        CLUSTER_CONFIG["name"],
+        flush_interval=JOURNAL_CONFIG["flush_interval"],
+        max_batch=JOURNAL_CONFIG["max_batch"],
+        compact_every=JOURNAL_CONFIG["compact_every"],
+        busy_timeout=STORE_CONFIG["busy_timeout"],
+        max_history=HISTORY_CONFIG["max_hands_per_player"]
+    )
+else:
+    journal = GameJournal(
+        JOURNAL_CONFIG["path"],
+        JOURNAL_CONFIG["snapshot_path"],
+        flush_interval=JOURNAL_CONFIG["flush_interval"],
+        max_batch=JOURNAL_CONFIG["max_batch"],
+        compact_every=JOURNAL_CONFIG["compact_every"]
+    )
 
-def get_session_duration():
-    """Calculates the current session duration in minutes."""
-    if casino_data["session_start"]:
-        duration = datetime.now() - casino_data["session_start"]
-        minutes = int(duration.total_seconds() / 60)
-        return f"{minutes} minutes"
-    return "0 minutes"
+# Set once the journal has been replayed; /readyz stays unready until then
+casino_ready = False
+# Set on the first on_ready, when the chart workers start warming up
+charts_warming = False
+
+# Metrics read at scrape time
+REGISTRY.gauge("lolettan_gateway_connected", "Whether the Discord gateway is connected",
+               func=lambda: int(bot.is_ready() and not bot.is_closed() and math.isfinite(bot.latency)))
+REGISTRY.gauge("lolettan_gateway_latency_seconds", "Latest gateway heartbeat latency",
+               func=lambda: bot.latency if math.isfinite(bot.latency) else -1)
+REGISTRY.gauge("lolettan_guilds", "Guilds the bot is in", func=lambda: len(bot.guilds))
+REGISTRY.gauge("lolettan_shards", "Gateway shards run by this process", func=lambda: len(bot.shards))
+REGISTRY.gauge("lolettan_casino_sessions_loaded", "Casino sessions held in memory", func=lambda: len(sessions))
+REGISTRY.gauge("lolettan_casino_sessions_active", "Casino sessions currently in play",
+               func=lambda: sum(1 for session in sessions if session.session_active))
+REGISTRY.gauge("lolettan_journal_seq", "Sequence number of the latest journal event", func=lambda: journal.seq)
+REGISTRY.gauge("lolettan_journal_pending_events", "Journal events waiting for the next group commit", func=lambda: journal.pending)
+chart_bytes = REGISTRY.histogram(
+    "lolettan_chart_bytes", "Size of encoded session charts", ("format",),
+    buckets=(10_000, 25_000, 50_000, 100_000, 150_000, 250_000, 500_000, 1_000_000)
+)
+chart_encode_seconds = REGISTRY.histogram(
+    "lolettan_chart_encode_seconds", "Time spent encoding session charts, after drawing", ("format",),
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+REGISTRY.gauge("lolettan_chart_renders_pending", "Chart renders queued or running", func=lambda: chart_pool.pending)
+REGISTRY.gauge("lolettan_simulations_pending", "Bankroll simulations queued or running", func=lambda: sim_pool.pending)
+REGISTRY.gauge("lolettan_outbound_in_flight", "Queued REST calls currently being sent", func=lambda: outbound.in_flight)
+REGISTRY.gauge("lolettan_command_log_pending", "Command log entries waiting to be sent", func=lambda: command_log.pending)
+
+# Double-clicks and client retries are acknowledged without running the handler twice
+interaction_guard = InteractionGuard(
+    ttl=INTERACTION_CONFIG["dedup_ttl"],
+    max_entries=INTERACTION_CONFIG["dedup_cache_size"]
+)
+
+# Remembers what each casino message shows, so edits that change nothing are skipped
+renderer = MessageRenderer()
+
+def session_status_embed(session, title, description, color=0x00ff00,
+                         balance_label="💰 Current Balance", footer="♠️ BlackJack Casino | Session in Progress"):
+    """Session screen embed with the balance, game count and duration fields."""
+    embed = discord.Embed(title=title, description=description, color=color)
+    embed.add_field(name=balance_label, value=f"₹{session.balance:,}", inline=True)
+    embed.add_field(name="🎮 Session Games", value=f"{len(session.session_games)}", inline=True)
+    embed.add_field(name="⏱️ Session Duration", value=session.get_duration(), inline=True)
+    embed.set_footer(text=footer)
+    return embed
+
+def journal_event(session, kind, **fields):
+    """Record a session mutation in the journal along with the resulting balance."""
+    journal.append(kind, session.guild_id, session.user_id, balance=session.balance, **fields)
+
+@tasks.loop(seconds=SESSION_CONFIG["eviction_interval"])
+async def evict_idle_sessions():
+    """Periodically drop sessions that have gone idle."""
+    evicted = sessions.evict_idle()
+    if evicted:
+        print(f"🧹 Evicted {evicted} idle casino sessions ({len(sessions)} still loaded)")
 
 class CasinoView(discord.ui.View):
-    def __init__(self):
+    def __init__(self, session_active=False):
         # Set timeout to None to make the view truly persistent for unlimited session duration
         super().__init__(timeout=None)
+        if session_active:
+            self.play_game.disabled = False
+            self.skip_game.disabled = False
+            self.end_session.disabled = False
+            self.cash_out.disabled = False
 
     @discord.ui.button(label='💰 Start Session', style=discord.ButtonStyle.green, custom_id='start_session')
+    @timed_interaction("start_session")
     async def start_session(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if casino_data["session_active"]:
+        # Only opens a modal, so it skips the interaction guard: a dismissed modal must open again on the next click
+        session = sessions.for_interaction(interaction)
+        if session.session_active:
             await interaction.response.send_message("❌ A session is already active! End the current session first.", ephemeral=True)
             return
         modal = BalanceModal(action="start")
         await interaction.response.send_modal(modal)
 
     @discord.ui.button(label='🎲 Play', style=discord.ButtonStyle.primary, custom_id='play_game', disabled=True)
+    @timed_interaction("play_game")
     async def play_game(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if not casino_data["session_active"]:
+        # Only opens a modal, so it skips the interaction guard: a dismissed modal must open again on the next click
+        session = sessions.for_interaction(interaction)
+        if not session.session_active:
             await interaction.response.send_message("❌ No active session! Start a session first.", ephemeral=True)
             return
         modal = BetAmountModal()
         await interaction.response.send_modal(modal)
 
     @discord.ui.button(label='⏸️ Skip', style=discord.ButtonStyle.secondary, custom_id='skip_game', disabled=True)
+    @timed_interaction("skip_game")
+    @interaction_guard.once
     async def skip_game(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if not casino_data["session_active"]:
+        session = sessions.for_interaction(interaction)
+        if not session.session_active:
             await interaction.response.send_message("❌ No active session! Start a session first.", ephemeral=True)
             return
-        view = CasinoView()
-        view.play_game.disabled = False
-        view.skip_game.disabled = False
-        view.end_session.disabled = False
-        view.cash_out.disabled = False
-        embed = discord.Embed(
+        view = CasinoView(session_active=True)
+        embed = session_status_embed(
+            session,
             title="🎰 BlackJack Casino - Session Active",
-            description="**🎲 Ready to play another round!**\n\n**Options:**\n🎲 **Play**\n⏸️ **Skip**\n🛑 **End Session**",
-            color=0x00ff00
+            description="**🎲 Ready to play another round!**\n\n**Options:**\n🎲 **Play**\n⏸️ **Skip**\n🛑 **End Session**"
         )
-        embed.add_field(name="💰 Current Balance", value=f"₹{casino_data['balance']:,}", inline=True)
-        embed.add_field(name="🎮 Session Games", value=f"{len(casino_data['session_games'])}", inline=True)
-        embed.add_field(name="⏱️ Session Duration", value=f"{get_session_duration()} minutes", inline=True)
-        embed.set_footer(text="♠️ BlackJack Casino | Session in Progress")
-        await interaction.response.edit_message(embed=embed, view=view)
+        await renderer.edit(interaction, embed=embed, view=view)
 
     @discord.ui.button(label='🛑 End Session', style=discord.ButtonStyle.danger, custom_id='end_session', disabled=True)
+    @timed_interaction("end_session")
+    @interaction_guard.once
     async def end_session(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if not casino_data["session_active"]:
+        session = sessions.for_interaction(interaction)
+        if not session.session_active:
             await interaction.response.send_message("❌ No active session to end!", ephemeral=True)
             return
 
@@ -210,109 +627,65 @@ class CasinoView(discord.ui.View):
         await interaction.response.defer(ephemeral=False)
 
         try:
-            await self.generate_session_report(interaction)
+            async with session.lock:
+                # Another click may have ended the session while we waited for the lock
+                if not session.session_active:
+                    return
+                await self.generate_session_report(interaction, session)
         except Exception as e:
             print(f"Error generating session report: {e}")
-            await interaction.followup.send("❌ An error occurred while generating the session report. Please try again.", ephemeral=True)
+            await outbound.send(
+                Priority.FOLLOWUP, f"interaction:{interaction.id}", interaction.followup.send,
+                "❌ An error occurred while generating the session report. Please try again.", ephemeral=True
+            )
 
     @discord.ui.button(label='💵 Cash Out', style=discord.ButtonStyle.success, custom_id='cash_out', disabled=True)
+    @timed_interaction("cash_out")
     async def cash_out(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if not casino_data["session_active"]:
+        # Only opens a modal, so it skips the interaction guard: a dismissed modal must open again on the next click
+        session = sessions.for_interaction(interaction)
+        if not session.session_active:
             await interaction.response.send_message("❌ No active session to cash out from!", ephemeral=True)
             return
         modal = CashOutModal()
         await interaction.response.send_modal(modal)
 
-    async def generate_session_report(self, interaction: discord.Interaction):
-        session_games = casino_data["session_games"]
+    async def generate_session_report(self, interaction: discord.Interaction, session):
+        session_games = session.session_games
         if not session_games:
-            await interaction.followup.send("❌ No games played in this session!", ephemeral=True)
+            await outbound.send(
+                Priority.FOLLOWUP, f"interaction:{interaction.id}", interaction.followup.send,
+                "❌ No games played in this session!", ephemeral=True
+            )
             return
 
-        # Calculate comprehensive statistics
-        total_games = len(session_games)
-        wins = sum(1 for game in session_games if game["outcome"] == "win")
-        losses = sum(1 for game in session_games if game["outcome"] == "lose")
-        ties = sum(1 for game in session_games if game["outcome"] == "tie")
-        blackjacks = sum(1 for game in session_games if game["outcome"] == "blackjack")
-        cashouts = sum(1 for game in session_games if game["outcome"] == "cashout")
-        splits = sum(1 for game in session_games if game.get("is_split", False))
-        doubles = sum(1 for game in session_games if game.get("is_double", False))
-
-        win_rate = (wins / total_games) * 100 if total_games > 0 else 0
-
-        # Calculate proper betting amounts including splits and doubles
-        total_bet = 0
-        total_won = 0
-        total_lost = 0
-        total_cashout_refunds = 0
-        total_cashout_losses = 0
-
-        for game in session_games:
-            if game["outcome"] == "cashout":
-                # Cash out: count refund and loss separately
-                total_cashout_refunds += game.get("refund_amount", 0)
-                total_cashout_losses += game.get("lost_amount", 0)
-                total_bet += game["amount"]
-            elif game.get("is_double", False):
-                # Double down: bet amount is already doubled
-                total_bet += game["amount"]
-                if game["outcome"] in ["win", "blackjack"]:
-                    if game["outcome"] == "blackjack":
-                        total_won += game["amount"]  # 1:1 payout
-                    else:
-                        total_won += game["amount"]  # 1:1 payout
-                elif game["outcome"] == "lose":
-                    total_lost += game["amount"]
-            elif game.get("is_split", False):
-                # Split: each hand is tracked separately
-                total_bet += game["amount"]
-                if game["outcome"] in ["win", "blackjack"]:
-                    if game["outcome"] == "blackjack":
-                        total_won += int(game["amount"] * 1.5)  # 3:2 for blackjack
-                    else:
-                        total_won += game["amount"]  # 1:1 for win
-                elif game["outcome"] == "lose":
-                    total_lost += game["amount"]
-            else:
-                # Regular hands
-                total_bet += game["amount"]
-                if game["outcome"] in ["win", "blackjack"]:
-                    if game["outcome"] == "blackjack":
-                        total_won += int(game["amount"] * 1.5)  # 3:2 payout
-                    else:
-                        total_won += game["amount"]  # 1:1 payout
-                elif game["outcome"] == "lose":
-                    total_lost += game["amount"]
-
-        total_side_bet_winnings = sum(game.get("side_bet_winnings", 0) for game in session_games)
-        net_profit = total_won - total_lost + total_side_bet_winnings + total_cashout_refunds - total_cashout_losses
-
-        # Calculate additional statistics
-        avg_bet = total_bet / total_games if total_games > 0 else 0
-        biggest_win = max([g["amount"] for g in session_games if g["outcome"] == "win"], default=0)
-        biggest_loss = max([g["amount"] for g in session_games if g["outcome"] == "lose"], default=0)
-
-        # Calculate win/loss streaks
-        max_win_streak = 0
-        max_loss_streak = 0
-        temp_win_streak = 0
-        temp_loss_streak = 0
-
-        for game in session_games:
-            if game["outcome"] == "win":
-                temp_win_streak += 1
-                temp_loss_streak = 0
-                max_win_streak = max(max_win_streak, temp_win_streak)
-            elif game["outcome"] == "lose":
-                temp_loss_streak += 1
-                temp_win_streak = 0
-                max_loss_streak = max(max_loss_streak, temp_loss_streak)
+        # Statistics are accumulated as games are recorded, so nothing here rescans the game list
+        stats = session.session_stats
+        total_games = stats.total_games
+        wins = stats.wins
+        losses = stats.losses
+        ties = stats.ties
+        blackjacks = stats.blackjacks
+        cashouts = stats.cashouts
+        splits = stats.splits
+        doubles = stats.doubles
+        win_rate = stats.win_rate
+
+        total_bet = stats.total_bet
+        total_won = stats.total_won
+        total_lost = stats.total_lost
+        total_side_bet_winnings = stats.side_bet_winnings
+        net_profit = stats.net_profit
+
+        biggest_win = stats.biggest_win
+        biggest_loss = stats.biggest_loss
+        max_win_streak = stats.max_win_streak
+        max_loss_streak = stats.max_loss_streak
 
         # Generate chart with error handling
-        chart_file = None
+        chart = None
         try:
-            chart_file = self.create_game_chart(session_games)
+            chart = await self.create_game_chart(session_games.columns(), session.starting_balance)
         except Exception as e:
             print(f"Error creating chart: {e}")
 
@@ -326,7 +699,7 @@ class CasinoView(discord.ui.View):
         # Session Overview
         embed.add_field(
             name="⏱️ Session Overview",
-            value=f"**Duration:** {get_session_duration()}\n**Games Played:** {total_games}\n**Starting Balance:** ₹{casino_data.get('starting_balance', 'Unknown'):,}\n**Final Balance:** ₹{casino_data['balance']:,}",
+            value=f"**Duration:** {session.get_duration()}\n**Games Played:** {total_games}\n**Starting Balance:** ₹{session.starting_balance:,}\n**Final Balance:** ₹{session.balance:,}",
             inline=True
         )
 
@@ -361,7 +734,7 @@ class CasinoView(discord.ui.View):
         # Streak Analysis
         embed.add_field(
             name="🔥 Streak Analysis",
-            value=f"**Max Win Streak:** {max_win_streak} games\n**Max Loss Streak:** {max_loss_streak} games\n**Current Form:** {'🟢 Winning' if session_games[-1]['outcome'] in ['win', 'blackjack'] else ('🔴 Losing' if session_games[-1]['outcome'] == 'lose' else '🟡 Push') if session_games else 'N/A'}",
+            value=f"**Max Win Streak:** {max_win_streak} games\n**Max Loss Streak:** {max_loss_streak} games\n**Current Form:** {'🟢 Winning' if stats.last_outcome in ['win', 'blackjack'] else ('🔴 Losing' if stats.last_outcome == 'lose' else '🟡 Push') if stats.last_outcome else 'N/A'}",
             inline=True
         )
 
@@ -389,231 +762,184 @@ class CasinoView(discord.ui.View):
         embed.set_footer(text="♠️ BlackJack Casino | Professional Statistics Tracker | Session Complete")
 
         # Reset session data
-        casino_data["session_active"] = False
-        casino_data["session_start"] = None
-        casino_data["session_games"] = []
+        session.end()
+        journal_event(session, "end")
 
         # Send the report with or without chart
+        if interaction.message is not None:
+            renderer.forget(interaction.message.id)
+        route = f"interaction:{interaction.id}"
         try:
-            if chart_file:
-                await interaction.edit_original_response(embed=embed, view=CasinoView(), attachments=[chart_file])
+            if chart:
+                await outbound.send(
+                    Priority.FOLLOWUP, route, interaction.edit_original_response,
+                    embed=embed, view=CasinoView(), attachments=[chart_attachment(chart)]
+                )
             else:
-                await interaction.edit_original_response(embed=embed, view=CasinoView())
+                await outbound.send(Priority.FOLLOWUP, route, interaction.edit_original_response, embed=embed, view=CasinoView())
         except Exception as e:
             print(f"Error sending session report: {e}")
-            if chart_file:
-                await interaction.followup.send(embed=embed, view=CasinoView(), file=chart_file)
+            if chart:
+                # A discord.File can only be sent once, so wrap the cached bytes again
+                await outbound.send(
+                    Priority.FOLLOWUP, route, interaction.followup.send, embed=embed, view=CasinoView(), file=chart_attachment(chart)
+                )
             else:
-                await interaction.followup.send(embed=embed, view=CasinoView())
+                await outbound.send(Priority.FOLLOWUP, route, interaction.followup.send, embed=embed, view=CasinoView())
 
-    def create_game_chart(self, games):
-        try:
-            plt.style.use('dark_background')
-            fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(14, 10))
-            fig.patch.set_facecolor('#2f3136')
-
-            # Prepare data
-            game_numbers = list(range(1, len(games) + 1))
-            outcomes = []
-            amounts = []
-            running_profit = []
-            colors = []
-            game_changes = []  # Track profit/loss change for each game
-            total_balances = []  # Track total balance after each game
-
-            cumulative_profit = 0
-            starting_balance = casino_data.get('starting_balance', 0)
-            
-            for i, g in enumerate(games):
-                game_change = 0  # Profit/loss for this specific game
-                
-                if g["outcome"] == "win":
-                    outcomes.append(1)
-                    game_change = g["amount"]  # Won the bet amount
-                    cumulative_profit += game_change
-                    colors.append('#00ff41')
-                elif g["outcome"] == "lose":
-                    outcomes.append(-1)
-                    game_change = -g["amount"]  # Lost the bet amount
-                    cumulative_profit += game_change
-                    colors.append('#ff4757')
-                elif g["outcome"] == "blackjack":
-                    outcomes.append(1.5)
-                    game_change = int(g["amount"] * 1.5)  # Blackjack 3:2 payout
-                    cumulative_profit += game_change
-                    colors.append('#ffd700')
-                elif g["outcome"] == "cashout":
-                    outcomes.append(0.5)
-                    refund = g.get("refund_amount", g["amount"])
-                    lost = g.get("lost_amount", 0)
-                    game_change = refund - lost
-                    cumulative_profit += game_change
-                    colors.append('#00aaff')
-                else:  # tie
-                    outcomes.append(0)
-                    game_change = 0  # No money change on tie
-                    colors.append('#ffaa00')
-
-                # Add side bet winnings to the game change
-                side_bet_winnings = g.get("side_bet_winnings", 0)
-                game_change += side_bet_winnings
-                
-                amounts.append(g["amount"])
-                running_profit.append(cumulative_profit + side_bet_winnings)
-                game_changes.append(game_change)
-                total_balances.append(starting_balance + cumulative_profit + side_bet_winnings)
-
-            # Top chart - Bet amounts and outcomes
-            ax1.set_facecolor('#36393f')
-            bars = ax1.bar(game_numbers, amounts, color=colors, alpha=0.7, edgecolor='white', linewidth=0.5)
-            
-            # Add profit/loss labels on bars
-            for i, (bar, change) in enumerate(zip(bars, game_changes)):
-                height = bar.get_height()
-                label_text = f"₹{change:+,}" if change != 0 else "₹0"
-                ax1.text(bar.get_x() + bar.get_width()/2., height + max(amounts)*0.02,
-                        label_text, ha='center', va='bottom', color='white', fontweight='bold', fontsize=9)
-            
-            ax1.set_xlabel('Game Number', color='white', fontweight='bold')
-            ax1.set_ylabel('Bet Amount (₹)', color='white', fontweight='bold')
-            ax1.set_title('🎰 BlackJack Session - Individual Game Results', color='#ffd700', fontsize=14, fontweight='bold', pad=15)
-            ax1.grid(True, axis='y', alpha=0.3, linestyle=':')
-
-            # Bottom chart - Running profit trend with balance annotations
-            ax2.set_facecolor('#36393f')
-            line = ax2.plot(game_numbers, running_profit, color='#ffd700', linewidth=3, marker='o', markersize=10, label='Net Profit')
-            ax2.axhline(0, color='white', linestyle='--', linewidth=2, alpha=0.7)
-            ax2.fill_between(game_numbers, running_profit, 0, where=[p >= 0 for p in running_profit],
-                           color='#00ff41', alpha=0.3, interpolate=True, label='Profit Zone')
-            ax2.fill_between(game_numbers, running_profit, 0, where=[p < 0 for p in running_profit],
-                           color='#ff4757', alpha=0.3, interpolate=True, label='Loss Zone')
-
-            # Add annotations showing profit/loss change and total balance at each point
-            for i, (x, y, change, balance) in enumerate(zip(game_numbers, running_profit, game_changes, total_balances)):
-                # Show profit/loss change and total balance
-                change_text = f"₹{change:+,}" if change != 0 else "₹0"
-                balance_text = f"(₹{balance:,})"
-                annotation_text = f"{change_text}\n{balance_text}"
-                
-                # Position annotation above or below point based on space
-                y_offset = 15 if i % 2 == 0 else -25
-                ax2.annotate(annotation_text, (x, y), 
-                           xytext=(0, y_offset), textcoords='offset points',
-                           ha='center', va='center' if y_offset > 0 else 'top',
-                           fontsize=8, fontweight='bold', color='white',
-                           bbox=dict(boxstyle='round,pad=0.3', facecolor='black', alpha=0.7, edgecolor='#ffd700'))
-
-            ax2.set_xlabel('Game Number', color='white', fontweight='bold')
-            ax2.set_ylabel('Session Net Profit (₹)', color='white', fontweight='bold')
-            ax2.set_title('📈 Cumulative Profit/Loss Trend', color='#ffd700', fontsize=14, fontweight='bold', pad=15)
-            ax2.grid(True, alpha=0.3, linestyle=':')
-            ax2.legend(loc='upper left')
-
-            # Add statistics text box
-            total_games = len(games)
-            wins = sum(1 for g in games if g["outcome"] == "win")
-            losses = sum(1 for g in games if g["outcome"] == "lose")
-            ties = sum(1 for g in games if g["outcome"] == "tie")
-            blackjacks = sum(1 for g in games if g["outcome"] == "blackjack")
-            win_rate = ((wins + blackjacks) / total_games) * 100 if total_games > 0 else 0
-            final_profit = running_profit[-1] if running_profit else 0
-
-            stats_text = f'📊 Session Stats:\nGames: {total_games} | W: {wins} | L: {losses} | T: {ties} | BJ: {blackjacks}\nWin Rate: {win_rate:.1f}% | Final P&L: ₹{final_profit:+,}'
-            ax2.text(0.02, 0.98, stats_text, transform=ax2.transAxes, fontsize=10,
-                    verticalalignment='top', bbox=dict(boxstyle='round', facecolor='#36393f', alpha=0.8),
-                    color='white')
-
-            plt.tight_layout()
-
-            # Save to buffer
-            buffer = io.BytesIO()
-            plt.savefig(buffer, format='png', facecolor=fig.get_facecolor(), dpi=150, bbox_inches='tight')
-            buffer.seek(0)
-            plt.close(fig)
-
-            return discord.File(buffer, filename='blackjack_session_chart.png')
+    async def create_game_chart(self, columns, starting_balance=0):
+        """Render the session chart as (image bytes, encode info), from the cache if this session was already drawn.
 
-        except Exception as e:
-            print(f"Error creating chart: {e}")
-            plt.close('all')
-            raise e
+        Returns None if no chart could be made in time.
+        """
+        key = ChartCache.key(columns, starting_balance, CHART_CONFIG["lod_threshold"], CHART_ENCODING)
+        chart = chart_cache.get(key)
+        if chart is not None:
+            return chart
+        try:
+            chart = await chart_pool.run(render_session_chart, columns, starting_balance, CHART_CONFIG["lod_threshold"], CHART_ENCODING)
+        except PoolSaturated:
+            print("⚠️ Chart workers are busy, sending report without chart")
+            return None
+        except asyncio.TimeoutError:
+            print(f"⚠️ Chart render timed out after {CHART_CONFIG['render_timeout']}s, sending report without chart")
+            return None
+
+        info = chart[1]
+        # Observed here rather than in the worker, whose metrics never reach this process's registry
+        chart_bytes.observe(info["bytes"], format=info["format"])
+        chart_encode_seconds.observe(info["encode_seconds"], format=info["format"])
+        print(f"🖼️ Chart: {info['bytes'] / 1024:.0f} KB {info['format']} at {info['width']}x{info['height']} "
+              f"({info['dpi']} dpi, {info['attempts']} attempt(s)), drawn in {info['draw_seconds'] * 1000:.0f}ms, "
+              f"encoded in {info['encode_seconds'] * 1000:.0f}ms")
+        chart_cache.put(key, chart)
+        return chart
+
+# (action, label, style) of each GameView button, in display order
+GAME_BUTTONS = (
+    ("win", "🟢 WIN", discord.ButtonStyle.success),
+    ("lose", "🔴 LOSE", discord.ButtonStyle.danger),
+    ("tie", "🟡 TIE", discord.ButtonStyle.secondary),
+    ("blackjack", "🂡 BLACKJACK", discord.ButtonStyle.primary),
+    ("cashout", "💵 CASH OUT", discord.ButtonStyle.success),
+    ("split", "🧩 SPLIT", discord.ButtonStyle.secondary),
+    ("double", "🔁DOUBLE", discord.ButtonStyle.secondary),
+    ("advice", "💡 ADVICE", discord.ButtonStyle.secondary),
+)
 
 class GameView(discord.ui.View):
-    def __init__(self, bet_amount, side_bets=None, is_split=False, is_double=False):
+    def __init__(self, owner_id, bet_amount, side_bets=None, split_hand=0, is_double=False):
         # Set timeout to None for unlimited session duration
         super().__init__(timeout=None)
+        self.owner_id = owner_id  # Only this player's clicks are accepted
         self.bet_amount = bet_amount
         self.side_bets = side_bets or {}
-        self.is_split = is_split
+        self.split_hand = split_hand  # 1 or 2 while playing the hands of a split, else 0
+        self.is_split = split_hand > 0
         self.is_double = is_double
-
-        if is_split:
-            self.split_hands_completed = getattr(casino_data, 'split_hands_completed', 0)
-
-    @discord.ui.button(label='🟢 WIN', style=discord.ButtonStyle.success, custom_id='game_win')
+        self.buttons = {}
+        for action, label, style in GAME_BUTTONS:
+            if action == "advice" and not STRATEGY_CONFIG["enabled"]:
+                continue
+            self.buttons[action] = GameButton(self, action, label, style)
+            self.add_item(self.buttons[action])
+
+    @timed_interaction("game_win")
+    @interaction_guard.once
     async def game_win(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await self.record_game(interaction, "win", self.bet_amount)
+        session = sessions.for_interaction(interaction)
+        async with session.lock:
+            await self.record_game(interaction, session, "win", self.bet_amount)
 
-    @discord.ui.button(label='🔴 LOSE', style=discord.ButtonStyle.danger, custom_id='game_lose')
+    @timed_interaction("game_lose")
+    @interaction_guard.once
     async def game_lose(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await self.record_game(interaction, "lose", self.bet_amount)
+        session = sessions.for_interaction(interaction)
+        async with session.lock:
+            await self.record_game(interaction, session, "lose", self.bet_amount)
 
-    @discord.ui.button(label='🟡 TIE', style=discord.ButtonStyle.secondary, custom_id='game_tie')
+    @timed_interaction("game_tie")
+    @interaction_guard.once
     async def game_tie(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await self.record_game(interaction, "tie", self.bet_amount)
+        session = sessions.for_interaction(interaction)
+        async with session.lock:
+            await self.record_game(interaction, session, "tie", self.bet_amount)
 
-    @discord.ui.button(label='🂡 BLACKJACK', style=discord.ButtonStyle.primary, custom_id='game_blackjack')
+    @timed_interaction("game_blackjack")
+    @interaction_guard.once
     async def game_blackjack(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await self.record_game(interaction, "blackjack", self.bet_amount)
+        session = sessions.for_interaction(interaction)
+        async with session.lock:
+            await self.record_game(interaction, session, "blackjack", self.bet_amount)
 
-    @discord.ui.button(label='💵 CASH OUT', style=discord.ButtonStyle.success, custom_id='game_cashout')
+    @timed_interaction("game_cashout")
     async def game_cashout(self, interaction: discord.Interaction, button: discord.ui.Button):
+        # Only opens a modal, so it skips the interaction guard: a dismissed modal must open again on the next click
         modal = GameCashOutModal(self.bet_amount)
         await interaction.response.send_modal(modal)
 
-    @discord.ui.button(label='🧩 SPLIT', style=discord.ButtonStyle.secondary, custom_id='game_split')
+    @timed_interaction("game_split")
+    @interaction_guard.once
     async def game_split(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if casino_data["balance"] < self.bet_amount:
-            await interaction.response.send_message("❌ Insufficient balance to split!", ephemeral=True)
-            return
+        session = sessions.for_interaction(interaction)
+        async with session.lock:
+            if not await require_active_session(interaction, session):
+                return
+            if session.balance < self.bet_amount:
+                await interaction.response.send_message("❌ Insufficient balance to split!", ephemeral=True)
+                return
 
-        # Split: deduct additional bet amount for second hand
-        casino_data["balance"] -= self.bet_amount
-        casino_data['split_hands_completed'] = 0
+            # Split: deduct additional bet amount for second hand
+            session.balance -= self.bet_amount
+            journal_event(session, "bet")
 
-        embed = discord.Embed(
-            title="🧩 Split Hand - First Hand",
-            description=f"**Playing first hand of split**\n\n**Each Hand Bet:** ₹{self.bet_amount:,}\n**Total Bet:** ₹{self.bet_amount * 2:,}",
-            color=0x00aaff
-        )
-        embed.add_field(name="💰 Current Balance", value=f"₹{casino_data['balance']:,}", inline=True)
-        embed.set_footer(text="♠️ BlackJack Casino | Split Hand 1/2")
+            embed = discord.Embed(
+                title="🧩 Split Hand - First Hand",
+                description=f"**Playing first hand of split**\n\n**Each Hand Bet:** ₹{self.bet_amount:,}\n**Total Bet:** ₹{self.bet_amount * 2:,}",
+                color=0x00aaff
+            )
+            embed.add_field(name="💰 Current Balance", value=f"₹{session.balance:,}", inline=True)
+            embed.set_footer(text="♠️ BlackJack Casino | Split Hand 1/2")
 
-        view = GameView(self.bet_amount, self.side_bets, is_split=True)
-        await interaction.response.edit_message(embed=embed, view=view)
+            view = GameView(self.owner_id, self.bet_amount, self.side_bets, split_hand=1)
+            await renderer.edit(interaction, embed=embed, view=view)
 
-    @discord.ui.button(label='🔁DOUBLE', style=discord.ButtonStyle.secondary, custom_id='game_double')
+    @timed_interaction("game_double")
+    @interaction_guard.once
     async def game_double(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if casino_data["balance"] < self.bet_amount:
-            await interaction.response.send_message("❌ Insufficient balance to double down!", ephemeral=True)
-            return
+        session = sessions.for_interaction(interaction)
+        async with session.lock:
+            if not await require_active_session(interaction, session):
+                return
+            if session.balance < self.bet_amount:
+                await interaction.response.send_message("❌ Insufficient balance to double down!", ephemeral=True)
+                return
 
-        # Double down: deduct additional bet amount
-        casino_data["balance"] -= self.bet_amount
-        doubled_amount = self.bet_amount * 2
+            # Double down: deduct additional bet amount
+            session.balance -= self.bet_amount
+            doubled_amount = self.bet_amount * 2
+            journal_event(session, "bet")
 
-        embed = discord.Embed(
-            title="🔁 Double Down",
-            description=f"**Bet doubled! Choose outcome:**\n\n**Original Bet:** ₹{self.bet_amount:,}\n**Total Bet:** ₹{doubled_amount:,}",
-            color=0xff9900
-        )
-        embed.add_field(name="💰 Current Balance", value=f"₹{casino_data['balance']:,}", inline=True)
-        embed.set_footer(text="♠️ BlackJack Casino | Double Down")
+            embed = discord.Embed(
+                title="🔁 Double Down",
+                description=f"**Bet doubled! Choose outcome:**\n\n**Original Bet:** ₹{self.bet_amount:,}\n**Total Bet:** ₹{doubled_amount:,}",
+                color=0xff9900
+            )
+            embed.add_field(name="💰 Current Balance", value=f"₹{session.balance:,}", inline=True)
+            embed.set_footer(text="♠️ BlackJack Casino | Double Down")
+
+            view = GameView(self.owner_id, doubled_amount, self.side_bets, is_double=True)
+            await renderer.edit(interaction, embed=embed, view=view)
 
-        view = GameView(doubled_amount, self.side_bets, is_double=True)
-        await interaction.response.edit_message(embed=embed, view=view)
+    @timed_interaction("game_advice")
+    async def game_advice(self, interaction: discord.Interaction, button: discord.ui.Button):
+        # Read-only, so repeated clicks are harmless and skip the interaction guard
+        await interaction.response.send_modal(AdviceModal())
+
+    async def record_game(self, interaction, session, outcome, amount):
+        if not await require_active_session(interaction, session):
+            return
 
-    async def record_game(self, interaction, outcome, amount):
         # Process side bets first
         side_bet_winnings = 0
         side_bet_text = ""
@@ -621,34 +947,30 @@ class GameView(discord.ui.View):
         if self.side_bets:
             for bet_type, bet_amount in self.side_bets.items():
                 if bet_amount > 0:
-                    # For demo purposes, 25% chance side bet wins
-                    import random
-                    if random.choice([True, False, False, False]):
-                        multiplier = {"Perfect Pair": 5, "21 + 3": 10, "Dealer Bust": 30}.get(bet_type, 5)
-                        side_bet_win = bet_amount * multiplier
-                        casino_data["balance"] += side_bet_win
+                    result, payout = side_bet_engine.resolve(bet_type)
+                    if result:
+                        side_bet_win = bet_amount * payout
+                        session.balance += side_bet_win
                         side_bet_winnings += side_bet_win
-                        side_bet_text += f"🎉 {bet_type} WON: +₹{side_bet_win:,}\n"
+                        side_bet_text += f"🎉 {bet_type} WON ({result} {payout}:1): +₹{side_bet_win:,}\n"
                     else:
-                        casino_data["balance"] -= bet_amount
+                        session.balance -= bet_amount
                         side_bet_text += f"❌ {bet_type} LOST: -₹{bet_amount:,}\n"
 
         # Record the main game
-        game_data = {
-            "outcome": outcome, 
-            "amount": amount, 
-            "timestamp": datetime.now().isoformat(),
-            "side_bets": self.side_bets,
-            "side_bet_winnings": side_bet_winnings,
-            "is_split": self.is_split,
-            "is_double": self.is_double
-        }
-        casino_data["session_games"].append(game_data)
-        casino_data["games"].append(game_data)
+        game = GameRecord.new(
+            outcome,
+            amount,
+            side_bets=self.side_bets,
+            side_bet_winnings=side_bet_winnings,
+            is_split=self.is_split,
+            is_double=self.is_double
+        )
+        session.add_game(game)
 
         # Update balance based on outcome
         if outcome == "win":
-            casino_data["balance"] += amount * 2
+            session.balance += amount * 2
             balance_change = f"+₹{amount * 2:,}"
             color = 0x00ff00
             outcome_text = "🟢 WIN"
@@ -657,32 +979,32 @@ class GameView(discord.ui.View):
             color = 0xff0000
             outcome_text = "🔴 LOSE"
         elif outcome == "tie":
-            casino_data["balance"] += amount
+            session.balance += amount
             balance_change = "₹0 (Push)"
             color = 0xffaa00
             outcome_text = "🟡 TIE"
         elif outcome == "blackjack":
             payout = int(amount * 2.5)
-            casino_data["balance"] += payout
+            session.balance += payout
             balance_change = f"+₹{payout:,}"
             color = 0x00ff00
             outcome_text = "🂡 BLACKJACK"
 
+        journal_event(session, "game", game=game.to_row())
+
         # Handle split hands
-        if self.is_split:
-            casino_data['split_hands_completed'] += 1
-            if casino_data['split_hands_completed'] < 2:
-                embed = discord.Embed(
-                    title="🧩 Split Hand - Second Hand",
-                    description=f"**{outcome_text}** (Hand 1)\n\n**Playing second hand of split**\n**Hand Bet:** ₹{self.bet_amount:,}",
-                    color=0x00aaff
-                )
-                embed.add_field(name="💰 Current Balance", value=f"₹{casino_data['balance']:,}", inline=True)
-                embed.set_footer(text="♠️ BlackJack Casino | Split Hand 2/2")
+        if self.split_hand == 1:
+            embed = discord.Embed(
+                title="🧩 Split Hand - Second Hand",
+                description=f"**{outcome_text}** (Hand 1)\n\n**Playing second hand of split**\n**Hand Bet:** ₹{self.bet_amount:,}",
+                color=0x00aaff
+            )
+            embed.add_field(name="💰 Current Balance", value=f"₹{session.balance:,}", inline=True)
+            embed.set_footer(text="♠️ BlackJack Casino | Split Hand 2/2")
 
-                view = GameView(self.bet_amount, self.side_bets, is_split=True)
-                await interaction.response.edit_message(embed=embed, view=view)
-                return
+            view = GameView(self.owner_id, self.bet_amount, self.side_bets, split_hand=2)
+            await renderer.edit(interaction, embed=embed, view=view)
+            return
 
         description = f"**{outcome_text}**\n\n**Bet Amount:** ₹{amount:,}\n**Balance Change:** {balance_change}"
 
@@ -696,29 +1018,97 @@ class GameView(discord.ui.View):
             description += f"\n\n**Double Down** - Bet was doubled"
 
         # Create return view
-        view = CasinoView()
-        view.play_game.disabled = False
-        view.skip_game.disabled = False
-        view.end_session.disabled = False
-        view.cash_out.disabled = False
+        view = CasinoView(session_active=True)
 
-        embed = discord.Embed(
+        embed = session_status_embed(
+            session,
             title="🎰 BlackJack Casino - Game Recorded!",
             description=description,
-            color=color
+            color=color,
+            balance_label="💰 New Balance",
+            footer="♠️ BlackJack Casino | Choose your next action"
         )
-        embed.add_field(name="💰 New Balance", value=f"₹{casino_data['balance']:,}", inline=True)
-        embed.add_field(name="🎮 Session Games", value=f"{len(casino_data['session_games'])}", inline=True)
-        embed.add_field(name="⏱️ Session Duration", value=f"{get_session_duration()}", inline=True)
 
-        wins = sum(1 for g in casino_data['session_games'] if g['outcome'] == 'win')
-        losses = sum(1 for g in casino_data['session_games'] if g['outcome'] == 'lose')
-        ties = sum(1 for g in casino_data['session_games'] if g['outcome'] == 'tie')
-        blackjacks = sum(1 for g in casino_data['session_games'] if g['outcome'] == 'blackjack')
+        stats = session.session_stats
+        embed.add_field(name="📊 Session Stats", value=f"W: {stats.wins} | L: {stats.losses} | T: {stats.ties} | BJ: {stats.blackjacks}", inline=False)
+        await renderer.edit(interaction, embed=embed, view=view)
+
+class GameButton(discord.ui.DynamicItem[discord.ui.Button], template=GAME_TEMPLATE):
+    """A GameView button whose custom_id carries the whole table state.
+
+    Registered once with bot.add_dynamic_items, so a click on a table sent before a
+    restart rebuilds its GameView from the custom_id alone. Nothing is stored or
+    re-registered per open table.
+    """
+
+    def __init__(self, table, action, label, style):
+        custom_id = encode_game_state(action, table.owner_id, table.bet_amount, table.side_bets, table.split_hand, table.is_double)
+        super().__init__(discord.ui.Button(label=label, style=style, custom_id=custom_id))
+        self.table = table
+        self.action = action
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        action, state = decode_game_state(match)
+        table = GameView(**state)
+        # A button the table no longer shows, e.g. 💡 ADVICE sent before advice was disabled, is answered in callback
+        return table.buttons.get(action) or cls(table, action, item.label, item.style)
+
+    async def interaction_check(self, interaction):
+        if interaction.user.id != self.table.owner_id:
+            await interaction.response.send_message("❌ This is another player's table! Use `&casino` to open your own.", ephemeral=True)
+            return False
+        return True
+
+    async def callback(self, interaction):
+        if self.action not in self.table.buttons:
+            message = "💡 Strategy advice is unavailable right now." if self.action == "advice" else "❌ That button is no longer available."
+            await interaction.response.send_message(message, ephemeral=True)
+            return
+        await getattr(self.table, f"game_{self.action}")(interaction, self)
+
+class AdviceModal(discord.ui.Modal):
+    def __init__(self):
+        super().__init__(title="💡 Basic Strategy Advice")
+        self.cards_input = discord.ui.TextInput(label="Your cards", placeholder="e.g., A 7 or 10 6", required=True, max_length=30)
+        self.dealer_input = discord.ui.TextInput(label="Dealer upcard", placeholder="e.g., 9", required=True, max_length=2)
+        self.add_item(self.cards_input)
+        self.add_item(self.dealer_input)
 
-        embed.add_field(name="📊 Session Stats", value=f"W: {wins} | L: {losses} | T: {ties} | BJ: {blackjacks}", inline=False)
-        embed.set_footer(text="♠️ BlackJack Casino | Choose your next action")
-        await interaction.response.edit_message(embed=embed, view=view)
+    @timed_interaction("AdviceModal")
+    async def on_submit(self, interaction: discord.Interaction):
+        if strategy_advisor is None:
+            await interaction.response.send_message("⏳ Strategy tables are still being built, try again in a moment.", ephemeral=True)
+            return
+        try:
+            cards = parse_cards(self.cards_input.value)
+            upcards = parse_cards(self.dealer_input.value)
+        except KeyError:
+            await interaction.response.send_message("❌ Unknown card! Use A, 2-10, J, Q or K.", ephemeral=True)
+            return
+        if len(cards) < 2 or len(upcards) != 1:
+            await interaction.response.send_message("❌ Enter at least two cards for your hand and one dealer card!", ephemeral=True)
+            return
+
+        action, evs = strategy_advisor.advise(cards, upcards[0])
+        hand = " ".join(CARD_LABELS[card] for card in cards)
+        if action is None:
+            await interaction.response.send_message(f"💥 {hand} is already bust!", ephemeral=True)
+            return
+
+        embed = discord.Embed(
+            title=f"💡 {ACTION_NAMES[action]}",
+            description=f"**Your hand:** {hand}\n**Dealer shows:** {CARD_LABELS[upcards[0]]}",
+            color=0xffd700
+        )
+        embed.add_field(
+            name="📊 Expected Value per ₹100",
+            value="\n".join(f"{'**' if name == action else ''}{ACTION_NAMES[name]}: ₹{ev * 100:+.1f}{'**' if name == action else ''}"
+                            for name, ev in sorted(evs.items(), key=lambda item: -item[1])),
+            inline=False
+        )
+        embed.set_footer(text=f"♠️ Basic strategy | {strategy_advisor.rules}")
+        await interaction.response.send_message(embed=embed, ephemeral=True)
 
 class CashOutModal(discord.ui.Modal):
     def __init__(self):
@@ -726,37 +1116,37 @@ class CashOutModal(discord.ui.Modal):
         self.amount_input = discord.ui.TextInput(label="Enter amount to cash out", placeholder="e.g., 500", required=True, max_length=10)
         self.add_item(self.amount_input)
 
+    @timed_interaction("CashOutModal")
+    @interaction_guard.once
     async def on_submit(self, interaction: discord.Interaction):
-        try:
-            amount = int(self.amount_input.value.replace('₹', '').replace(',', ''))
-            if amount <= 0:
-                await interaction.response.send_message("❌ Amount must be a positive number!", ephemeral=True)
-                return
-            if amount > casino_data["balance"]:
-                await interaction.response.send_message("❌ Amount cannot be greater than current balance!", ephemeral=True)
-                return
-            casino_data["balance"] -= amount
-
-            game_data = {"outcome": "cashout", "amount": amount, "timestamp": datetime.now().isoformat()}
-            casino_data["session_games"].append(game_data)
-            casino_data["games"].append(game_data)
-
-            view = CasinoView()
-            view.play_game.disabled = False
-            view.skip_game.disabled = False
-            view.end_session.disabled = False
-            view.cash_out.disabled = False
+        session = sessions.for_interaction(interaction)
+        async with session.lock:
+            try:
+                amount = int(self.amount_input.value.replace('₹', '').replace(',', ''))
+                if amount <= 0:
+                    await interaction.response.send_message("❌ Amount must be a positive number!", ephemeral=True)
+                    return
+                if amount > session.balance:
+                    await interaction.response.send_message("❌ Amount cannot be greater than current balance!", ephemeral=True)
+                    return
+                session.balance -= amount
+
+                game = GameRecord("cashout", amount)
+                session.add_game(game)
+                journal_event(session, "game", game=game.to_row())
+
+                view = CasinoView(session_active=True)
 
-            embed = discord.Embed(
-                title="💵 Cash Out Successful!",
-                description=f"**Cashed out: ₹{amount:,}**\n\nAmount has been added to your main balance.",
-                color=0x00ff00
-            )
-            embed.add_field(name="💰 New Balance", value=f"₹{casino_data['balance']:,}", inline=True)
-            embed.set_footer(text="♠️ BlackJack Casino")
-            await interaction.response.edit_message(embed=embed, view=view)
-        except ValueError:
-            await interaction.response.send_message("❌ Please enter a valid number for the amount!", ephemeral=True)
+                embed = discord.Embed(
+                    title="💵 Cash Out Successful!",
+                    description=f"**Cashed out: ₹{amount:,}**\n\nAmount has been added to your main balance.",
+                    color=0x00ff00
+                )
+                embed.add_field(name="💰 New Balance", value=f"₹{session.balance:,}", inline=True)
+                embed.set_footer(text="♠️ BlackJack Casino")
+                await renderer.edit(interaction, embed=embed, view=view)
+            except ValueError:
+                await interaction.response.send_message("❌ Please enter a valid number for the amount!", ephemeral=True)
 
 class GameCashOutModal(discord.ui.Modal):
     def __init__(self, bet_amount):
@@ -770,45 +1160,41 @@ class GameCashOutModal(discord.ui.Modal):
         )
         self.add_item(self.amount_input)
 
+    @timed_interaction("GameCashOutModal")
+    @interaction_guard.once
     async def on_submit(self, interaction: discord.Interaction):
-        try:
-            cashout_amount = int(self.amount_input.value.replace('₹', '').replace(',', ''))
-            if cashout_amount <= 0:
-                await interaction.response.send_message("❌ Amount must be a positive number!", ephemeral=True)
-                return
-            if cashout_amount > self.bet_amount:
-                await interaction.response.send_message(f"❌ Cannot cash out more than bet amount (₹{self.bet_amount:,})!", ephemeral=True)
-                return
+        session = sessions.for_interaction(interaction)
+        async with session.lock:
+            try:
+                if not await require_active_session(interaction, session):
+                    return
+                cashout_amount = int(self.amount_input.value.replace('₹', '').replace(',', ''))
+                if cashout_amount <= 0:
+                    await interaction.response.send_message("❌ Amount must be a positive number!", ephemeral=True)
+                    return
+                if cashout_amount > self.bet_amount:
+                    await interaction.response.send_message(f"❌ Cannot cash out more than bet amount (₹{self.bet_amount:,})!", ephemeral=True)
+                    return
+
+                session.balance += cashout_amount
+                remaining_amount = self.bet_amount - cashout_amount
+
+                game = GameRecord.partial_cashout(self.bet_amount, cashout_amount)
+                session.add_game(game)
+                journal_event(session, "game", game=game.to_row())
+
+                view = CasinoView(session_active=True)
 
-            casino_data["balance"] += cashout_amount
-            remaining_amount = self.bet_amount - cashout_amount
-
-            game_data = {
-                "outcome": "cashout", 
-                "amount": self.bet_amount,
-                "refund_amount": cashout_amount,
-                "lost_amount": remaining_amount,
-                "timestamp": datetime.now().isoformat()
-            }
-            casino_data["session_games"].append(game_data)
-            casino_data["games"].append(game_data)
-
-            view = CasinoView()
-            view.play_game.disabled = False
-            view.skip_game.disabled = False
-            view.end_session.disabled = False
-            view.cash_out.disabled = False
-
-            embed = discord.Embed(
-                title="💵 Partial Cash Out!",
-                description=f"**Cashed out: ₹{cashout_amount:,}**\n**Lost from bet: ₹{remaining_amount:,}**\n\nCashed amount added to balance.",
-                color=0x00aa00
-            )
-            embed.add_field(name="💰 New Balance", value=f"₹{casino_data['balance']:,}", inline=True)
-            embed.set_footer(text="♠️ BlackJack Casino")
-            await interaction.response.edit_message(embed=embed, view=view)
-        except ValueError:
-            await interaction.response.send_message("❌ Please enter a valid number for the amount!", ephemeral=True)
+                embed = discord.Embed(
+                    title="💵 Partial Cash Out!",
+                    description=f"**Cashed out: ₹{cashout_amount:,}**\n**Lost from bet: ₹{remaining_amount:,}**\n\nCashed amount added to balance.",
+                    color=0x00aa00
+                )
+                embed.add_field(name="💰 New Balance", value=f"₹{session.balance:,}", inline=True)
+                embed.set_footer(text="♠️ BlackJack Casino")
+                await renderer.edit(interaction, embed=embed, view=view)
+            except ValueError:
+                await interaction.response.send_message("❌ Please enter a valid number for the amount!", ephemeral=True)
 
 class BalanceModal(discord.ui.Modal):
     def __init__(self, action="start"):
@@ -816,36 +1202,34 @@ class BalanceModal(discord.ui.Modal):
         self.balance_input = discord.ui.TextInput(label="Enter Starting Balance", placeholder="e.g., 1000", required=True, max_length=10)
         self.add_item(self.balance_input)
 
+    @timed_interaction("BalanceModal")
+    @interaction_guard.once
     async def on_submit(self, interaction: discord.Interaction):
-        try:
-            balance = int(self.balance_input.value.replace('$', '').replace(',', ''))
-            if balance <= 0:
-                await interaction.response.send_message("❌ Balance must be a positive number!", ephemeral=True)
-                return
-            casino_data.update({
-                "balance": balance,
-                "starting_balance": balance,
-                "session_active": True,
-                "session_start": datetime.now(),
-                "session_games": []
-            })
-            view = CasinoView()
-            view.play_game.disabled = False
-            view.skip_game.disabled = False
-            view.end_session.disabled = False
-            view.cash_out.disabled = False
-            embed = discord.Embed(
-                title="🎰 BlackJack Casino - Session Started!", 
-                description="**🎲 Your casino session is now active!**\n\n**Options:**\n🎲 **Play**\n⏸️ **Skip**\n🛑 **End Session**", 
-                color=0x00ff00
-            )
-            embed.add_field(name="💰 Starting Balance", value=f"₹{balance:,}", inline=True)
-            embed.add_field(name="🎮 Games Played", value="0", inline=True)
-            embed.add_field(name="⏱️ Session Started", value="Just now", inline=True)
-            embed.set_footer(text="♠️ BlackJack Casino | Good luck!")
-            await interaction.response.edit_message(embed=embed, view=view)
-        except ValueError:
-            await interaction.response.send_message("❌ Please enter a valid number for the balance!", ephemeral=True)
+        session = sessions.for_interaction(interaction)
+        async with session.lock:
+            try:
+                balance = int(self.balance_input.value.replace('$', '').replace(',', ''))
+                if balance <= 0:
+                    await interaction.response.send_message("❌ Balance must be a positive number!", ephemeral=True)
+                    return
+                if session.session_active:
+                    await interaction.response.send_message("❌ A session is already active! End the current session first.", ephemeral=True)
+                    return
+                session.start(balance)
+                journal_event(session, "start", ts=session.session_start.timestamp())
+                view = CasinoView(session_active=True)
+                embed = discord.Embed(
+                    title="🎰 BlackJack Casino - Session Started!", 
+                    description="**🎲 Your casino session is now active!**\n\n**Options:**\n🎲 **Play**\n⏸️ **Skip**\n🛑 **End Session**", 
+                    color=0x00ff00
+                )
+                embed.add_field(name="💰 Starting Balance", value=f"₹{balance:,}", inline=True)
+                embed.add_field(name="🎮 Games Played", value="0", inline=True)
+                embed.add_field(name="⏱️ Session Started", value="Just now", inline=True)
+                embed.set_footer(text="♠️ BlackJack Casino | Good luck!")
+                await renderer.edit(interaction, embed=embed, view=view)
+            except ValueError:
+                await interaction.response.send_message("❌ Please enter a valid number for the balance!", ephemeral=True)
 
 class BetAmountModal(discord.ui.Modal):
     def __init__(self):
@@ -860,64 +1244,69 @@ class BetAmountModal(discord.ui.Modal):
         self.add_item(self.twentyone_plus_three_input)
         self.add_item(self.dealer_bust_input)
 
+    @timed_interaction("BetAmountModal")
+    @interaction_guard.once
     async def on_submit(self, interaction: discord.Interaction):
-        try:
-            main_amount = int(self.amount_input.value.replace('₹', '').replace(',', ''))
-            if main_amount <= 0:
-                await interaction.response.send_message("❌ Main bet amount must be a positive number!", ephemeral=True)
-                return
-
-            # Parse side bets
-            side_bets = {}
-            total_side_bet = 0
-
-            if self.perfect_pair_input.value:
-                pp_amount = int(self.perfect_pair_input.value.replace('₹', '').replace(',', ''))
-                if pp_amount > 0:
-                    side_bets["Perfect Pair"] = pp_amount
-                    total_side_bet += pp_amount
-
-            if self.twentyone_plus_three_input.value:
-                tpt_amount = int(self.twentyone_plus_three_input.value.replace('₹', '').replace(',', ''))
-                if tpt_amount > 0:
-                    side_bets["21 + 3"] = tpt_amount
-                    total_side_bet += tpt_amount
-
-            if self.dealer_bust_input.value:
-                db_amount = int(self.dealer_bust_input.value.replace('₹', '').replace(',', ''))
-                if db_amount > 0:
-                    side_bets["Dealer Bust"] = db_amount
-                    total_side_bet += db_amount
-
-            total_bet = main_amount + total_side_bet
-            if total_bet > casino_data["balance"]:
-                await interaction.response.send_message(f"❌ Insufficient balance! Total bet: ₹{total_bet:,}, Balance: ₹{casino_data['balance']:,}", ephemeral=True)
-                return
-
-            # Deduct bet amount from balance when bet is placed
-            casino_data["balance"] -= main_amount
-
-            view = GameView(bet_amount=main_amount, side_bets=side_bets)
-
-            description = f"**Choose your game outcome:**\n\n🟢 **WIN** - You won this round!\n🔴 **LOSE** - You lost this round!\n🟡 **TIE** - Push/Draw (no money change)\n🂡 **BLACKJACK** - Natural 21 (1.5x payout)\n💵 **CASH OUT** - Partial cash out from bet\n\n💰 **Main Bet:** ₹{main_amount:,}"
+        session = sessions.for_interaction(interaction)
+        async with session.lock:
+            try:
+                main_amount = int(self.amount_input.value.replace('₹', '').replace(',', ''))
+                if main_amount <= 0:
+                    await interaction.response.send_message("❌ Main bet amount must be a positive number!", ephemeral=True)
+                    return
+
+                # Parse side bets
+                side_bets = {}
+                total_side_bet = 0
+
+                if self.perfect_pair_input.value:
+                    pp_amount = int(self.perfect_pair_input.value.replace('₹', '').replace(',', ''))
+                    if pp_amount > 0:
+                        side_bets["Perfect Pair"] = pp_amount
+                        total_side_bet += pp_amount
+
+                if self.twentyone_plus_three_input.value:
+                    tpt_amount = int(self.twentyone_plus_three_input.value.replace('₹', '').replace(',', ''))
+                    if tpt_amount > 0:
+                        side_bets["21 + 3"] = tpt_amount
+                        total_side_bet += tpt_amount
+
+                if self.dealer_bust_input.value:
+                    db_amount = int(self.dealer_bust_input.value.replace('₹', '').replace(',', ''))
+                    if db_amount > 0:
+                        side_bets["Dealer Bust"] = db_amount
+                        total_side_bet += db_amount
+
+                total_bet = main_amount + total_side_bet
+                if total_bet > session.balance:
+                    await interaction.response.send_message(f"❌ Insufficient balance! Total bet: ₹{total_bet:,}, Balance: ₹{session.balance:,}", ephemeral=True)
+                    return
+
+                # Deduct bet amount from balance when bet is placed
+                session.balance -= main_amount
+                journal_event(session, "bet")
+
+                view = GameView(interaction.user.id, bet_amount=main_amount, side_bets=side_bets)
+
+                description = f"**Choose your game outcome:**\n\n🟢 **WIN** - You won this round!\n🔴 **LOSE** - You lost this round!\n🟡 **TIE** - Push/Draw (no money change)\n🂡 **BLACKJACK** - Natural 21 (1.5x payout)\n💵 **CASH OUT** - Partial cash out from bet\n\n💰 **Main Bet:** ₹{main_amount:,}"
+
+                if side_bets:
+                    description += "\n\n**Side Bets:**"
+                    for bet_type, bet_amount in side_bets.items():
+                        description += f"\n• {bet_type}: ₹{bet_amount:,}"
+                    description += f"\n\n**Total Wagered:** ₹{total_bet:,}"
 
-            if side_bets:
-                description += "\n\n**Side Bets:**"
-                for bet_type, bet_amount in side_bets.items():
-                    description += f"\n• {bet_type}: ₹{bet_amount:,}"
-                description += f"\n\n**Total Wagered:** ₹{total_bet:,}"
-
-            embed = discord.Embed(
-                title="🎲 BlackJack Game",
-                description=description,
-                color=0xffd700
-            )
-            embed.add_field(name="💰 Current Balance", value=f"₹{casino_data['balance']:,}", inline=True)
-            embed.add_field(name="🎮 Session Games", value=f"{len(casino_data['session_games'])}", inline=True)
-            embed.set_footer(text="♠️ BlackJack Casino | Choose your outcome")
-            await interaction.response.edit_message(embed=embed, view=view)
-        except ValueError:
-            await interaction.response.send_message("❌ Please enter valid numbers for bet amounts!", ephemeral=True)
+                embed = discord.Embed(
+                    title="🎲 BlackJack Game",
+                    description=description,
+                    color=0xffd700
+                )
+                embed.add_field(name="💰 Current Balance", value=f"₹{session.balance:,}", inline=True)
+                embed.add_field(name="🎮 Session Games", value=f"{len(session.session_games)}", inline=True)
+                embed.set_footer(text="♠️ BlackJack Casino | Choose your outcome")
+                await renderer.edit(interaction, embed=embed, view=view)
+            except ValueError:
+                await interaction.response.send_message("❌ Please enter valid numbers for bet amounts!", ephemeral=True)
 
 # =================================================================================================
 # CASINO COMMANDS
@@ -932,22 +1321,17 @@ async def casino_command(ctx):
     except discord.Forbidden: 
         pass
 
-    await log_command(ctx, "&casino", "Opened casino interface")
+    log_command(ctx, "&casino", "Opened casino interface")
 
-    view = CasinoView()
-    if casino_data["session_active"]:
-        view.play_game.disabled = False
-        view.skip_game.disabled = False
-        view.end_session.disabled = False
-        view.cash_out.disabled = False
-        embed = discord.Embed(
-            title="🎰 BlackJack Casino - Session Active", 
-            description="**🎲 Welcome back to your active session!**", 
-            color=0x00ff00
+    session = sessions.for_member(ctx.guild, ctx.author)
+    view = CasinoView(session_active=session.session_active)
+    if session.session_active:
+        embed = session_status_embed(
+            session,
+            title="🎰 BlackJack Casino - Session Active",
+            description="**🎲 Welcome back to your active session!**",
+            footer="♠️ BlackJack Casino | Professional Statistics Tracker"
         )
-        embed.add_field(name="💰 Current Balance", value=f"₹{casino_data['balance']:,}", inline=True)
-        embed.add_field(name="🎮 Session Games", value=f"{len(casino_data['session_games'])}", inline=True)
-        embed.add_field(name="⏱️ Session Duration", value=f"{get_session_duration()} minutes", inline=True)
     else:
         embed = discord.Embed(
             title="🎰 BlackJack Casino", 
@@ -959,28 +1343,30 @@ async def casino_command(ctx):
             value="1️⃣ Start a session with your balance\n2️⃣ Record each game as WIN or LOSE\n3️⃣ Enter bet amounts for tracking\n4️⃣ View detailed statistics & charts", 
             inline=False
         )
+        embed.set_footer(text="♠️ BlackJack Casino | Professional Statistics Tracker")
 
-    embed.set_footer(text="♠️ BlackJack Casino | Professional Statistics Tracker")
-    await ctx.send(embed=embed, view=view)
+    message = await ctx.send(embed=embed, view=view)
+    renderer.remember(message.id, embed, view)
 
 @bot.command(name='balance')
 @has_moderator_role()
 async def balance_command(ctx, member: discord.Member = None):
     """Check current casino balance."""
+    session = sessions.for_member(ctx.guild, member or ctx.author)
     if member:
         embed = discord.Embed(
             title="💰 Casino Balance Check",
-            description=f"**{member.display_name}'s Balance:** ₹{casino_data['balance']:,}",
+            description=f"**{member.display_name}'s Balance:** ₹{session.balance:,}",
             color=0xffd700
         )
-        await log_command(ctx, "&balance", f"Checked {member.mention}'s balance: ₹{casino_data['balance']:,}")
+        log_command(ctx, "&balance", f"Checked {member.mention}'s balance: ₹{session.balance:,}")
     else:
         embed = discord.Embed(
             title="💰 Casino Balance",
-            description=f"**Current Balance:** ₹{casino_data['balance']:,}",
+            description=f"**Current Balance:** ₹{session.balance:,}",
             color=0xffd700
         )
-        await log_command(ctx, "&balance", f"Checked own balance: ₹{casino_data['balance']:,}")
+        log_command(ctx, "&balance", f"Checked own balance: ₹{session.balance:,}")
     await ctx.send(embed=embed)
 
 @bot.command(name='resetbalance')
@@ -993,8 +1379,11 @@ async def reset_balance_command(ctx, member: discord.Member, amount: int):
             await ctx.send("❌ Balance amount must be positive!", delete_after=5)
             return
 
-        old_balance = casino_data['balance']
-        casino_data['balance'] = amount
+        session = sessions.for_member(ctx.guild, member)
+        async with session.lock:
+            old_balance = session.balance
+            session.balance = amount
+            journal_event(session, "reset")
 
         embed = discord.Embed(
             title="💰 Balance Reset",
@@ -1002,10 +1391,233 @@ async def reset_balance_command(ctx, member: discord.Member, amount: int):
             color=0x00ff00
         )
         await ctx.send(embed=embed, delete_after=10)
-        await log_command(ctx, "&resetbalance", f"Reset {member.mention}'s balance from ₹{old_balance:,} to ₹{amount:,}")
+        log_command(ctx, "&resetbalance", f"Reset {member.mention}'s balance from ₹{old_balance:,} to ₹{amount:,}")
     except discord.Forbidden:
         await ctx.send("❌ I don't have permission to delete messages.")
 
+@bot.command(name='stats')
+@has_moderator_role()
+async def stats_command(ctx, member: typing.Optional[discord.Member] = None, *, window: str = "all"):
+    """Show a player's recorded games over a time window."""
+    try:
+        start_ts, end_ts, label = parse_stats_window(window)
+    except (ValueError, OverflowError):
+        await ctx.send("❌ Unknown window! Use `all`, `hour`, `day`, `week`, `month`, a duration like `12h`/`3d`, or dates like `2025-08-01..2025-08-15`.")
+        return
+
+    member = member or ctx.author
+    session = sessions.for_member(ctx.guild, member)
+    stats = session.games.window_stats(start_ts, end_ts)
+
+    embed = discord.Embed(
+        title=f"📊 Casino Stats - {member.display_name}",
+        description=f"**Window:** {label}",
+        color=0xffd700
+    )
+    if stats["games"]:
+        games = stats["games"]
+        win_rate = stats["wins"] / games * 100
+        embed.add_field(name="🎮 Games", value=f"{games:,}", inline=True)
+        embed.add_field(name="📈 Win Rate", value=f"{win_rate:.1f}%", inline=True)
+        embed.add_field(name="💰 Net Profit", value=f"₹{stats['net']:+,}", inline=True)
+        embed.add_field(
+            name="🏆 Results",
+            value=f"W: {stats['wins']:,} | L: {stats['losses']:,} | T: {stats['ties']:,} | BJ: {stats['blackjacks']:,} | Cash Outs: {stats['cashouts']:,}",
+            inline=False
+        )
+        embed.add_field(name="💵 Total Wagered", value=f"₹{stats['wagered']:,}", inline=True)
+        embed.add_field(name="🎯 Avg Bet", value=f"₹{stats['wagered'] / games:,.0f}", inline=True)
+        embed.add_field(name="🎲 Side Bet Winnings", value=f"₹{stats['side_winnings']:,}", inline=True)
+        embed.add_field(name="⏱️ Span", value=f"<t:{stats['first_ts']}:f> → <t:{stats['last_ts']}:f>", inline=False)
+    else:
+        embed.add_field(name="No games", value="No games were recorded in this window.", inline=False)
+    if session.games.base:
+        embed.set_footer(text=f"♠️ Only the latest {len(session.games):,} hands are kept")
+    else:
+        embed.set_footer(text="♠️ BlackJack Casino | Professional Statistics Tracker")
+    await ctx.send(embed=embed)
+    log_command(ctx, "&stats", f"Viewed {member.mention}'s stats for {label}")
+
+@bot.command(name='export')
+@has_moderator_role()
+async def export_command(ctx, member: typing.Optional[discord.Member] = None, fmt: str = "csv"):
+    """Export a player's game history as gzipped CSV or columnar JSON Lines."""
+    fmt = fmt.lower()
+    if fmt not in ("csv", "columns"):
+        await ctx.send("❌ Unknown format! Use `csv` or `columns`.")
+        return
+
+    member = member or ctx.author
+    history = sessions.for_member(ctx.guild, member).games
+    if not len(history):
+        await ctx.send(f"❌ {member.display_name} has no recorded games to export.")
+        return
+
+    max_bytes = EXPORT_CONFIG["max_attachment_bytes"]
+    if ctx.guild:
+        max_bytes = min(max_bytes, ctx.guild.filesize_limit)
+    extension = "csv.gz" if fmt == "csv" else "jsonl.gz"
+    total_games = len(history)
+
+    # Chunks are copied here on the event loop, which is the only writer of the history, so
+    # none can be misaligned; formatting and gzip run in a thread, one part held at a time
+    writer = GzipParts(fmt, max_bytes)
+    sent = 0
+
+    async def upload(part):
+        nonlocal sent
+        sent += 1
+        await outbound.send(
+            Priority.UPLOAD, f"channel:{ctx.channel.id}", ctx.send,
+            file=discord.File(io.BytesIO(part), filename=f"casino_{member.id}_part{sent}.{extension}")
+        )
+
+    for first, columns in iter_columns(history, EXPORT_CONFIG["chunk_games"]):
+        for part in await asyncio.to_thread(writer.add, first, columns):
+            await upload(part)
+    for part in writer.close():
+        await upload(part)
+
+    await ctx.send(f"📦 Exported {total_games:,} games for {member.display_name} in {sent} part{'s' if sent != 1 else ''} ({fmt}).")
+    log_command(ctx, "&export", f"Exported {total_games:,} games for {member.mention} as {fmt} in {sent} parts")
+
+def format_leaderboard_score(metric, score):
+    if metric == "profit":
+        return f"₹{score:+,}"
+    if metric == "winrate":
+        return f"{score:.1f}%"
+    return f"{score:,}"
+
+def leaderboard_embed(guild_id, metric):
+    """The rendered top-K board, rebuilt only after a change that reaches the top K."""
+    embed = leaderboards.cached(guild_id, metric)
+    if embed is not None:
+        return embed
+
+    title = LEADERBOARD_METRICS[metric][0]
+    embed = discord.Embed(title=f"🏆 Leaderboard - {title}", color=0xffd700)
+    medals = ("🥇", "🥈", "🥉")
+    lines = [
+        f"{medals[rank] if rank < len(medals) else f'**{rank + 1}.**'} <@{user_id}> — {format_leaderboard_score(metric, score)}"
+        for rank, (user_id, score, _) in enumerate(leaderboards.top(guild_id, metric))
+    ]
+    embed.description = "\n".join(lines) if lines else "No ranked players yet."
+    if metric == "winrate":
+        embed.set_footer(text=f"♠️ Players need {leaderboards.min_games_for_win_rate} games to be ranked")
+    else:
+        embed.set_footer(text="♠️ BlackJack Casino | Professional Statistics Tracker")
+    leaderboards.cache(guild_id, metric, embed)
+    return embed
+
+@bot.command(name='leaderboard', aliases=['lb'])
+@has_moderator_role()
+async def leaderboard_command(ctx, metric: str = "profit"):
+    """Show the guild's top players by net profit, win rate, blackjacks or longest win streak."""
+    metric = metric.lower()
+    if metric not in LEADERBOARD_METRICS:
+        await ctx.send(f"❌ Unknown leaderboard! Use {', '.join(f'`{name}`' for name in LEADERBOARD_METRICS)}.")
+        return
+
+    guild_id = ctx.guild.id if ctx.guild else None
+    rank = leaderboards.rank(guild_id, ctx.author.id, metric)
+    content = f"Your rank: **#{rank:,}**" if rank else None
+    await ctx.send(content=content, embed=leaderboard_embed(guild_id, metric))
+    log_command(ctx, "&leaderboard", f"Viewed the {metric} leaderboard")
+
+@bot.command(name='simulate', aliases=['sim'])
+@has_moderator_role()
+async def simulate_command(ctx, member: typing.Optional[discord.Member] = None, bet: typing.Optional[int] = None, hands: int = None):
+    """Simulate future sessions from a player's recorded games: risk of ruin, balance bands and drawdowns."""
+    member = member or ctx.author
+    hands = hands or SIMULATION_CONFIG["default_hands"]
+    if not 1 <= hands <= SIMULATION_CONFIG["max_hands"]:
+        await ctx.send(f"❌ Hands must be between 1 and {SIMULATION_CONFIG['max_hands']:,}!")
+        return
+    if bet is not None and bet <= 0:
+        await ctx.send("❌ Bet must be a positive amount!")
+        return
+
+    session = sessions.for_member(ctx.guild, member)
+    model = player_model(session.games)
+    # Full cash-outs are withdrawals, not bets, so only the staked games count
+    if model["games"] < max(1, SIMULATION_CONFIG["min_games"]):
+        await ctx.send(f"❌ {member.display_name} needs at least {SIMULATION_CONFIG['min_games']} recorded bets to simulate.")
+        return
+    balance = session.balance
+    if balance <= 0:
+        await ctx.send(f"❌ {member.display_name} has no balance to simulate with.")
+        return
+
+    sims = SIMULATION_CONFIG["sims"]
+    key = SimulationCache.key(model, balance, bet, hands, sims)
+    result = sim_cache.get(key)
+    if result is None:
+        try:
+            # Seeded from the inputs, so the same question always gets the same answer
+            result = await sim_pool.run(simulate, model, balance, bet, hands, sims, int(key[:16], 16))
+        except PoolSaturated:
+            await ctx.send("⏳ The simulator is busy, try again in a moment.")
+            return
+        except asyncio.TimeoutError:
+            await ctx.send(f"⚠️ The simulation took longer than {SIMULATION_CONFIG['timeout']}s and was abandoned.")
+            return
+        except ValueError as e:
+            print(f"❌ Error simulating for {member}: {e}")
+            await ctx.send(f"❌ Couldn't simulate {member.display_name}'s games: {e}")
+            return
+        sim_cache.put(key, result)
+
+    bet_label = f"₹{bet:,} per hand" if bet else "their usual bets"
+    embed = discord.Embed(
+        title=f"🎲 Bankroll Simulation - {member.display_name}",
+        description=f"**{result['sims']:,}** sessions of **{result['hands']:,}** hands from ₹{balance:,}, betting {bet_label}",
+        color=0xffd700
+    )
+    ruin = f"{result['risk_of_ruin'] * 100:.2f}%"
+    if result["median_hands_to_ruin"] is not None:
+        ruin += f"\nMedian bust after {result['median_hands_to_ruin']:,.0f} hands"
+    embed.add_field(name="💀 Risk of Ruin", value=ruin, inline=True)
+    embed.add_field(name="📈 Expected Balance", value=f"₹{result['mean_final']:,.0f}\n(₹{result['expected_per_hand']:+,.2f} per hand)", inline=True)
+    finals = result["final_percentiles"]
+    embed.add_field(
+        name="📊 Final Balance Bands",
+        value="\n".join(f"**p{p}:** ₹{value:,.0f}" for p, value in finals.items()),
+        inline=True
+    )
+    drawdowns = result["drawdown_percentiles"]
+    shares = result["drawdown_share_percentiles"]
+    embed.add_field(
+        name="📉 Max Drawdown",
+        value=" | ".join(f"**p{p}:** ₹{value:,.0f} ({shares[p] * 100:.0f}% of peak)" for p, value in drawdowns.items()),
+        inline=False
+    )
+    embed.set_footer(text=f"♠️ Based on {model['games']:,} recorded bets | simulated in {result['seconds']:.2f}s")
+    await ctx.send(embed=embed)
+    log_command(ctx, "&simulate", f"Simulated {hands:,} hands for {member.mention} betting {bet_label}: {ruin.splitlines()[0]} risk of ruin")
+
+@bot.command(name='latency')
+@has_moderator_role()
+async def latency_command(ctx):
+    """Show interaction handler latency percentiles and deadline misses."""
+    rows = latency_summary()
+    embed = discord.Embed(
+        title="⏱️ Interaction Latency",
+        description=f"Handler time since startup, slowest p95 first. Deadline: {INTERACTION_DEADLINE:.0f}s",
+        color=0xffd700
+    )
+    for row in rows[:25]:
+        embed.add_field(
+            name=f"`{row['handler']}`",
+            value=f"**n:** {row['count']:,} | **p50:** {row['p50'] * 1000:.0f}ms | **p95:** {row['p95'] * 1000:.0f}ms | **p99:** {row['p99'] * 1000:.0f}ms\n"
+                  f"**Deadline misses:** {row['misses']:,} | **Errors:** {row['errors']:,}",
+            inline=False
+        )
+    if not rows:
+        embed.add_field(name="No data", value="No interactions have been handled yet.", inline=False)
+    embed.set_footer(text="♠️ ʟᴏʟᴇᴛᴛᴀɴ Metrics")
+    await ctx.send(embed=embed)
+    log_command(ctx, "&latency", f"Viewed latency for {len(rows)} handlers")
+
 @bot.command(name='help')
 async def help_command(ctx):
     """Display help information for casino commands."""
@@ -1023,13 +1635,13 @@ async def help_command(ctx):
 
     embed.add_field(
         name="🎰 Casino Commands",
-        value="• **&casino** - Open casino interface\n• **&balance [@user]** - Check casino balance\n• **&resetbalance @user [amount]** - Reset balance\n• **Interactive Sessions** - Win/loss tracking with statistics",
+        value="• **&casino** - Open casino interface\n• **&balance [@user]** - Check casino balance\n• **&resetbalance @user [amount]** - Reset balance\n• **&stats [@user] [window]** - Stats for a time window\n• **&export [@user] [csv|columns]** - Download game history\n• **&leaderboard [profit|winrate|blackjacks|streak]** - Top players\n• **&simulate [@user] [bet] [hands]** - Risk of ruin and balance bands\n• **&latency** - Interaction latency stats\n• **Interactive Sessions** - Win/loss tracking with statistics",
         inline=False
     )
 
     embed.add_field(
         name="🎲 Casino Features",
-        value="• **Session Tracking** - Complete game history\n• **Advanced Statistics** - Win rates, streaks, profit analysis\n• **Visual Charts** - Performance graphs\n• **Side Bets** - Perfect Pair, 21+3, Dealer Bust\n• **Split & Double** - Advanced BlackJack features\n• **Cash Out System** - Flexible balance management",
+        value="• **Session Tracking** - Complete game history\n• **Advanced Statistics** - Win rates, streaks, profit analysis\n• **Visual Charts** - Performance graphs\n• **Side Bets** - Perfect Pair, 21+3, Dealer Bust\n• **Split & Double** - Advanced BlackJack features\n• **Strategy Advice** - Best play and EVs for any hand\n• **Cash Out System** - Flexible balance management",
         inline=False
     )
 
@@ -1041,8 +1653,7 @@ async def help_command(ctx):
 # =================================================================================================
 
 if __name__ == "__main__":
-    # Start the web server to keep the bot alive
-    keep_alive()
+    # The health server is started from setup_hook, on the bot's own event loop
 
     # Get token from environment variable
     TOKEN = os.getenv('DISCORD_TOKEN')
@@ -1060,3 +1671,5 @@ if __name__ == "__main__":
         except Exception as e:
             print(f"❌ Error starting bot: {e}")
             print("Make sure your Discord token is valid and the bot has proper permissions.")
+            # Non-zero, so the cluster supervisor restarts this process; only a missing token exits cleanly
+            sys.exit(1)
@@ -0,0 +1,59 @@
+import hashlib
+import json
+from collections import OrderedDict
+
+from metrics import REGISTRY
+
+message_edits = REGISTRY.counter(
+    "lolettan_message_edits_total", "Interaction message edits, by whether they were sent or skipped as no-ops", ("result",)
+)
+
+
+class MessageRenderer:
+    """Remembers the last embed and view sent to each message and skips edits that would change nothing.
+
+    A skipped edit is answered with a bare defer(), which acknowledges the interaction
+    without a PATCH to the message. Views can expose a `render_state` attribute for
+    state that is not visible in their components but must still force a new edit.
+    """
+
+    def __init__(self, max_messages=2000):
+        self.max_messages = max_messages
+        self._last = OrderedDict()  # message_id -> fingerprint of the last payload
+
+    @staticmethod
+    def fingerprint(embed, view):
+        payload = [embed.to_dict() if embed is not None else None]
+        if view is not None:
+            payload += [type(view).__name__, view.to_components(), getattr(view, "render_state", None)]
+        return hashlib.blake2b(json.dumps(payload, sort_keys=True, default=str).encode(), digest_size=16).digest()
+
+    def _store(self, message_id, fingerprint):
+        self._last[message_id] = fingerprint
+        self._last.move_to_end(message_id)
+        while len(self._last) > self.max_messages:
+            self._last.popitem(last=False)
+
+    def remember(self, message_id, embed, view):
+        """Record what a message now shows, e.g. after sending it."""
+        self._store(message_id, self.fingerprint(embed, view))
+
+    def forget(self, message_id):
+        """Drop a message whose content was changed outside the renderer."""
+        self._last.pop(message_id, None)
+
+    async def edit(self, interaction, embed=None, view=None):
+        """Edit the interaction's message, or only defer if it already shows this payload. Returns True if edited."""
+        message = interaction.message
+        fingerprint = self.fingerprint(embed, view)
+        if message is not None and self._last.get(message.id) == fingerprint:
+            self._last.move_to_end(message.id)
+            message_edits.inc(result="skipped")
+            await interaction.response.defer()
+            return False
+
+        await interaction.response.edit_message(embed=embed, view=view)
+        message_edits.inc(result="sent")
+        if message is not None:
+            self._store(message.id, fingerprint)
+        return True
@@ -0,0 +1,165 @@
+import asyncio
+import heapq
+import itertools
+import time
+from enum import IntEnum
+
+from metrics import REGISTRY
+
+OUTBOUND_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+queue_depth = REGISTRY.gauge("lolettan_outbound_queue_depth", "REST calls waiting in the outbound scheduler", ("priority",))
+queue_wait = REGISTRY.histogram(
+    "lolettan_outbound_wait_seconds", "Time REST calls spent queued before being sent", ("priority",), buckets=OUTBOUND_WAIT_BUCKETS
+)
+coalesced = REGISTRY.counter("lolettan_outbound_coalesced_total", "Queued REST calls merged into an identical queued call", ("priority",))
+
+
+class Priority(IntEnum):
+    """Queued traffic, most urgent first. Interaction acknowledgements never queue at all."""
+
+    FOLLOWUP = 0  # Interaction follow-ups and edits of the original response
+    MESSAGE = 1  # Replies in channels, such as mention replies
+    UPLOAD = 2  # Large attachments, such as history exports
+    LOG = 3  # Command log batches
+
+
+class _Job:
+    __slots__ = ("priority", "route", "call", "args", "kwargs", "coalesce", "future", "enqueued")
+
+    def __init__(self, priority, route, call, args, kwargs, coalesce, future):
+        self.priority = priority
+        self.route = route
+        self.call = call
+        self.args = args
+        self.kwargs = kwargs
+        self.coalesce = coalesce
+        self.future = future
+        self.enqueued = time.monotonic()
+
+
+class OutboundScheduler:
+    """Single queue for the bot's outgoing REST calls, sent in priority order.
+
+    Interaction acknowledgements are sent directly, since they have a 3s deadline and
+    their own rate limits; queued traffic from `hold_from` down waits (up to `max_hold`
+    seconds) while `hold_while()` says interactions are being handled. Each route, such
+    as a channel, has a token bucket of `route_rate` calls per `route_per` seconds, so
+    a burst to one channel waits on its own bucket without holding up other channels.
+    Calls queued with the same `coalesce` key share one send.
+    """
+
+    def __init__(self, max_concurrent=4, route_rate=5, route_per=5.0, hold_while=None, hold_from=Priority.UPLOAD, max_hold=3.0):
+        self.max_concurrent = max_concurrent
+        self.route_rate = route_rate
+        self.route_per = route_per
+        self.hold_while = hold_while or (lambda: False)
+        self.hold_from = hold_from
+        self.max_hold = max_hold
+        self._queue = []  # Heap of (priority, seq, job)
+        self._seq = itertools.count()
+        self._coalescing = {}  # coalesce key -> queued job
+        self._buckets = {}  # route -> [tokens, time.monotonic() of last refill]
+        self._depth = dict.fromkeys(Priority, 0)
+        self._running = 0
+        self._wake = asyncio.Event()
+        self._task = None
+
+    @property
+    def in_flight(self):
+        return self._running
+
+    @property
+    def pending(self):
+        return len(self._queue)
+
+    def _count(self, priority, change):
+        self._depth[priority] += change
+        queue_depth.set(self._depth[priority], priority=priority.name.lower())
+
+    async def send(self, priority, route, call, *args, coalesce=None, **kwargs):
+        """Queue `await call(*args, **kwargs)` and return its result once it has been sent."""
+        if coalesce is not None and coalesce in self._coalescing:
+            coalesced.inc(priority=priority.name.lower())
+            return await asyncio.shield(self._coalescing[coalesce].future)
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+        job = _Job(priority, route, call, args, kwargs, coalesce, asyncio.get_running_loop().create_future())
+        heapq.heappush(self._queue, (priority, next(self._seq), job))
+        self._count(priority, 1)
+        if coalesce is not None:
+            self._coalescing[coalesce] = job
+        self._wake.set()
+        return await asyncio.shield(job.future)
+
+    def _take_token(self, route, now):
+        """Take a call from the route's bucket. Returns 0, or the seconds until one is available."""
+        if route is None:
+            return 0
+        bucket = self._buckets.get(route)
+        if bucket is None:
+            bucket = self._buckets[route] = [self.route_rate, now]
+        bucket[0] = min(self.route_rate, bucket[0] + (now - bucket[1]) * self.route_rate / self.route_per)
+        bucket[1] = now
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0
+        return (1 - bucket[0]) * self.route_per / self.route_rate
+
+    def _prune_buckets(self, now):
+        # A bucket that has been idle long enough to refill completely is the same as no bucket
+        idle = [route for route, (_, updated) in self._buckets.items() if now - updated > self.route_per]
+        for route in idle:
+            del self._buckets[route]
+
+    def _dispatch(self):
+        """Start every job that may go now. Returns the seconds until the next retry, or None to wait for a wake-up."""
+        now = time.monotonic()
+        holding = self.hold_while()
+        deferred = []
+        retry = None
+        while self._queue and self._running < self.max_concurrent:
+            entry = heapq.heappop(self._queue)
+            job = entry[2]
+            if holding and job.priority >= self.hold_from and now - job.enqueued < self.max_hold:
+                wait = min(0.05, job.enqueued + self.max_hold - now)
+            else:
+                wait = self._take_token(job.route, now)
+            if wait:
+                deferred.append(entry)
+                retry = wait if retry is None else min(retry, wait)
+                continue
+            self._start(job, now)
+        for entry in deferred:
+            heapq.heappush(self._queue, entry)
+        if len(self._buckets) > 1000:
+            self._prune_buckets(now)
+        return retry
+
+    def _start(self, job, now):
+        self._count(job.priority, -1)
+        if job.coalesce is not None:
+            self._coalescing.pop(job.coalesce, None)
+        queue_wait.observe(now - job.enqueued, priority=job.priority.name.lower())
+        self._running += 1
+        asyncio.get_running_loop().create_task(self._execute(job))
+
+    async def _execute(self, job):
+        try:
+            job.future.set_result(await job.call(*job.args, **job.kwargs))
+        except Exception as e:
+            job.future.set_exception(e)
+        finally:
+            self._running -= 1
+            self._wake.set()
+
+    async def run(self):
+        """Dispatch loop; started by the first send()."""
+        while True:
+            retry = self._dispatch()
+            try:
+                await asyncio.wait_for(self._wake.wait(), retry)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
@@ -0,0 +1,95 @@
+class SessionStats:
+    """Running session statistics, updated in O(1) for every recorded game."""
+
+    __slots__ = (
+        "total_games", "wins", "losses", "ties", "blackjacks", "cashouts", "splits", "doubles",
+        "total_bet", "total_won", "total_lost", "cashout_refunds", "cashout_losses", "side_bet_winnings",
+        "biggest_win", "biggest_loss", "win_streak", "loss_streak", "max_win_streak", "max_loss_streak",
+        "last_outcome"
+    )
+
+    def __init__(self):
+        self.total_games = 0
+        self.wins = 0
+        self.losses = 0
+        self.ties = 0
+        self.blackjacks = 0
+        self.cashouts = 0
+        self.splits = 0
+        self.doubles = 0
+        self.total_bet = 0
+        self.total_won = 0
+        self.total_lost = 0
+        self.cashout_refunds = 0
+        self.cashout_losses = 0
+        self.side_bet_winnings = 0
+        self.biggest_win = 0
+        self.biggest_loss = 0
+        self.win_streak = 0
+        self.loss_streak = 0
+        self.max_win_streak = 0
+        self.max_loss_streak = 0
+        self.last_outcome = None
+
+    def record(self, game):
+        """Fold one game record into the running totals."""
+        outcome = game.outcome
+        amount = game.amount
+
+        self.total_games += 1
+        self.total_bet += amount
+        self.side_bet_winnings += game.side_bet_winnings
+        if game.is_split:
+            self.splits += 1
+        if game.is_double:
+            self.doubles += 1
+
+        if outcome == "win":
+            self.wins += 1
+            self.total_won += amount  # 1:1 payout
+            self.biggest_win = max(self.biggest_win, amount)
+            self.win_streak += 1
+            self.loss_streak = 0
+            self.max_win_streak = max(self.max_win_streak, self.win_streak)
+        elif outcome == "lose":
+            self.losses += 1
+            self.total_lost += amount
+            self.biggest_loss = max(self.biggest_loss, amount)
+            self.loss_streak += 1
+            self.win_streak = 0
+            self.max_loss_streak = max(self.max_loss_streak, self.loss_streak)
+        elif outcome == "blackjack":
+            self.blackjacks += 1
+            # Double down pays 1:1 on the already doubled amount, everything else pays 3:2
+            self.total_won += amount if game.is_double else int(amount * 1.5)
+        elif outcome == "tie":
+            self.ties += 1
+        elif outcome == "cashout":
+            # Cash out: count refund and loss separately
+            self.cashouts += 1
+            self.cashout_refunds += game.refund_amount
+            self.cashout_losses += game.lost_amount
+
+        self.last_outcome = outcome
+
+    def to_state(self):
+        return [getattr(self, name) for name in self.__slots__]
+
+    @classmethod
+    def from_state(cls, state):
+        stats = cls()
+        for name, value in zip(cls.__slots__, state):
+            setattr(stats, name, value)
+        return stats
+
+    @property
+    def net_profit(self):
+        return self.total_won - self.total_lost + self.side_bet_winnings + self.cashout_refunds - self.cashout_losses
+
+    @property
+    def win_rate(self):
+        return (self.wins / self.total_games) * 100 if self.total_games > 0 else 0
+
+    @property
+    def avg_bet(self):
+        return self.total_bet / self.total_games if self.total_games > 0 else 0
@@ -0,0 +1,194 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from session_stats import SessionStats
+from game_records import GameHistory, GameRecord
+from leaderboards import PlayerTotals
+
+
+class CasinoSession:
+    """Casino state for one player in one guild."""
+
+    def __init__(self, guild_id, user_id, balance=0, max_history=None, leaderboards=None):
+        self.guild_id = guild_id
+        self.user_id = user_id
+        self.balance = balance
+        self.games = GameHistory(max_history)
+        self.session_active = False
+        self.session_start = None
+        self.starting_balance = 0
+        self.session_mark = 0  # Position in games where the current session began
+        self.session_stats = SessionStats()
+        self.lock = asyncio.Lock()
+        self.last_active = time.monotonic()
+        self.leaderboards = leaderboards
+
+    @property
+    def key(self):
+        return (self.guild_id, self.user_id)
+
+    @property
+    def session_games(self):
+        """The current session's games, read straight from the player's history."""
+        return self.games.view(self.session_mark)
+
+    def start(self, balance):
+        """Open a new session with the given starting balance."""
+        self.balance = balance
+        self.starting_balance = balance
+        self.session_active = True
+        self.session_start = datetime.now()
+        self.session_mark = self.games.total
+        self.session_stats = SessionStats()
+
+    def end(self):
+        """Close the current session; the balance and game history are kept."""
+        self.session_active = False
+        self.session_start = None
+        self.session_mark = self.games.total
+        self.session_stats = SessionStats()
+
+    def add_game(self, game):
+        """Record a finished game in the session and the player's history."""
+        self.games.append(game)
+        self.session_stats.record(game)
+        if self.leaderboards is not None:
+            self.leaderboards.record(self.guild_id, self.user_id, game)
+
+    def get_duration(self):
+        """Calculates the current session duration in minutes."""
+        if self.session_start:
+            duration = datetime.now() - self.session_start
+            minutes = int(duration.total_seconds() / 60)
+            return f"{minutes} minutes"
+        return "0 minutes"
+
+
+class SessionStore:
+    """Casino sessions keyed by (guild_id, user_id), with idle eviction."""
+
+    def __init__(self, idle_timeout=3600, max_history=None, leaderboards=None):
+        self.idle_timeout = idle_timeout
+        self.max_history = max_history
+        self.leaderboards = leaderboards
+        self._sessions = {}
+        # Evicted players only keep what is needed to resume: their balance and a compressed history.
+        # Histories loaded from a snapshot stay uncompressed until the next eviction pass, to keep startup fast
+        self._dormant = {}
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def __iter__(self):
+        return iter(self._sessions.values())
+
+    def get(self, guild_id, user_id):
+        """Return the session for a player, creating or reviving it if needed."""
+        key = (guild_id, user_id)
+        session = self._sessions.get(key)
+        if session is None:
+            session = CasinoSession(guild_id, user_id, max_history=self.max_history, leaderboards=self.leaderboards)
+            dormant = self._dormant.pop(key, None)
+            if dormant is not None:
+                session.balance, games = dormant
+                session.games = games if isinstance(games, GameHistory) else GameHistory.unpack(games, self.max_history)
+            self._sessions[key] = session
+        session.last_active = time.monotonic()
+        return session
+
+    def for_interaction(self, interaction):
+        return self.get(interaction.guild_id, interaction.user.id)
+
+    def for_member(self, guild, member):
+        return self.get(guild.id if guild else None, member.id)
+
+    @contextmanager
+    def bulk_load(self):
+        """Load a snapshot or apply many events at once; the leaderboards are rebuilt once at the end."""
+        if self.leaderboards is None:
+            yield self
+            return
+        with self.leaderboards.deferred():
+            yield self
+
+    def apply_event(self, event):
+        """Apply one journal event while replaying."""
+        session = self.get(event["g"], event["u"])
+        kind = event["t"]
+        if kind == "start":
+            session.start(event["balance"])
+            session.session_start = datetime.fromtimestamp(event["ts"])
+        elif kind == "game":
+            session.add_game(GameRecord.from_row(event["game"]))
+        elif kind == "end":
+            session.end()
+        session.balance = event.get("balance", session.balance)
+
+    def snapshot_state(self):
+        """Plain-data copy of every player's state for a journal snapshot."""
+        players = []
+        for session in self._sessions.values():
+            players.append(self._with_totals({
+                "g": session.guild_id,
+                "u": session.user_id,
+                "balance": session.balance,
+                "games": session.games.to_state(),
+                "session_mark": session.session_mark if session.session_active else None,
+                "start": session.session_start.timestamp() if session.session_start else None,
+                "starting_balance": session.starting_balance,
+                "stats": session.session_stats.to_state(),
+            }))
+        for (guild_id, user_id), (balance, games) in self._dormant.items():
+            if not isinstance(games, GameHistory):
+                games = GameHistory.unpack(games)
+            players.append(self._with_totals({
+                "g": guild_id, "u": user_id, "balance": balance, "games": games.to_state(), "session_mark": None
+            }))
+        return players
+
+    def _with_totals(self, player):
+        # Leaderboard totals are saved too, so loading a snapshot does not have to recount every history
+        totals = self.leaderboards.totals(player["g"], player["u"]) if self.leaderboards is not None else None
+        if totals is not None:
+            player["totals"] = totals.to_state()
+        return player
+
+    def load_state(self, players):
+        """Restore the store from snapshot_state() output."""
+        self._sessions.clear()
+        self._dormant.clear()
+        if self.leaderboards is not None:
+            self.leaderboards.clear()
+        for player in players:
+            key = (player["g"], player["u"])
+            games = GameHistory.from_state(player["games"], self.max_history)
+            if self.leaderboards is not None:
+                totals = player.get("totals")
+                totals = PlayerTotals.from_state(totals) if totals else PlayerTotals.from_history(games)
+                self.leaderboards.load(*key, totals)
+            if player["session_mark"] is None:
+                self._dormant[key] = (player["balance"], games)
+                continue
+            session = self.get(*key)
+            session.games = games
+            session.start(player["starting_balance"])
+            session.session_start = datetime.fromtimestamp(player["start"])
+            session.session_mark = player["session_mark"]
+            session.session_stats = SessionStats.from_state(player["stats"])
+            session.balance = player["balance"]
+
+    def evict_idle(self):
+        """Drop sessions that have been idle too long and are not mid-game. Returns the number evicted."""
+        cutoff = time.monotonic() - self.idle_timeout
+        idle = [
+            key for key, session in self._sessions.items()
+            if session.last_active < cutoff and not session.session_active and not session.lock.locked()
+        ]
+        for key in idle:
+            session = self._sessions.pop(key)
+            self._dormant[key] = (session.balance, session.games.pack())
+        for key, (balance, games) in self._dormant.items():
+            if isinstance(games, GameHistory):
+                self._dormant[key] = (balance, games.pack())
+        return len(idle)
@@ -0,0 +1,239 @@
+import asyncio
+import atexit
+import json
+import os
+import sqlite3
+import time
+
+from leaderboards import Leaderboards
+from session_store import SessionStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    origin TEXT NOT NULL,
+    body TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS snapshot (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    seq INTEGER NOT NULL,
+    pruned_seq INTEGER NOT NULL,
+    state TEXT NOT NULL
+);
+"""
+
+
+class SqliteJournal:
+    """Casino journal in a SQLite database shared by every bot process on the machine.
+
+    A drop-in for GameJournal: events are group-committed from each process in one
+    transaction, and every process tails the events written by the others and applies
+    them to its own SessionStore, so any process can serve any player. In WAL mode
+    readers never block the writer. Polling is cheap: `PRAGMA data_version` only changes
+    when another connection has committed, so an idle database costs one pragma per
+    interval.
+
+    Each guild is served by exactly one shard, so two processes never mutate the same
+    player at once and applying each other's events in seq order stays consistent.
+
+    Compaction folds everything into a snapshot but only deletes the events covered by
+    the previous snapshot, so a process that is a little behind can still catch up
+    from the events; one a whole compaction behind reloads from the snapshot.
+    """
+
+    def __init__(self, path, origin, flush_interval=0.25, max_batch=500, compact_every=100000, busy_timeout=30.0,
+                 max_history=None):
+        self.path = path
+        self.origin = origin  # Tags this process's events so it skips them when tailing
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.compact_every = compact_every
+        self.busy_timeout = busy_timeout
+        self.max_history = max_history  # For the scratch stores built while compacting
+        self.seq = 0  # Highest seq written or applied by this process
+        self.snapshot_seq = 0
+        self._buffer = []
+        self._conn = None
+        self._data_version = None
+        self._written_seq = 0  # seq of this process's latest committed event
+        self._wake = asyncio.Event()
+        self._io_lock = asyncio.Lock()
+        atexit.register(self._flush_sync)
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            # Only ever used by one thread at a time, under _io_lock
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")  # Durable at each WAL checkpoint, and never corrupt
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    @property
+    def pending(self):
+        """Events buffered but not yet written."""
+        return len(self._buffer)
+
+    def append(self, kind, guild_id, user_id, **fields):
+        """Queue an event for the next group commit. Never blocks."""
+        event = {"t": kind, "g": guild_id, "u": user_id}
+        event.update(fields)
+        self._buffer.append(json.dumps(event, separators=(",", ":")))
+        if len(self._buffer) >= self.max_batch:
+            self._wake.set()
+
+    def _write(self, bodies):
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany("INSERT INTO events (origin, body) VALUES (?, ?)", ((self.origin, body) for body in bodies))
+            self._written_seq = conn.execute("SELECT MAX(seq) FROM events").fetchone()[0]
+
+    def _flush_sync(self):
+        if self._buffer:
+            bodies, self._buffer = self._buffer, []
+            self._write(bodies)
+
+    async def flush(self):
+        """Write every buffered event in one transaction."""
+        if not self._buffer:
+            return
+        async with self._io_lock:
+            bodies, self._buffer = self._buffer, []
+            await asyncio.to_thread(self._write, bodies)
+
+    def _read_new(self, after):
+        """What other processes committed after seq `after`, or None if nothing was committed since the last look.
+
+        Returns (events, state, last_seq, snapshot_seq). state is only set when the
+        events we still needed were compacted away; it then replaces the whole store.
+        """
+        conn = self._connect()
+        data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self._data_version:
+            # Nobody else has committed since the last look, so every newer event is our own
+            return ([], None, max(after, self._written_seq), self.snapshot_seq) if self._written_seq > after else None
+        self._data_version = data_version
+        with conn:
+            conn.execute("BEGIN")  # One read snapshot, so a compaction cannot slip in between the queries
+            snapshot_seq, pruned_seq = self._snapshot_seqs(conn)
+            if pruned_seq > after:
+                scratch = self._scratch_store()
+                _, last_seq, snapshot_seq = self._load(conn, scratch)
+                return [], scratch.snapshot_state(), last_seq, snapshot_seq
+            last_seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM events").fetchone()[0]
+            rows = conn.execute(
+                "SELECT body FROM events WHERE seq > ? AND origin != ? ORDER BY seq", (after, self.origin)
+            ).fetchall()
+        return [json.loads(body) for body, in rows], None, max(last_seq, after), snapshot_seq
+
+    async def sync(self, store):
+        """Apply events other processes have committed since the last sync. Returns how many were applied."""
+        async with self._io_lock:
+            new = await asyncio.to_thread(self._read_new, self.seq)
+        if new is None:
+            return 0
+        events, state, last_seq, self.snapshot_seq = new
+        if state is not None:
+            print(f"⚠️ Fell behind a compaction at seq {self.snapshot_seq}, reloading casino state")
+            # Our own events buffered since the read are not in the snapshot yet
+            events = [json.loads(body) for body in self._buffer]
+            with store.bulk_load():
+                store.load_state(state)
+                for event in events:
+                    store.apply_event(event)
+        else:
+            for event in events:
+                store.apply_event(event)
+        self.seq = max(self.seq, last_seq)
+        return len(events)
+
+    async def run(self, store):
+        """Background loop: group-commit this process's events, apply everyone else's, and compact now and then."""
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+                await self.sync(store)
+                if self.seq - self.snapshot_seq >= self.compact_every:
+                    await self.compact(store)
+            except Exception as e:
+                print(f"❌ Error syncing shared casino store: {e}")
+
+    @staticmethod
+    def _snapshot_seqs(conn):
+        """(seq covered by the snapshot, seq through which events have been deleted)."""
+        row = conn.execute("SELECT seq, pruned_seq FROM snapshot WHERE id = 1").fetchone()
+        return row if row else (0, 0)
+
+    def _scratch_store(self):
+        # With leaderboards of its own, so the snapshots it makes carry each player's totals
+        return SessionStore(max_history=self.max_history, leaderboards=Leaderboards())
+
+    @staticmethod
+    def _load(conn, store, through=None):
+        """Load the snapshot and the events after it, up to seq `through`, into store.
+
+        Returns (events applied, last seq, snapshot seq). Run inside a read transaction.
+        """
+        snapshot = conn.execute("SELECT seq, state FROM snapshot WHERE id = 1").fetchone()
+        snapshot_seq = 0
+        applied = 0
+        with store.bulk_load():
+            if snapshot:
+                snapshot_seq = snapshot[0]
+                store.load_state(json.loads(snapshot[1]))
+            last_seq = snapshot_seq
+            rows = conn.execute(
+                "SELECT seq, body FROM events WHERE seq > ? AND seq <= ? ORDER BY seq",
+                (snapshot_seq, through if through is not None else 2 ** 63 - 1)
+            )
+            for seq, body in rows:
+                store.apply_event(json.loads(body))
+                last_seq = seq
+                applied += 1
+        return applied, last_seq, snapshot_seq
+
+    def _compact(self):
+        """Fold the snapshot and events into a new snapshot, independently of any process's memory."""
+        conn = self._connect()
+        scratch = self._scratch_store()
+        with conn:
+            conn.execute("BEGIN")
+            _, through, base_seq = self._load(conn, scratch)
+        state = json.dumps(scratch.snapshot_state(), separators=(",", ":"))
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if self._snapshot_seqs(conn)[0] != base_seq:
+                return None  # Another process compacted first
+            conn.execute(
+                "INSERT OR REPLACE INTO snapshot (id, seq, pruned_seq, state) VALUES (1, ?, ?, ?)", (through, base_seq, state)
+            )
+            conn.execute("DELETE FROM events WHERE seq <= ?", (base_seq,))
+        return through
+
+    async def compact(self, store):
+        """Write a snapshot of everything committed so far and drop the events it covers."""
+        await self.flush()
+        started = time.perf_counter()
+        async with self._io_lock:
+            # Built from the database in a thread, so no process's in-memory state has to be frozen meanwhile
+            snapshot_seq = await asyncio.to_thread(self._compact)
+        if snapshot_seq is not None:
+            self.snapshot_seq = snapshot_seq
+            print(f"📦 Compacted shared casino store at seq {snapshot_seq} in {time.perf_counter() - started:.2f}s")
+
+    def replay(self, store):
+        """Rebuild the store from the snapshot and every event since. Returns the number of events applied."""
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN")
+            applied, self.seq, self.snapshot_seq = self._load(conn, store)
+        self._data_version = None  # The first sync always looks, in case of a commit since
+        return applied
@@ -0,0 +1,52 @@
+from functools import lru_cache
+
+# Card ranks by blackjack value: index 0 is the ace, 1-8 are twos to nines, 9 is every ten-valued card
+RANK_VALUES = (11, 2, 3, 4, 5, 6, 7, 8, 9, 10)
+TEN = 9
+RANK_NAMES = ("A", "2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K")
+SUITS = ("♠", "♥", "♦", "♣")
+RED_SUITS = frozenset(("♥", "♦"))
+
+
+def value_counts(decks):
+    """Cards of each blackjack value in a fresh shoe, indexed as RANK_VALUES."""
+    return (4 * decks,) * 9 + (16 * decks,)
+
+
+def card_counts(decks):
+    """Each of the 52 distinct cards, as ((rank index into RANK_NAMES, suit), copies in the shoe)."""
+    return [((rank, suit), decks) for rank in range(len(RANK_NAMES)) for suit in SUITS]
+
+
+def add_card(total, soft_aces, value):
+    """Add a card to a hand total, counting aces as 11 until that would bust."""
+    total += value
+    soft_aces += value == 11
+    while total > 21 and soft_aces:
+        total -= 10
+        soft_aces -= 1
+    return total, soft_aces
+
+
+@lru_cache(maxsize=None)
+def dealer_outcomes(counts, total, soft_aces, cards, hits_soft_17=False):
+    """Probability of each way the dealer's hand can finish, drawing without replacement.
+
+    Returns a tuple of ((final_total, cards_in_hand), probability), with 22 standing for
+    any bust. Every distinct shoe composition and hand is only worked out once.
+    """
+    if total > 21:
+        return (((22, cards), 1.0),)
+    if total > 17 or (total == 17 and not (hits_soft_17 and soft_aces)):
+        return (((total, cards), 1.0),)
+
+    remaining = sum(counts)
+    outcomes = {}
+    for rank, count in enumerate(counts):
+        if not count:
+            continue
+        drawn = counts[:rank] + (count - 1,) + counts[rank + 1:]
+        next_total, next_soft = add_card(total, soft_aces, RANK_VALUES[rank])
+        for outcome, probability in dealer_outcomes(drawn, next_total, next_soft, cards + 1, hits_soft_17):
+            outcomes[outcome] = outcomes.get(outcome, 0.0) + probability * count / remaining
+    return tuple(outcomes.items())
@@ -0,0 +1,98 @@
+import random
+from bisect import bisect_right
+from itertools import accumulate, combinations_with_replacement
+from math import comb
+
+from shoe import RANK_NAMES, RED_SUITS, card_counts, dealer_outcomes, value_counts
+
+# Payouts to 1 for each winning result, best first
+PAYTABLES = {
+    "Perfect Pair": (("Perfect Pair", 25), ("Colored Pair", 12), ("Mixed Pair", 6)),
+    "21 + 3": (("Suited Trips", 100), ("Straight Flush", 40), ("Three of a Kind", 30), ("Straight", 10), ("Flush", 5)),
+    "Dealer Bust": (("8+ Card Bust", 250), ("7 Card Bust", 50), ("6 Card Bust", 12), ("5 Card Bust", 4),
+                    ("4 Card Bust", 2), ("3 Card Bust", 2)),
+}
+
+
+def _draws(cards, hand_size):
+    """Every distinct hand of hand_size cards dealt from the shoe, with its probability."""
+    hands = comb(sum(count for _, count in cards), hand_size)
+    for hand in combinations_with_replacement(range(len(cards)), hand_size):
+        ways = 1
+        for index in set(hand):
+            ways *= comb(cards[index][1], hand.count(index))
+        if ways:
+            yield [cards[index][0] for index in hand], ways / hands
+
+
+def _perfect_pair(hand):
+    (rank_a, suit_a), (rank_b, suit_b) = hand
+    if rank_a != rank_b:
+        return None
+    if suit_a == suit_b:
+        return "Perfect Pair"
+    return "Colored Pair" if (suit_a in RED_SUITS) == (suit_b in RED_SUITS) else "Mixed Pair"
+
+
+def _twenty_one_plus_three(hand):
+    ranks = sorted(rank for rank, _ in hand)
+    flush = len({suit for _, suit in hand}) == 1
+    trips = ranks[0] == ranks[2]
+    # Aces play high or low: A-2-3 and Q-K-A both count
+    straight = (ranks[1] == ranks[0] + 1 and ranks[2] == ranks[1] + 1) or ranks == [0, len(RANK_NAMES) - 2, len(RANK_NAMES) - 1]
+    if trips:
+        return "Suited Trips" if flush else "Three of a Kind"
+    if straight:
+        return "Straight Flush" if flush else "Straight"
+    return "Flush" if flush else None
+
+
+def _result_probabilities(decks, hits_soft_17):
+    """Exact probability of every winning result of each side bet from a fresh shoe."""
+    probabilities = {bet_type: dict.fromkeys((name for name, _ in paytable), 0.0) for bet_type, paytable in PAYTABLES.items()}
+
+    cards = card_counts(decks)
+    for hand, weight in _draws(cards, 2):
+        result = _perfect_pair(hand)
+        if result:
+            probabilities["Perfect Pair"][result] += weight
+    for hand, weight in _draws(cards, 3):
+        result = _twenty_one_plus_three(hand)
+        if result:
+            probabilities["21 + 3"][result] += weight
+
+    for (final, cards_in_hand), probability in dealer_outcomes(value_counts(decks), 0, 0, 0, hits_soft_17):
+        if final == 22:
+            result = "8+ Card Bust" if cards_in_hand >= 8 else f"{cards_in_hand} Card Bust"
+            probabilities["Dealer Bust"][result] += probability
+    return probabilities
+
+
+class SideBetEngine:
+    """Resolves side bets against an N-deck shoe from lookup tables built once.
+
+    Each bet type gets a cumulative probability table over its paying results, so a
+    resolution is one random draw and a binary search. Pass a seed for reproducible
+    results, e.g. in tests.
+    """
+
+    def __init__(self, decks=6, hits_soft_17=False, seed=None):
+        self.decks = decks
+        self.rng = random.Random(seed)
+        self.probabilities = _result_probabilities(decks, hits_soft_17)
+        self._tables = {}  # bet_type -> (cumulative probabilities, ((result, payout), ...))
+        for bet_type, paytable in PAYTABLES.items():
+            thresholds = list(accumulate(self.probabilities[bet_type][name] for name, _ in paytable))
+            self._tables[bet_type] = (thresholds, paytable)
+
+    def resolve(self, bet_type):
+        """Draw a result for one side bet. Returns (result name, payout to 1), or (None, 0) if it lost."""
+        thresholds, paytable = self._tables[bet_type]
+        index = bisect_right(thresholds, self.rng.random())
+        return paytable[index] if index < len(paytable) else (None, 0)
+
+    def house_edge(self, bet_type):
+        """Expected loss per rupee staked on a bet type."""
+        probabilities = self.probabilities[bet_type]
+        win = sum(probabilities[name] * (payout + 1) for name, payout in PAYTABLES[bet_type])
+        return 1 - win
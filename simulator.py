@@ -0,0 +1,102 @@
+import time
+
+import numpy as np
+
+from charts import ChartCache
+from game_records import Outcome, FLAG_PARTIAL_CASHOUT, net_changes
+
+FINAL_PERCENTILES = (5, 25, 50, 75, 95)
+DRAWDOWN_PERCENTILES = (50, 90, 99)
+
+# Cells (simulations x hands) drawn per batch. A batch peaks at about 40 bytes per cell
+# (the paths and peaks arrays plus rng.choice's temporaries), so roughly 20 MB here
+BATCH_CELLS = 500_000
+
+
+class SimulationCache(ChartCache):
+    """LRU cache of simulation results, keyed by a hash of the player model and parameters."""
+
+
+def player_model(history):
+    """Outcome and bet distributions from a player's recorded games, as NumPy arrays.
+
+    Each game is reduced to its net change per rupee staked, so doubles, blackjack
+    payouts, cash-outs and side bets keep the frequencies they were actually played with.
+    """
+    amounts = np.frombuffer(history.amounts, dtype=np.int64)
+    codes = np.frombuffer(history.outcomes, dtype=np.uint8)
+    flags = np.frombuffer(history.flags, dtype=np.uint8)
+    # A full cash-out is a withdrawal of the balance, not a bet, so it must not count as one that returned 0
+    withdrawals = (codes == Outcome.CASHOUT) & (flags & FLAG_PARTIAL_CASHOUT == 0)
+    staked = (amounts > 0) & ~withdrawals
+    returns, return_counts = np.unique(net_changes(history)[staked] / amounts[staked], return_counts=True)
+    bets, bet_counts = np.unique(amounts[staked], return_counts=True)
+    return {
+        "games": int(np.count_nonzero(staked)),  # The games the model is drawn from
+        "returns": returns,
+        "return_counts": return_counts,
+        "bets": bets,
+        "bet_counts": bet_counts,
+    }
+
+
+def _simulate_batch(rng, model, balance, bet, hands, count):
+    # Worked in place, so a batch holds one float64 paths array plus a peaks array at a time
+    paths = rng.choice(model["returns"], size=(count, hands), p=model["return_counts"] / model["return_counts"].sum())
+    if bet:
+        paths *= bet
+        floor = bet
+    else:
+        paths *= rng.choice(model["bets"], size=(count, hands), p=model["bet_counts"] / model["bet_counts"].sum())
+        floor = model["bets"][0]
+    np.cumsum(paths, axis=1, out=paths)
+    paths += balance
+
+    # A player is ruined once they can no longer cover a bet, and stops playing there
+    broke = paths < floor
+    ruined = broke.any(axis=1)
+    ruin_hand = np.where(ruined, broke.argmax(axis=1), hands)
+    del broke
+    ruin_balance = paths[np.arange(count), np.minimum(ruin_hand, hands - 1)]
+    np.copyto(paths, ruin_balance[:, None], where=np.arange(hands) > ruin_hand[:, None])
+
+    peaks = np.maximum.accumulate(paths, axis=1)
+    np.maximum(peaks, balance, out=peaks)
+    finals = paths[:, -1].copy()  # A view would keep the whole batch alive until every batch is done
+    falls = np.subtract(peaks, paths, out=paths)
+    drawdowns = falls.max(axis=1)
+    drawdown_shares = np.divide(falls, peaks, out=falls).max(axis=1)
+    return finals, drawdowns, drawdown_shares, ruin_hand[ruined] + 1
+
+
+def simulate(model, balance, bet=None, hands=100, sims=100000, seed=None):
+    """Monte Carlo of `sims` future sessions of `hands` hands each, starting from `balance`.
+
+    With `bet` set every hand stakes that amount; otherwise stakes are drawn from the
+    player's own bet distribution. Runs in a worker process. Raises ValueError for a
+    model without any staked games.
+    """
+    if not model["games"]:
+        raise ValueError("The player model has no staked games to draw from")
+    started = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    batch = max(1, BATCH_CELLS // hands)
+    batches = [_simulate_batch(rng, model, balance, bet, hands, min(batch, sims - first)) for first in range(0, sims, batch)]
+    finals, drawdowns, drawdown_shares, ruin_hands = (np.concatenate(parts) for parts in zip(*batches))
+
+    return {
+        "sims": sims,
+        "hands": hands,
+        "risk_of_ruin": len(ruin_hands) / sims,
+        "median_hands_to_ruin": float(np.median(ruin_hands)) if len(ruin_hands) else None,
+        "mean_final": float(finals.mean()),
+        "final_percentiles": dict(zip(FINAL_PERCENTILES, np.percentile(finals, FINAL_PERCENTILES).tolist())),
+        "drawdown_percentiles": dict(zip(DRAWDOWN_PERCENTILES, np.percentile(drawdowns, DRAWDOWN_PERCENTILES).tolist())),
+        # Largest fall as a share of the balance's high point at the time
+        "drawdown_share_percentiles": dict(zip(DRAWDOWN_PERCENTILES, np.percentile(drawdown_shares, DRAWDOWN_PERCENTILES).tolist())),
+        "expected_per_hand": float(
+            (model["returns"] * model["return_counts"]).sum() / model["return_counts"].sum()
+            * (bet or (model["bets"] * model["bet_counts"]).sum() / model["bet_counts"].sum())
+        ),
+        "seconds": time.perf_counter() - started,
+    }
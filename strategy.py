@@ -0,0 +1,167 @@
+import json
+import os
+import tempfile
+import time
+from functools import lru_cache
+
+from shoe import RANK_VALUES, TEN, add_card, dealer_outcomes, value_counts
+
+# Upcards and cards typed by players, mapped to indices into RANK_VALUES
+CARD_ALIASES = {"A": 0, "J": TEN, "Q": TEN, "K": TEN, "T": TEN}
+CARD_ALIASES.update((str(value), index) for index, value in enumerate(RANK_VALUES) if index)
+CARD_LABELS = ("A", "2", "3", "4", "5", "6", "7", "8", "9", "10")
+
+HARD_TOTALS = range(4, 22)
+SOFT_TOTALS = range(12, 22)
+ACTION_NAMES = {"stand": "🛑 Stand", "hit": "🃏 Hit", "double": "🔁 Double", "split": "🧩 Split"}
+
+
+def _without(counts, rank):
+    return counts[:rank] + (counts[rank] - 1,) + counts[rank + 1:]
+
+
+def _dealer_finals(counts, up, hits_soft_17):
+    """Dealer final totals (17-21, 22 for bust) for an upcard, given the dealer has no blackjack."""
+    counts = _without(counts, up)
+    total, soft = add_card(0, 0, RANK_VALUES[up])
+    finals = dict.fromkeys(range(17, 23), 0.0)
+    remaining = sum(counts)
+    for hole, count in enumerate(counts):
+        hole_total, hole_soft = add_card(total, soft, RANK_VALUES[hole])
+        if not count or hole_total == 21:
+            continue  # The dealer peeks, so hands are only played out against non-blackjacks
+        for (final, _), probability in dealer_outcomes(_without(counts, hole), hole_total, hole_soft, 2, hits_soft_17):
+            finals[final] += probability * count / remaining
+    played = sum(finals.values())
+    return {final: probability / played for final, probability in finals.items()}, counts
+
+
+def _up_tables(counts, up, hits_soft_17, double_after_split):
+    """Expected value of every action for every player hand against one upcard."""
+    finals, counts = _dealer_finals(counts, up, hits_soft_17)
+    remaining = sum(counts)
+    draws = [(rank, count / remaining) for rank, count in enumerate(counts) if count]
+
+    @lru_cache(maxsize=None)
+    def stand(total):
+        if total > 21:
+            return -1.0
+        return sum(probability * ((final > 21 or final < total) - (final <= 21 and final > total))
+                   for final, probability in finals.items())
+
+    @lru_cache(maxsize=None)
+    def hit(total, soft):
+        return sum(probability * best(*add_card(total, soft, RANK_VALUES[rank])) for rank, probability in draws)
+
+    @lru_cache(maxsize=None)
+    def best(total, soft):
+        if total > 21:
+            return -1.0
+        return max(stand(total), hit(total, soft)) if total < 21 else stand(total)
+
+    def double(total, soft):
+        return 2 * sum(probability * stand(add_card(total, soft, RANK_VALUES[rank])[0]) for rank, probability in draws)
+
+    def actions(total, soft, can_double=True):
+        evs = {"stand": stand(total), "hit": hit(total, soft)}
+        if can_double:
+            evs["double"] = double(total, soft)
+        return evs
+
+    def split(rank):
+        # Each split hand gets one more card and is then played on its own, without resplitting
+        hand_ev = 0.0
+        for second, probability in draws:
+            total, soft = add_card(*add_card(0, 0, RANK_VALUES[rank]), RANK_VALUES[second])
+            if rank == 0:
+                hand_ev += probability * stand(total)  # Split aces get one card each
+            else:
+                hand_ev += probability * max(actions(total, soft, double_after_split).values())
+        return 2 * hand_ev
+
+    return {
+        "hard": {total: actions(total, 0) for total in HARD_TOTALS},
+        "soft": {total: actions(total, 1) for total in SOFT_TOTALS},
+        "pair": {rank: dict(actions(*add_card(*add_card(0, 0, RANK_VALUES[rank]), RANK_VALUES[rank])), split=split(rank))
+                 for rank in range(len(RANK_VALUES))},
+    }
+
+
+def build_tables(decks=6, hits_soft_17=False, double_after_split=True):
+    """Strategy and EV tables for every hand against every upcard. Runs in a worker process."""
+    started = time.perf_counter()
+    counts = value_counts(decks)
+    tables = {"hard": {}, "soft": {}, "pair": {}}
+    for up in range(len(RANK_VALUES)):
+        for kind, rows in _up_tables(counts, up, hits_soft_17, double_after_split).items():
+            for hand, evs in rows.items():
+                tables[kind].setdefault(hand, {})[up] = {action: round(ev, 5) for action, ev in evs.items()}
+    return {
+        "rules": rules_key(decks, hits_soft_17, double_after_split),
+        "tables": tables,
+        "seconds": time.perf_counter() - started,
+    }
+
+
+def rules_key(decks, hits_soft_17, double_after_split):
+    return f"{decks}d-{'h17' if hits_soft_17 else 's17'}-{'das' if double_after_split else 'ndas'}"
+
+
+def parse_cards(text):
+    """Card indices from text like "A 7", "10,6" or "KQ". Raises KeyError on an unknown card."""
+    tokens = text.upper().replace(",", " ").replace("10", " 10 ").split()
+    cards = []
+    for token in tokens:
+        if token in CARD_ALIASES:
+            cards.append(CARD_ALIASES[token])
+        else:
+            cards.extend(CARD_ALIASES[char] for char in token)
+    return cards
+
+
+class StrategyAdvisor:
+    """Basic strategy answered from prebuilt EV tables: every lookup is a few dict reads."""
+
+    def __init__(self, built):
+        self.rules = built["rules"]
+        # JSON turns the int keys into strings, so lookups go through strings either way
+        self._tables = {kind: {str(hand): {str(up): evs for up, evs in row.items()} for hand, row in rows.items()}
+                        for kind, rows in built["tables"].items()}
+
+    @classmethod
+    def load(cls, path, rules):
+        """The cached tables for these rules, or None if there are none yet."""
+        try:
+            with open(path, encoding="utf-8") as f:
+                built = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return cls(built) if built.get("rules") == rules else None
+
+    @staticmethod
+    def save(path, built):
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        # A temp file of its own, since every cluster process may save the same tables at once
+        with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=directory, suffix=".tmp", delete=False) as f:
+            json.dump(built, f)
+        try:
+            os.replace(f.name, path)
+        except OSError:
+            os.unlink(f.name)
+            raise
+
+    def advise(self, cards, up):
+        """Best action for a hand against an upcard, with the EV of each allowed action (per rupee bet)."""
+        total, soft = 0, 0
+        for card in cards:
+            total, soft = add_card(total, soft, RANK_VALUES[card])
+        if total > 21:
+            return None, {}
+        if len(cards) == 2 and cards[0] == cards[1]:
+            evs = self._tables["pair"][str(cards[0])][str(up)]
+        else:
+            evs = self._tables["soft" if soft else "hard"][str(total)][str(up)]
+        if len(cards) > 2:
+            evs = {action: ev for action, ev in evs.items() if action in ("stand", "hit")}
+        return max(evs, key=evs.get), evs
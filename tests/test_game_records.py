@@ -0,0 +1,92 @@
+import random
+
+import pytest
+
+from game_records import GameHistory, GameRecord, PrefixIndex, net_change
+
+COUNTS = {"win": "wins", "lose": "losses", "tie": "ties", "blackjack": "blackjacks", "cashout": "cashouts"}
+
+
+def random_game(rng, timestamp):
+    amount = rng.choice([10, 25, 100, 333])
+    if rng.random() < 0.1:
+        game = GameRecord.partial_cashout(amount, rng.randint(0, amount))
+    else:
+        game = GameRecord.new(
+            rng.choice(list(COUNTS)), amount, side_bets={"Perfect Pair": 5} if rng.random() < 0.2 else None,
+            side_bet_winnings=rng.choice([0, 0, 30]), is_double=rng.random() < 0.1
+        )
+    game.timestamp = timestamp
+    return game
+
+
+def brute_force(games, start_ts, end_ts):
+    window = [
+        game for game in games
+        if (start_ts is None or game.timestamp >= start_ts) and (end_ts is None or game.timestamp < end_ts)
+    ]
+    stats = dict.fromkeys(COUNTS.values(), 0)
+    for game in window:
+        stats[COUNTS[game.outcome]] += 1
+    stats["wagered"] = sum(game.amount for game in window)
+    stats["net"] = sum(net_change(game.code, game.amount, game.refund_amount, game.side_bet_winnings, game.flags) for game in window)
+    stats["side_winnings"] = sum(game.side_bet_winnings for game in window)
+    stats["games"] = len(window)
+    stats["first_ts"] = window[0].timestamp if window else None
+    stats["last_ts"] = window[-1].timestamp if window else None
+    return stats
+
+
+def check_windows(rng, history, played, queries=40):
+    retained = played[history.base:]
+    assert len(retained) == len(history)
+    low, high = played[0].timestamp - 5, played[-1].timestamp + 5
+    windows = [(None, None), (None, high), (low, None)]
+    for _ in range(queries):
+        start_ts, end_ts = sorted(rng.randint(low, high) for _ in range(2))
+        windows.append((start_ts, end_ts))
+        # Windows about one block wide, where the ragged ends meet in the middle
+        windows.append((start_ts, start_ts + rng.randint(0, PrefixIndex.BLOCK // 2)))
+    for start_ts, end_ts in windows:
+        assert history.window_stats(start_ts, end_ts) == brute_force(retained, start_ts, end_ts)
+
+
+@pytest.mark.parametrize("max_records", [None, 1000])
+def test_window_stats_match_brute_force(max_records):
+    rng = random.Random(max_records or 5)
+    history = GameHistory(max_records)
+    played = []
+    timestamp = 1_700_000_000
+    for round_ in range(12):
+        # Several games can share a timestamp, and the index is extended as games come in between queries
+        for _ in range(rng.choice([1, 255, 256, 257, 700])):
+            timestamp += rng.choice([0, 0, 1, 3])
+            game = random_game(rng, timestamp)
+            played.append(game)
+            history.append(game)
+        check_windows(rng, history, played)
+    if max_records:
+        assert history.base > 0
+
+
+def test_window_stats_after_trim_rebuild_the_index():
+    rng = random.Random(9)
+    history = GameHistory(max_records=600)
+    played = []
+    for timestamp in range(1000, 1600):
+        played.append(random_game(rng, timestamp))
+        history.append(played[-1])
+    check_windows(rng, history, played, queries=10)
+    assert history.index is not None and history.base == 0
+
+    played.append(random_game(rng, 1600))
+    history.append(played[-1])  # Reaching the cap drops the oldest quarter, and the index with it
+    assert history.base == 150 and history.index is None
+    check_windows(rng, history, played, queries=10)
+    assert history.window_stats(None, 1150)["games"] == 0
+
+
+def test_empty_history():
+    history = GameHistory()
+    stats = history.window_stats()
+    assert stats["games"] == 0 and stats["net"] == 0 and stats["first_ts"] is None
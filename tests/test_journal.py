@@ -0,0 +1,104 @@
+import asyncio
+import random
+
+from game_records import GameRecord
+from journal import GameJournal
+from leaderboards import METRICS, Leaderboards
+from session_store import SessionStore
+
+
+def make_journal(tmp_path):
+    return GameJournal(str(tmp_path / "journal.jsonl"), str(tmp_path / "snapshot.json"))
+
+
+def play(journal, store, user_id, games):
+    """Start a session and record `games` wins, journaling each step like the bot does."""
+    session = store.get(1, user_id)
+    session.start(1000)
+    journal.append("start", 1, user_id, balance=session.balance, ts=0)
+    for _ in range(games):
+        game = GameRecord.new("win", 100)
+        session.add_game(game)
+        session.balance += 200
+        journal.append("game", 1, user_id, balance=session.balance, game=game.to_row())
+
+
+def replayed(tmp_path):
+    journal = make_journal(tmp_path)
+    store = SessionStore()
+    journal.replay(store)
+    return journal, store
+
+
+def test_replay_across_torn_tail(tmp_path):
+    journal, store = make_journal(tmp_path), SessionStore()
+    play(journal, store, 7, 3)
+    journal._flush_sync()
+    journal._file.close()
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write('{"seq":5,"t":"game","g":1,')  # Crash mid-write
+
+    journal, store = replayed(tmp_path)
+    assert journal.seq == 4
+    play(journal, store, 8, 2)
+    journal._flush_sync()
+    journal._file.close()
+
+    journal, store = replayed(tmp_path)
+    assert journal.seq == 7
+    assert len(store.get(1, 7).games) == 3
+    assert len(store.get(1, 8).games) == 2
+    assert store.get(1, 8).balance == 1400
+
+
+def test_compaction_keeps_tail_and_quarantines_corrupt_lines(tmp_path):
+    journal, store = make_journal(tmp_path), SessionStore()
+    play(journal, store, 7, 3)
+    journal._flush_sync()
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write("not json\n")
+    asyncio.run(journal.compact(store))
+    play(journal, store, 8, 2)
+    journal._flush_sync()
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write("{broken\n")
+    play(journal, store, 9, 1)
+    asyncio.run(journal.compact(store))
+    play(journal, store, 10, 1)
+    journal._flush_sync()
+    journal._file.close()
+
+    with open(journal.path + ".corrupt", encoding="utf-8") as f:
+        assert f.read() == "not json\n{broken\n"
+    journal, restored = replayed(tmp_path)
+    assert journal.seq == 11
+    for user_id, games in ((7, 3), (8, 2), (9, 1), (10, 1)):
+        assert len(restored.get(1, user_id).games) == games
+        assert restored.get(1, user_id).balance == store.get(1, user_id).balance
+
+
+def test_replay_rebuilds_leaderboards(tmp_path):
+    rng = random.Random(3)
+    journal, store = make_journal(tmp_path), SessionStore(leaderboards=Leaderboards(min_games_for_win_rate=5))
+    for user_id in range(12):
+        store.get(1, user_id).start(1000)
+    for i in range(400):
+        user_id = rng.randrange(12)
+        game = GameRecord.new(rng.choice(["win", "lose", "tie", "blackjack"]), rng.choice([10, 50, 100]))
+        store.get(1, user_id).add_game(game)
+        journal.append("game", 1, user_id, balance=1000, game=game.to_row())
+        if i == 250:
+            store.get(1, 0).end()
+            journal.append("end", 1, 0, balance=1000)
+            store.evict_idle()
+            asyncio.run(journal.compact(store))
+    journal._flush_sync()
+    journal._file.close()
+
+    restored = SessionStore(leaderboards=Leaderboards(min_games_for_win_rate=5))
+    make_journal(tmp_path).replay(restored)
+    for metric in METRICS:
+        expected = [(user_id, score, totals.to_state()) for user_id, score, totals in store.leaderboards.top(1, metric, 12)]
+        assert [
+            (user_id, score, totals.to_state()) for user_id, score, totals in restored.leaderboards.top(1, metric, 12)
+        ] == expected
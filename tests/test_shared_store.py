@@ -0,0 +1,114 @@
+import asyncio
+import sqlite3
+
+from game_records import GameRecord
+from leaderboards import Leaderboards
+from session_store import SessionStore
+from shared_store import SqliteJournal
+
+
+def open_process(tmp_path, origin):
+    """One bot process: its own journal connection and its own store, replayed from the database."""
+    journal = SqliteJournal(str(tmp_path / "casino.db"), origin)
+    store = SessionStore(leaderboards=Leaderboards())
+    journal.replay(store)
+    return journal, store
+
+
+def play(journal, store, guild_id, user_id, games):
+    """Record `games` wins for a player, journaling each step like the bot does."""
+    session = store.get(guild_id, user_id)
+    if not session.session_active:
+        session.start(1000)
+        journal.append("start", guild_id, user_id, balance=session.balance, ts=0)
+    for _ in range(games):
+        game = GameRecord.new("win", 100)
+        session.add_game(game)
+        session.balance += 100
+        journal.append("game", guild_id, user_id, balance=session.balance, game=game.to_row())
+
+
+def state(store, guild_id, user_id):
+    session = store.get(guild_id, user_id)
+    return len(session.games), session.balance, session.session_active
+
+
+def tick(journal, store):
+    """One pass of the background loop: write this process's events, then apply everyone else's."""
+    asyncio.run(journal.flush())
+    asyncio.run(journal.sync(store))
+
+
+def count_events(journal):
+    with sqlite3.connect(journal.path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+
+def test_two_writers_see_each_others_games(tmp_path):
+    journal_a, store_a = open_process(tmp_path, "a")
+    journal_b, store_b = open_process(tmp_path, "b")
+    play(journal_a, store_a, 1, 10, 3)
+    play(journal_b, store_b, 2, 20, 2)
+    asyncio.run(journal_a.flush())
+    asyncio.run(journal_b.flush())
+
+    assert asyncio.run(journal_a.sync(store_a)) == 3  # b's start and two games
+    assert asyncio.run(journal_b.sync(store_b)) == 4
+    for store in (store_a, store_b):
+        assert state(store, 1, 10) == (3, 1300, True)
+        assert state(store, 2, 20) == (2, 1200, True)
+        assert store.leaderboards.rank(2, 20, "profit") == 1
+    # Nothing new since, and a's own events are not applied twice
+    assert asyncio.run(journal_a.sync(store_a)) == 0
+    assert journal_a.seq == journal_b.seq == 7
+
+
+def test_reload_after_falling_behind_a_compaction(tmp_path):
+    journal_a, store_a = open_process(tmp_path, "a")
+    journal_b, store_b = open_process(tmp_path, "b")
+    play(journal_b, store_b, 2, 20, 1)
+    asyncio.run(journal_b.flush())
+
+    play(journal_a, store_a, 1, 10, 4)
+    tick(journal_a, store_a)
+    asyncio.run(journal_a.compact(store_a))
+    play(journal_a, store_a, 1, 10, 2)
+    tick(journal_a, store_a)
+    asyncio.run(journal_a.compact(store_a))  # Deletes the events the first snapshot covered
+    play(journal_a, store_a, 1, 10, 1)
+    tick(journal_a, store_a)
+
+    play(journal_b, store_b, 2, 20, 2)  # Still buffered when b notices it is behind
+    asyncio.run(journal_b.sync(store_b))
+    assert state(store_b, 1, 10) == (7, 1700, True)
+    assert state(store_b, 2, 20) == (3, 1300, True)
+    assert journal_b.seq == journal_a.seq == 10  # Everything either process wrote
+    assert store_b.leaderboards.top(2, "profit")[0][:2] == (20, 300)
+
+    asyncio.run(journal_b.flush())
+    assert asyncio.run(journal_a.sync(store_a)) == 2
+    assert state(store_a, 2, 20) == (3, 1300, True)
+
+
+def test_compaction_keeps_what_a_fresh_process_replays(tmp_path):
+    journal_a, store_a = open_process(tmp_path, "a")
+    play(journal_a, store_a, 1, 10, 5)
+    play(journal_a, store_a, 1, 11, 3)
+    store_a.get(1, 11).end()
+    journal_a.append("end", 1, 11, balance=store_a.get(1, 11).balance)
+    asyncio.run(journal_a.compact(store_a))
+    assert count_events(journal_a) == 11  # The first compaction only writes a snapshot
+
+    play(journal_a, store_a, 1, 10, 2)
+    asyncio.run(journal_a.compact(store_a))
+    assert count_events(journal_a) == 2  # Only the events since the previous snapshot are left
+    assert journal_a.snapshot_seq == 13
+
+    play(journal_a, store_a, 1, 10, 1)
+    asyncio.run(journal_a.flush())
+
+    _, fresh = open_process(tmp_path, "c")
+    assert state(fresh, 1, 10) == state(store_a, 1, 10) == (8, 1800, True)
+    assert state(fresh, 1, 11) == (3, 1300, False)
+    for metric in ("profit", "streak"):
+        assert [entry[:2] for entry in fresh.leaderboards.top(1, metric)] == [entry[:2] for entry in store_a.leaderboards.top(1, metric)]
@@ -0,0 +1,82 @@
+import random
+from math import comb, sqrt
+
+import pytest
+
+from shoe import RANK_NAMES, SUITS, card_counts, dealer_outcomes, value_counts
+from side_bets import PAYTABLES, SideBetEngine, _draws, _perfect_pair, _twenty_one_plus_three
+
+DECKS = 6
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return SideBetEngine(decks=DECKS, seed=1)
+
+
+def test_probabilities_match_counted_hands(engine):
+    # Counted by hand for a 6-deck shoe of 312 cards, where each distinct card has 6 copies
+    pairs, triples = comb(312, 2), comb(312, 3)
+    assert engine.probabilities["Perfect Pair"] == pytest.approx({
+        "Perfect Pair": 52 * comb(6, 2) / pairs,
+        "Colored Pair": 13 * 2 * 6 * 6 / pairs,
+        "Mixed Pair": 13 * 12 * 12 / pairs,
+    })
+    assert engine.probabilities["21 + 3"] == pytest.approx({
+        "Suited Trips": 52 * comb(6, 3) / triples,
+        "Straight Flush": 4 * 12 * 6 ** 3 / triples,
+        "Three of a Kind": 13 * (comb(24, 3) - 4 * comb(6, 3)) / triples,
+        "Straight": 12 * (24 ** 3 - 4 * 6 ** 3) / triples,
+        "Flush": 4 * (comb(78, 3) - 13 * comb(6, 3) - 12 * 6 ** 3) / triples,
+    })
+
+
+def test_every_hand_adds_up_to_one(engine):
+    cards = card_counts(DECKS)
+    assert sum(weight for _, weight in _draws(cards, 2)) == pytest.approx(1)
+    assert sum(weight for _, weight in _draws(cards, 3)) == pytest.approx(1)
+    assert sum(probability for _, probability in dealer_outcomes(value_counts(DECKS), 0, 0, 0, False)) == pytest.approx(1)
+    for bet_type, paytable in PAYTABLES.items():
+        thresholds, _ = engine._tables[bet_type]
+        assert thresholds == sorted(thresholds)
+        assert thresholds[-1] == pytest.approx(sum(engine.probabilities[bet_type].values()))
+        assert 0 < thresholds[-1] < 1
+
+
+def test_resolve_pays_from_the_paytable():
+    first, second = SideBetEngine(decks=DECKS, seed=7), SideBetEngine(decks=DECKS, seed=7)
+    for bet_type, paytable in PAYTABLES.items():
+        results = [first.resolve(bet_type) for _ in range(5000)]
+        assert results == [second.resolve(bet_type) for _ in range(5000)]
+        assert set(results) <= set(paytable) | {(None, 0)}
+        assert (None, 0) in results
+
+
+def check_against_house_edge(engine, bet_type, results, rounds):
+    """Compare how often each result came up, and what the bets returned, with the engine's tables."""
+    probabilities = engine.probabilities[bet_type]
+    for name, probability in probabilities.items():
+        assert abs(results.count(name) / rounds - probability) < 4 * sqrt(probability * (1 - probability) / rounds)
+    payouts = dict(PAYTABLES[bet_type])
+    returned = sum(payouts[name] + 1 for name in results if name)
+    mean = 1 - engine.house_edge(bet_type)
+    spread = sqrt(sum(probabilities[name] * (payout + 1) ** 2 for name, payout in payouts.items()) - mean ** 2)
+    assert abs((1 - returned / rounds) - engine.house_edge(bet_type)) < 4 * spread / sqrt(rounds)
+
+
+@pytest.mark.parametrize("bet_type", PAYTABLES)
+def test_house_edge_matches_resolved_bets(engine, bet_type):
+    rounds = 200000
+    check_against_house_edge(engine, bet_type, [engine.resolve(bet_type)[0] for _ in range(rounds)], rounds)
+
+
+@pytest.mark.parametrize("bet_type, hand_size, classify", [
+    ("Perfect Pair", 2, _perfect_pair),
+    ("21 + 3", 3, _twenty_one_plus_three),
+])
+def test_house_edge_matches_dealt_hands(engine, bet_type, hand_size, classify):
+    # Deals real cards from a fresh shoe, so this checks the tables and not just the draws from them
+    rng = random.Random(11)
+    shoe = [(rank, suit) for rank in range(len(RANK_NAMES)) for suit in SUITS] * DECKS
+    rounds = 100000
+    check_against_house_edge(engine, bet_type, [classify(rng.sample(shoe, hand_size)) for _ in range(rounds)], rounds)
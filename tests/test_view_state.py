@@ -0,0 +1,58 @@
+import re
+
+import pytest
+
+from view_state import GAME_TEMPLATE, SIDE_BET_CODES, decode_game_state, encode_game_state
+
+ACTIONS = ("win", "lose", "tie", "blackjack", "cashout", "split", "double", "advice")
+LARGEST_SNOWFLAKE = 2 ** 64 - 1
+
+
+def round_trip(custom_id):
+    # discord.py matches a DynamicItem template against the whole custom_id
+    match = re.fullmatch(GAME_TEMPLATE, custom_id)
+    assert match is not None, custom_id
+    return decode_game_state(match)
+
+
+@pytest.mark.parametrize("action", ACTIONS)
+@pytest.mark.parametrize("side_bets, split_hand, is_double", [
+    ({}, 0, False),
+    ({}, 0, True),
+    ({"Perfect Pair": 50}, 1, False),
+    ({"21 + 3": 5, "Dealer Bust": 20}, 2, False),
+    ({"Perfect Pair": 50, "21 + 3": 25, "Dealer Bust": 10}, 0, True),
+])
+def test_round_trip(action, side_bets, split_hand, is_double):
+    custom_id = encode_game_state(action, 123456789012345678, 500, side_bets, split_hand, is_double)
+    assert round_trip(custom_id) == (action, {
+        "owner_id": 123456789012345678,
+        "bet_amount": 500,
+        "side_bets": side_bets,
+        "split_hand": split_hand,
+        "is_double": is_double,
+    })
+
+
+def test_longest_custom_id_fits_discord_limit():
+    # Every side bet at once, on the longest action, with the widest owner id and a 12-digit bet
+    bet = 10 ** 12 - 1
+    side_bets = dict.fromkeys(SIDE_BET_CODES, bet)
+    for action in ACTIONS:
+        for split_hand, is_double in ((0, False), (0, True), (2, False)):
+            custom_id = encode_game_state(action, LARGEST_SNOWFLAKE, bet, side_bets, split_hand, is_double)
+            assert len(custom_id) <= 100, custom_id
+            assert round_trip(custom_id)[1]["side_bets"] == side_bets
+
+
+@pytest.mark.parametrize("custom_id", [
+    "game:win:1234:500:x:-",
+    "game:win:1234:-500:-:-",
+    "game:win:1234:500:s3:-",
+    "game:win:1234:500:-:pp=",
+    "game:Win:1234:500:-:-",
+    "game:win:1234:500:-:-:extra",
+    "start_session",
+])
+def test_rejects_other_custom_ids(custom_id):
+    assert re.fullmatch(GAME_TEMPLATE, custom_id) is None
@@ -0,0 +1,40 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_workers_do_not_rerun_the_main_script(tmp_path):
+    # Run as a real script, since spawned children only re-run __main__ when it is a file
+    (tmp_path / "probe.py").write_text(textwrap.dedent("""
+        import sys
+
+        def loaded():
+            return "json" in sys.modules, getattr(sys.modules["__main__"], "MARKER", None)
+    """))
+    (tmp_path / "entry.py").write_text(textwrap.dedent("""
+        import asyncio
+        import json  # Stands in for the bot's own heavy imports
+        import probe
+        from workers import WorkerPool
+
+        MARKER = "main script ran"
+
+        async def main():
+            pool = WorkerPool(workers=1)
+            try:
+                print(await pool.run(probe.loaded))
+            finally:
+                pool.shutdown()
+
+        if __name__ == "__main__":
+            asyncio.run(main())
+    """))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([REPO, str(tmp_path)]))
+    result = subprocess.run(
+        [sys.executable, "entry.py"], cwd=tmp_path, env=env, capture_output=True, text=True, timeout=60
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "(False, None)"
@@ -0,0 +1,35 @@
+"""Game table state carried in button custom_ids, so a table survives a restart without a per-message view."""
+
+# Short codes for the side bets, keeping a table's custom_ids well inside Discord's 100 characters
+SIDE_BET_CODES = {"Perfect Pair": "pp", "21 + 3": "t3", "Dealer Bust": "db"}
+SIDE_BET_NAMES = {code: name for name, code in SIDE_BET_CODES.items()}
+
+# game:<action>:<owner>:<bet>:<flags>:<side bets>, e.g. game:win:1234:500:s2:pp=50,db=20
+# flags is "-", "d" for a doubled bet, or "s1"/"s2" for the hand of a split being played
+GAME_TEMPLATE = r"game:(?P<action>[a-z]+):(?P<owner>\d+):(?P<bet>\d+):(?P<flags>-|d|s[12]):(?P<side>-|[a-z0-9]+=\d+(?:,[a-z0-9]+=\d+)*)"
+
+
+def encode_game_state(action, owner_id, bet_amount, side_bets, split_hand=0, is_double=False):
+    if split_hand:
+        flags = f"s{split_hand}"
+    else:
+        flags = "d" if is_double else "-"
+    side = ",".join(f"{SIDE_BET_CODES[name]}={amount}" for name, amount in side_bets.items()) or "-"
+    return f"game:{action}:{owner_id}:{bet_amount}:{flags}:{side}"
+
+
+def decode_game_state(match):
+    """Turn a GAME_TEMPLATE match into (action, GameView keyword arguments)."""
+    flags = match["flags"]
+    side_bets = {}
+    if match["side"] != "-":
+        for entry in match["side"].split(","):
+            code, amount = entry.split("=")
+            side_bets[SIDE_BET_NAMES[code]] = int(amount)
+    return match["action"], {
+        "owner_id": int(match["owner"]),
+        "bet_amount": int(match["bet"]),
+        "side_bets": side_bets,
+        "split_hand": int(flags[1]) if flags[0] == "s" else 0,
+        "is_double": flags == "d",
+    }
@@ -0,0 +1,112 @@
+import asyncio
+import multiprocessing
+import sys
+import types
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+
+class PoolSaturated(Exception):
+    """Raised when every worker is busy and the pending queue is full."""
+
+
+class WorkerCrashed(PoolSaturated):
+    """Raised when a job's worker died twice in a row; callers fall back as if the pool were busy."""
+
+
+@contextmanager
+def _bare_main():
+    """Hide the bot's __main__ module while worker processes are spawned.
+
+    A spawned child normally re-runs the parent's main script as __mp_main__, which for
+    the bot means loading discord and building the bot, the journal and the side bet
+    tables in every worker. Workers only need the modules their jobs are pickled from,
+    so the children are started against an empty __main__ instead.
+    """
+    main = sys.modules["__main__"]
+    sys.modules["__main__"] = types.ModuleType("__main__")
+    try:
+        yield
+    finally:
+        sys.modules["__main__"] = main
+
+
+class WorkerPool:
+    """Process pool for CPU-heavy work that must stay off the bot's event loop."""
+
+    def __init__(self, workers=2, max_pending=4, timeout=30, initializer=None):
+        self.workers = workers
+        self.initializer = initializer
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._executor = None
+        self._pending = 0
+
+    def _get_executor(self):
+        if self._executor is None:
+            # Spawn instead of fork so the gateway's threads and sockets are never copied into a worker
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=self.initializer
+            )
+        return self._executor
+
+    @property
+    def pending(self):
+        return self._pending
+
+    @property
+    def saturated(self):
+        return self._pending >= self.max_pending
+
+    def _release(self, _future):
+        self._pending -= 1
+
+    async def run(self, func, *args, timeout=None):
+        """Run func(*args) in a worker process and return its result.
+
+        If a worker dies (for example OOM-killed), the executor is broken for good, so
+        it is replaced and the job retried once before giving up with WorkerCrashed.
+        """
+        if self.saturated:
+            raise PoolSaturated(f"{self._pending} jobs already pending")
+
+        for attempt in range(2):
+            executor = self._get_executor()
+            try:
+                return await self._submit(executor, func, args, timeout)
+            except BrokenProcessPool:
+                self._replace(executor)
+                print(f"⚠️ A worker process died while running {getattr(func, '__name__', func)}, restarting the pool")
+        raise WorkerCrashed(f"Workers died twice running {getattr(func, '__name__', func)}")
+
+    async def _submit(self, executor, func, args, timeout):
+        loop = asyncio.get_running_loop()
+        with _bare_main():
+            # The executor spawns any workers it still needs right here, in submit
+            job = executor.submit(func, *args)
+        self._pending += 1
+        # The slot is only freed once the worker is actually done, even if we stop waiting earlier
+        job.add_done_callback(lambda f: loop.call_soon_threadsafe(self._release, f))
+        return await asyncio.wait_for(asyncio.wrap_future(job), timeout or self.timeout)
+
+    def _replace(self, executor):
+        # Jobs that were running on the same broken executor all land here; only the first replaces it
+        if self._executor is executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def start(self, func, timeout=None):
+        """Bring up every worker, each running its initializer, and return func()'s result from each.
+
+        Workers are otherwise only spawned on demand; submitting one job per worker at
+        once makes the executor start them all.
+        """
+        return await asyncio.gather(*(self.run(func, timeout=timeout) for _ in range(self.workers)))
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None